@@ -6,7 +6,8 @@ Provides comprehensive user administration interface.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from .models import User, UserProfile
+from .models import EmployeeIdSequence, User, UserProfile
+from .utils import bulk_set_approval
 
 
 @admin.register(User)
@@ -70,10 +71,8 @@ class UserAdmin(BaseUserAdmin):
     
     def approve_users(self, request, queryset):
         """Bulk approve selected users"""
-        updated = 0
-        for user in queryset.filter(is_approved=False):
-            user.approve_user(request.user)
-            updated += 1
+        user_ids = list(queryset.filter(is_approved=False).values_list('id', flat=True))
+        updated = len(bulk_set_approval(user_ids, request.user, approve=True))
         
         self.message_user(
             request,
@@ -83,7 +82,8 @@ class UserAdmin(BaseUserAdmin):
     
     def disapprove_users(self, request, queryset):
         """Bulk disapprove selected users"""
-        updated = queryset.update(is_approved=False, approved_by=None, approved_at=None)
+        user_ids = list(queryset.filter(is_approved=True).values_list('id', flat=True))
+        updated = len(bulk_set_approval(user_ids, request.user, approve=False))
         self.message_user(
             request,
             f'{updated} user(s) were disapproved.'
@@ -124,6 +124,19 @@ class UserProfileAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user')
 
 
+@admin.register(EmployeeIdSequence)
+class EmployeeIdSequenceAdmin(admin.ModelAdmin):
+    """
+    Read-only view of employee ID sequences; counters only move through leasing.
+    """
+    
+    list_display = ['prefix', 'next_value', 'updated_at']
+    readonly_fields = ['prefix', 'next_value', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+
 # Customize admin site headers
 admin.site.site_header = "Office Management System"
 admin.site.site_title = "Office Management Admin"
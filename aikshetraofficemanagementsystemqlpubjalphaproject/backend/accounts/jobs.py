@@ -0,0 +1,26 @@
+"""
+Background jobs for user accounts.
+"""
+
+from jobs.registry import job
+from notifications.delivery import deliver_batch
+
+from .models import User
+from .utils import approval_notices, generate_profile_picture_derivatives
+
+
+@job(queue='notifications')
+def deliver_approval_notices(user_ids, approved_by_id):
+    """Notify bulk-approved users in-app and by email"""
+    approved_by = User.objects.get(id=approved_by_id)
+    users = list(User.objects.filter(id__in=user_ids, is_approved=True))
+    notifications, emails = approval_notices(users, approved_by)
+    deliver_batch(notifications, emails)
+    return {'users': len(users)}
+
+
+@job(queue='default')
+def build_profile_picture_derivatives(user_id):
+    """Build the resized profile picture variants for a user"""
+    derivatives = generate_profile_picture_derivatives(user_id)
+    return {'sizes': len((derivatives or {}).get('sizes', {}))}
@@ -0,0 +1,53 @@
+"""
+Bulk-import users from a CSV or JSONL file.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.onboarding import IMPORT_FORMATS, UserImport, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Import users from a CSV or JSONL file with batched inserts and parallel password hashing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header row) or JSONL file of users')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='File format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, help='Rows per insert batch')
+        parser.add_argument('--workers', type=int, help='Password hashing processes (default: one per CPU)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate rows without creating users')
+        parser.add_argument('--report', help='Write the full JSON report, including every row error, to this file')
+
+    def handle(self, *args, **options):
+        import_format = options['format'] or detect_format(options['path'])
+        user_import = UserImport(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+
+        def progress(run):
+            self.stdout.write(f'{run.total_rows} rows read, {run.created} created, {len(run.errors)} failed')
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = user_import.run(stream, import_format, progress=progress)
+        except OSError as e:
+            raise CommandError(f'Could not read {options["path"]}: {str(e)}')
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f'Row {error["row"]} ({error["email"]}): {error["errors"]}'))
+        if len(report['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f'... and {len(report["errors"]) - 20} more row errors'))
+
+        if options['report']:
+            with open(options['report'], 'w') as report_file:
+                json.dump(report, report_file, indent=2, default=str)
+
+        prefix = '[dry run] ' if report['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{report["total_rows"]} rows, {report["valid"]} valid, {report["created"]} created, '
+            f'{report["failed"]} failed in {report["elapsed_seconds"]}s ({report["rows_per_second"]} rows/s)'
+        ))
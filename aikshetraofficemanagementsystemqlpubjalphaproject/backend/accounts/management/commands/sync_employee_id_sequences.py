@@ -0,0 +1,30 @@
+"""
+Move employee ID sequences past every existing employee ID.
+Run once after introducing sequences, and after importing IDs assigned elsewhere.
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from accounts.sequences import employee_id_prefix, sync_sequence
+from accounts.utils import DEFAULT_ID_PREFIX, DEPARTMENT_ID_PREFIXES
+
+
+class Command(BaseCommand):
+    help = 'Sync employee ID sequences with the employee IDs already in use'
+
+    def handle(self, *args, **options):
+        prefixes = set(DEPARTMENT_ID_PREFIXES.values()) | {DEFAULT_ID_PREFIX}
+
+        # Include prefixes of IDs entered by hand, so future allocations never collide with them
+        employee_ids = User.objects.exclude(employee_id=None).values_list('employee_id', flat=True)
+        for employee_id in employee_ids.iterator():
+            prefix = employee_id_prefix(employee_id)
+            if prefix:
+                prefixes.add(prefix)
+
+        for prefix in sorted(prefixes):
+            next_value = sync_sequence(prefix)
+            self.stdout.write(f'{prefix}: next number at least {next_value}')
+
+        self.stdout.write(self.style.SUCCESS(f'Synced {len(prefixes)} employee ID sequences'))
@@ -4,7 +4,7 @@ Supports admin, employee, and trainee roles with approval workflow.
 MongoDB-compatible using djongo.
 """
 
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 from django.utils import timezone
 from djongo import models as djongo_models
@@ -38,6 +38,11 @@ class User(AbstractUser):
     
     # Profile information
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    profile_picture_derivatives = djongo_models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resized copies of the profile picture keyed by size and format"
+    )
     bio = models.TextField(blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     address = models.TextField(blank=True)
@@ -53,6 +58,10 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserManager()
+    # Exposes mongo_* collection methods for aggregations over users
+    mongo_objects = djongo_models.DjongoManager()
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
     
@@ -66,6 +75,19 @@ class User(AbstractUser):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
     
+    def get_profile_picture_url(self, size='medium', image_format='webp'):
+        """URL of a resized profile picture, falling back to the original until derivatives exist"""
+        if not self.profile_picture:
+            return None
+        
+        derivatives = self.profile_picture_derivatives or {}
+        if derivatives.get('source') == self.profile_picture.name:
+            name = derivatives.get('sizes', {}).get(size, {}).get(image_format)
+            if name:
+                return self.profile_picture.storage.url(name)
+        
+        return self.profile_picture.url
+    
     def approve_user(self, approved_by_user):
         """Approve user for system access"""
         self.is_approved = True
@@ -132,3 +154,27 @@ class UserProfile(models.Model):
             return User.objects.get(id=self.user_id)
         except User.DoesNotExist:
             return None
+
+
+class EmployeeIdSequence(models.Model):
+    """
+    Atomic counter for employee IDs with a given prefix.
+    Allocators lease blocks of numbers from it with a single `$inc`.
+    MongoDB-compatible with djongo.
+    """
+    
+    prefix = models.CharField(max_length=10, unique=True)
+    next_value = models.BigIntegerField(default=1, help_text="First number not yet leased")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # Exposes mongo_* collection methods for atomic counter updates
+    objects = djongo_models.DjongoManager()
+    
+    class Meta:
+        verbose_name = 'Employee ID Sequence'
+        verbose_name_plural = 'Employee ID Sequences'
+        ordering = ['prefix']
+    
+    def __str__(self):
+        return f"{self.prefix} (next {self.next_value})"
@@ -0,0 +1,226 @@
+"""
+Bulk user onboarding pipeline.
+Rows are streamed from CSV or JSONL, validated, password-hashed across a process
+pool, given employee IDs from leased blocks and bulk-inserted in batches with
+their profiles, so large imports never run PBKDF2 serially or insert one user
+per round trip.
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from .models import User, UserProfile
+from .sequences import employee_id_allocator, employee_id_prefix, sync_sequence
+from .serializers import BulkUserRowSerializer
+from .utils import PasswordHashPool, generate_employee_ids, refresh_user_search
+
+
+IMPORT_FORMATS = ['csv', 'jsonl']
+
+
+def detect_format(filename, default='csv'):
+    """Guess the import format from a file name"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    return default
+
+
+def read_rows(stream, import_format):
+    """
+    Yield (row_number, data) pairs from a binary stream without loading it whole.
+    Unparseable rows yield an error message instead of a dict.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if import_format == 'csv':
+        # Row numbers are file lines, with the header on line 1
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, row
+        return
+
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, f'Invalid JSON: {str(e)}'
+            continue
+        if not isinstance(data, dict):
+            yield row_number, 'Each line must be a JSON object'
+            continue
+        yield row_number, data
+
+
+class UserImport:
+    """
+    One bulk import run, accumulating its per-row error report.
+    """
+
+    def __init__(self, batch_size=None, workers=None, dry_run=False, approved_by=None):
+        self.batch_size = batch_size or settings.BULK_IMPORT_BATCH_SIZE
+        self.workers = workers
+        self.dry_run = dry_run
+        self.approved_by_id = str(approved_by.id) if approved_by else None
+
+        self.total_rows = 0
+        self.valid = 0
+        self.created = 0
+        self.errors = []
+
+        # Values claimed by earlier rows of the same file
+        self._seen = {'email': set(), 'username': set(), 'employee_id': set()}
+
+    def fail(self, row_number, email, errors):
+        self.errors.append({'row': row_number, 'email': email, 'errors': errors})
+
+    def run(self, stream, import_format='csv', progress=None):
+        """Import every row of a stream; `progress` is called after each batch"""
+        started = time.monotonic()
+        batch = []
+
+        with PasswordHashPool(self.workers) as pool:
+            for row_number, data in read_rows(stream, import_format):
+                self.total_rows += 1
+                if isinstance(data, str):
+                    self.fail(row_number, None, {'row': [data]})
+                    continue
+
+                serializer = BulkUserRowSerializer(data=data)
+                if not serializer.is_valid():
+                    errors = {field: [str(message) for message in messages] for field, messages in serializer.errors.items()}
+                    self.fail(row_number, data.get('email'), errors)
+                    continue
+
+                batch.append((row_number, serializer.validated_data))
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch, pool)
+                    batch = []
+                    if progress:
+                        progress(self)
+
+            if batch:
+                self.import_batch(batch, pool)
+                if progress:
+                    progress(self)
+
+        return self.report(time.monotonic() - started)
+
+    def claim_unique(self, batch):
+        """Drop rows whose email, username or employee ID is already taken"""
+        values = {field: [] for field in self._seen}
+        for _, data in batch:
+            data['username'] = data.get('username') or data['email']
+            for field in values:
+                if data.get(field):
+                    values[field].append(data[field])
+
+        taken = {
+            field: set(User.objects.filter(**{f'{field}__in': field_values}).values_list(field, flat=True))
+            for field, field_values in values.items() if field_values
+        }
+
+        accepted = []
+        for row_number, data in batch:
+            errors = {}
+            for field, seen in self._seen.items():
+                value = data.get(field)
+                if not value:
+                    continue
+                if value in taken.get(field, ()):
+                    errors[field] = [f'A user with this {field.replace("_", " ")} already exists']
+                elif value in seen:
+                    errors[field] = [f'Duplicate {field.replace("_", " ")} earlier in the file']
+
+            if errors:
+                self.fail(row_number, data['email'], errors)
+                continue
+
+            for field, seen in self._seen.items():
+                if data.get(field):
+                    seen.add(data[field])
+            accepted.append((row_number, data))
+        return accepted
+
+    def import_batch(self, batch, pool):
+        batch = self.claim_unique(batch)
+        self.valid += len(batch)
+        if self.dry_run or not batch:
+            return
+
+        # Employee IDs for rows without one, one leased block per department
+        by_department = defaultdict(list)
+        explicit_prefixes = set()
+        for _, data in batch:
+            if data.get('employee_id'):
+                explicit_prefixes.add(employee_id_prefix(data['employee_id']))
+            else:
+                by_department[data.get('department') or None].append(data)
+        for department, rows in by_department.items():
+            for data, employee_id in zip(rows, generate_employee_ids(department, len(rows))):
+                data['employee_id'] = employee_id
+
+        passwords = pool.hash([data.pop('password', '') for _, data in batch])
+
+        now = timezone.now()
+        users = [
+            User(
+                password=password,
+                is_approved=True,
+                approved_by_id=self.approved_by_id,
+                approved_at=now,
+                **data
+            )
+            for (_, data), password in zip(batch, passwords)
+        ]
+
+        try:
+            User.objects.bulk_create(users)
+        except IntegrityError:
+            # A concurrent registration claimed a value; find out which rows made it
+            self.insert_individually(batch, users)
+
+        created = list(User.objects.filter(email__in=[user.email for user in users], password__in=passwords))
+        UserProfile.objects.bulk_create([UserProfile(user_id=str(user.id)) for user in created])
+        self.created += len(created)
+
+        # Keep sequences ahead of imported IDs so later allocations can't reuse them
+        for prefix in explicit_prefixes - {None}:
+            sync_sequence(prefix)
+            employee_id_allocator.discard(prefix)
+
+        refresh_user_search(created)
+
+    def insert_individually(self, batch, users):
+        for (row_number, data), user in zip(batch, users):
+            # Password hashes are salted, so a match means this row's own insert succeeded
+            if User.objects.filter(email=user.email, password=user.password).exists():
+                continue
+            try:
+                user.pk = None
+                user.save()
+            except IntegrityError as e:
+                self.fail(row_number, user.email, {'row': [f'Could not create user: {str(e)}']})
+
+    def report(self, elapsed):
+        return {
+            'dry_run': self.dry_run,
+            'total_rows': self.total_rows,
+            'valid': self.valid,
+            'created': self.created,
+            'failed': len(self.errors),
+            'elapsed_seconds': round(elapsed, 2),
+            'rows_per_second': round(self.total_rows / elapsed, 1) if elapsed > 0 else None,
+            'errors': self.errors,
+        }
@@ -0,0 +1,234 @@
+"""
+In-memory user search index with ranked prefix matching.
+Replaces unanchored `icontains` scans with normalized tokens kept in a sorted
+token list, so every prefix of a token is found with two binary searches.
+"""
+
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from office_management.change_log import ChangeLog
+
+
+# Processes further behind than this rebuild instead of replaying changes
+MAX_REPLAYED_CHANGES = 200
+
+# Relative weight of a token by the field it came from
+FIELD_WEIGHTS = {
+    'employee_id': 8,
+    'first_name': 5,
+    'last_name': 5,
+    'email': 3,
+    'email_domain': 1,
+}
+
+# Exact token matches rank above prefix matches
+EXACT_MATCH_BONUS = 2
+
+# User fields that feed tokens or result payloads; saves touching none of them
+# (e.g. update_last_login) leave the index as it is
+INDEXED_FIELDS = {
+    'first_name', 'last_name', 'email', 'employee_id', 'role', 'department',
+    'is_approved', 'profile_picture', 'profile_picture_derivatives',
+}
+
+
+def normalize_tokens(text):
+    """Lowercase, strip accents and split text on anything that isn't a letter or digit"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return [token for token in re.split(r'[^0-9a-z]+', text) if token]
+
+
+def user_tokens(user):
+    """Map each searchable token of a user to its field weight"""
+    tokens = {}
+
+    def add(token, field):
+        tokens[token] = max(tokens.get(token, 0), FIELD_WEIGHTS[field])
+
+    for token in normalize_tokens(user.first_name):
+        add(token, 'first_name')
+    for token in normalize_tokens(user.last_name):
+        add(token, 'last_name')
+
+    local_part, _, domain = (user.email or '').partition('@')
+    for token in normalize_tokens(local_part):
+        add(token, 'email')
+    for token in normalize_tokens(domain):
+        add(token, 'email_domain')
+
+    for token in normalize_tokens(user.employee_id):
+        add(token, 'employee_id')
+        # Allow searching by the numeric part of IDs like ENG0042
+        digits = token.lstrip('abcdefghijklmnopqrstuvwxyz')
+        if digits and digits != token:
+            add(digits, 'employee_id')
+
+    return tokens
+
+
+def user_payload(user):
+    """Search result payload, precomputed so queries never touch the database"""
+    return {
+        'id': user.id,
+        'name': user.get_full_name(),
+        'email': user.email,
+        'role': user.role,
+        'department': user.department,
+        'employee_id': user.employee_id,
+        'profile_picture': user.get_profile_picture_url('small'),
+        'is_approved': user.is_approved,
+    }
+
+
+class UserSearchIndex:
+    """
+    Per-process search index over all users.
+    Changes are published to other processes as a version counter plus a
+    short change log of user ids, so they can replay changes instead of rebuilding.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._tokens = []
+        self._token_users = {}
+        self._user_tokens = {}
+        self._users = {}
+        self._changes = ChangeLog('user_search_version', 'user_search_change:{}', MAX_REPLAYED_CHANGES)
+
+    def _add(self, user):
+        self._remove(user.id)
+        tokens = user_tokens(user)
+        for token, weight in tokens.items():
+            users = self._token_users.get(token)
+            if users is None:
+                users = self._token_users[token] = {}
+                insort(self._tokens, token)
+            users[user.id] = weight
+        self._user_tokens[user.id] = tokens
+        self._users[user.id] = user_payload(user)
+
+    def _remove(self, user_id):
+        for token in self._user_tokens.pop(user_id, {}):
+            users = self._token_users.get(token)
+            if users is None:
+                continue
+            users.pop(user_id, None)
+            if not users:
+                del self._token_users[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+        self._users.pop(user_id, None)
+
+    def _load(self, user_ids=None):
+        """Index users from the database (all users, or only the given ids)"""
+        from .models import User
+
+        users = User.objects.all()
+        if user_ids is not None:
+            users = users.filter(id__in=user_ids)
+            for user_id in user_ids:
+                self._remove(user_id)
+
+        for user in users.iterator():
+            self._add(user)
+
+    def _rebuild(self, version):
+        self._tokens = []
+        self._token_users = {}
+        self._user_tokens = {}
+        self._users = {}
+        self._load()
+        self._version = version
+
+    def _ensure_current(self):
+        version, changed = self._changes.changes_since(self._version)
+        if changed is None:
+            self._rebuild(version)
+        elif changed:
+            # Replay the change log from other processes
+            self._load(list(changed))
+            self._version = version
+
+    def user_saved(self, user):
+        """Reindex a user after it was created or changed"""
+        with self._lock:
+            version = self._changes.publish(user.id)
+            if self._changes.follows(self._version, version):
+                self._add(user)
+                self._version = version
+
+    def user_deleted(self, user_id):
+        """Drop a deleted user from the index"""
+        with self._lock:
+            version = self._changes.publish(user_id)
+            if self._changes.follows(self._version, version):
+                self._remove(user_id)
+                self._version = version
+
+    def invalidate(self):
+        """
+        Make every process rebuild on its next search.
+        Used after bulk writes that bypass the save signals.
+        """
+        with self._lock:
+            # No change log entry means readers can't replay and rebuild instead
+            self._changes.publish()
+            self._version = None
+
+    def search(self, query, limit=10, approved_only=True):
+        """
+        Ranked prefix search on name, email and employee ID.
+        Every query term must prefix-match some token of a result.
+        """
+        terms = list(dict.fromkeys(normalize_tokens(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            self._ensure_current()
+
+            # Narrowest term first so later terms only score surviving candidates
+            ranges = []
+            for term in terms:
+                lo = bisect_left(self._tokens, term)
+                hi = bisect_left(self._tokens, term + '\uffff', lo)
+                if lo == hi:
+                    return []
+                ranges.append((hi - lo, term, lo, hi))
+            ranges.sort()
+
+            scores = None
+            for _, term, lo, hi in ranges:
+                term_scores = {}
+                for token in self._tokens[lo:hi]:
+                    bonus = EXACT_MATCH_BONUS if token == term else 1
+                    for user_id, weight in self._token_users[token].items():
+                        if scores is not None and user_id not in scores:
+                            continue
+                        score = weight * bonus
+                        if score > term_scores.get(user_id, 0):
+                            term_scores[user_id] = score
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {user_id: scores[user_id] + score for user_id, score in term_scores.items()}
+                if not scores:
+                    return []
+
+            results = []
+            for user_id, score in scores.items():
+                payload = self._users[user_id]
+                if approved_only and not payload['is_approved']:
+                    continue
+                results.append((-score, payload['name'].lower(), user_id))
+
+            return [self._users[user_id] for _, _, user_id in heapq.nsmallest(limit, results)]
+
+
+user_search_index = UserSearchIndex()
@@ -0,0 +1,130 @@
+"""
+Collision-free employee ID allocation.
+Numbers come from a per-prefix counter document using hi/lo leasing: a process
+reserves a block of numbers with one atomic `$inc` and hands them out locally,
+so bulk imports need one round trip per block rather than per ID.
+Numbers left in a block when a process exits are skipped, never reused.
+"""
+
+import re
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError
+from pymongo import ReturnDocument
+
+from .models import EmployeeIdSequence, User
+
+
+# Minimum digits in the numeric part (ENG0042); longer numbers simply widen
+ID_NUMBER_WIDTH = 4
+
+EMPLOYEE_ID_PATTERN = re.compile(r'^([A-Za-z]+)\d+$')
+
+
+def format_employee_id(prefix, number):
+    return f"{prefix}{number:0{ID_NUMBER_WIDTH}d}"
+
+
+def employee_id_prefix(employee_id):
+    """The letter prefix of an employee ID like ENG0042, None if it has another shape"""
+    match = EMPLOYEE_ID_PATTERN.match(employee_id or '')
+    return match.group(1) if match else None
+
+
+def highest_existing_number(prefix):
+    """Largest number already used by an employee ID with this prefix"""
+    pattern = re.compile(rf'^{re.escape(prefix)}(\d+)$')
+    highest = 0
+    employee_ids = User.objects.filter(employee_id__startswith=prefix).values_list('employee_id', flat=True)
+    for employee_id in employee_ids.iterator():
+        match = pattern.match(employee_id or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest
+
+
+def sync_sequence(prefix):
+    """
+    Move a prefix's sequence past every existing employee ID with that prefix.
+    Safe to run at any time: the counter only ever moves forward.
+    """
+    next_value = highest_existing_number(prefix) + 1
+    try:
+        EmployeeIdSequence.objects.get_or_create(prefix=prefix, defaults={'next_value': next_value})
+    except IntegrityError:
+        # Created concurrently by another allocator
+        pass
+    EmployeeIdSequence.objects.mongo_update_one({'prefix': prefix}, {'$max': {'next_value': next_value}})
+    return next_value
+
+
+def lease_block(prefix, size):
+    """
+    Reserve `size` consecutive numbers for a prefix.
+    Returns the first number of the block.
+    """
+    for _ in range(2):
+        sequence = EmployeeIdSequence.objects.mongo_find_one_and_update(
+            {'prefix': prefix},
+            {'$inc': {'next_value': size}},
+            return_document=ReturnDocument.AFTER
+        )
+        if sequence:
+            return sequence['next_value'] - size
+        # First use of this prefix: start after any IDs assigned before sequences existed
+        sync_sequence(prefix)
+    raise RuntimeError(f'Could not lease employee IDs for prefix {prefix}')
+
+
+class EmployeeIdAllocator:
+    """
+    Per-process hi/lo allocator keeping one leased block per prefix.
+    """
+
+    def __init__(self, block_size=None):
+        self._lock = threading.Lock()
+        self._block_size = block_size
+        self._blocks = {}
+
+    @property
+    def block_size(self):
+        return self._block_size or getattr(settings, 'EMPLOYEE_ID_BLOCK_SIZE', 20)
+
+    def allocate(self, prefix, count=1):
+        """
+        Allocate `count` unique employee IDs for a prefix.
+        Small requests are served from the leased block; larger ones lease
+        exactly what they need in a single round trip.
+        """
+        if count < 1:
+            return []
+
+        with self._lock:
+            next_number, end = self._blocks.get(prefix, (0, 0))
+            available = end - next_number
+
+            if count > available and count >= self.block_size:
+                start = lease_block(prefix, count)
+                return [format_employee_id(prefix, number) for number in range(start, start + count)]
+
+            numbers = list(range(next_number, next_number + min(count, available)))
+            if len(numbers) < count:
+                start = lease_block(prefix, self.block_size)
+                next_number, end = start, start + self.block_size
+                remaining = count - len(numbers)
+                numbers.extend(range(next_number, next_number + remaining))
+                next_number += remaining
+            else:
+                next_number += count
+
+            self._blocks[prefix] = (next_number, end)
+            return [format_employee_id(prefix, number) for number in numbers]
+
+    def discard(self, prefix):
+        """Drop this process' leased block, e.g. after IDs in it were assigned explicitly"""
+        with self._lock:
+            self._blocks.pop(prefix, None)
+
+
+employee_id_allocator = EmployeeIdAllocator()
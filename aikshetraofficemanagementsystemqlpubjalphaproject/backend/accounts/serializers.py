@@ -2,6 +2,7 @@
 Serializers for user authentication and profile management.
 """
 
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
@@ -104,7 +105,23 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class AvatarSerializerMixin(serializers.Serializer):
+    """
+    Adds resized profile picture URLs so clients never load the full-size original.
+    """
+    
+    avatar = serializers.SerializerMethodField()
+    
+    def get_avatar(self, obj):
+        if not obj.profile_picture:
+            return None
+        return {
+            size: obj.get_profile_picture_url(size)
+            for size in settings.PROFILE_PICTURE_SIZES
+        }
+
+
+class UserProfileSerializer(AvatarSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for user profile information.
     """
@@ -119,13 +136,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'full_name',
             'phone', 'role', 'is_approved', 'employee_id', 'department', 'position',
-            'hire_date', 'salary', 'profile_picture', 'bio', 'date_of_birth', 'address',
+            'hire_date', 'salary', 'profile_picture', 'avatar', 'bio', 'date_of_birth', 'address',
             'is_admin', 'is_employee', 'is_trainee', 'date_joined', 'last_login'
         ]
         read_only_fields = ['id', 'username', 'role', 'is_approved', 'date_joined', 'last_login']
 
 
-class UserProfileDetailSerializer(serializers.ModelSerializer):
+class UserProfileDetailSerializer(AvatarSerializerMixin, serializers.ModelSerializer):
     """
     Detailed serializer including extended profile information.
     """
@@ -137,7 +154,7 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
             'phone', 'role', 'is_approved', 'employee_id', 'department', 'position',
-            'hire_date', 'salary', 'profile_picture', 'bio', 'date_of_birth', 'address',
+            'hire_date', 'salary', 'profile_picture', 'avatar', 'bio', 'date_of_birth', 'address',
             'date_joined', 'last_login', 'profile'
         ]
         read_only_fields = ['id', 'username', 'role', 'is_approved', 'date_joined', 'last_login']
@@ -215,3 +232,30 @@ class PendingUsersSerializer(serializers.ModelSerializer):
         """Calculate days since registration"""
         from django.utils import timezone
         return (timezone.now() - obj.date_joined).days
+
+
+class BulkUserRowSerializer(serializers.Serializer):
+    """
+    Validates one row of a bulk user import.
+    Uniqueness against the database is checked per batch by the import pipeline.
+    """
+    
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=30)
+    last_name = serializers.CharField(max_length=30)
+    username = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    password = serializers.CharField(required=False, allow_blank=True, validators=[validate_password])
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, default='employee')
+    phone = serializers.CharField(max_length=15, required=False, allow_blank=True)
+    department = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    position = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    employee_id = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    hire_date = serializers.DateField(required=False, allow_null=True)
+    
+    def validate_email(self, value):
+        return value.strip()
+    
+    def to_internal_value(self, data):
+        # CSV cells are always strings; treat empty cells as missing
+        data = {key: value for key, value in data.items() if key and value not in ('', None)}
+        return super().to_internal_value(data)
@@ -0,0 +1,41 @@
+"""
+Django signals for user accounts.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .search import INDEXED_FIELDS, user_search_index
+from .utils import schedule_profile_picture_derivatives
+
+
+@receiver(post_save, sender=User)
+def profile_picture_changed(sender, instance, update_fields=None, **kwargs):
+    """
+    Queue resized profile pictures whenever a new picture is stored.
+    """
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    
+    derivatives = instance.profile_picture_derivatives or {}
+    if instance.profile_picture and derivatives.get('source') != instance.profile_picture.name:
+        schedule_profile_picture_derivatives(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the user search index in step with user changes.
+    """
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    user_search_index.user_saved(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    """
+    Drop deleted users from the search index.
+    """
+    user_search_index.user_deleted(instance.id)
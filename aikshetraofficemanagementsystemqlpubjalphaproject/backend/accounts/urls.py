@@ -23,6 +23,8 @@ urlpatterns = [
     # User management (Admin)
     path('pending-users/', views.PendingUsersView.as_view(), name='pending_users'),
     path('approve-user/<int:pk>/', views.ApproveUserView.as_view(), name='approve_user'),
+    path('bulk-approve/', views.bulk_approve_users, name='bulk_approve_users'),
+    path('bulk-import/', views.bulk_import_users, name='bulk_import_users'),
     
     # Search and utilities
     path('search-users/', views.search_users, name='search_users'),
@@ -2,44 +2,98 @@
 Utility functions for user management and authentication.
 """
 
-import random
-import string
-from django.core.mail import send_mail
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.utils import timezone
+
+
+# Department prefix mapping for employee IDs
+DEPARTMENT_ID_PREFIXES = {
+    'Engineering': 'ENG',
+    'Marketing': 'MKT',
+    'Sales': 'SAL',
+    'HR': 'HR',
+    'Finance': 'FIN',
+    'Operations': 'OPS',
+    'IT': 'IT',
+}
+
+DEFAULT_ID_PREFIX = 'EMP'
 
 
 def generate_employee_id(department=None):
     """
-    Generate unique employee ID based on department and random number.
+    Generate unique employee ID from the department prefix and its sequence.
     """
     
-    # Department prefix mapping
-    dept_prefixes = {
-        'Engineering': 'ENG',
-        'Marketing': 'MKT',
-        'Sales': 'SAL',
-        'HR': 'HR',
-        'Finance': 'FIN',
-        'Operations': 'OPS',
-        'IT': 'IT',
-    }
+    return generate_employee_ids(department, 1)[0]
+
+
+def generate_employee_ids(department=None, count=1):
+    """
+    Generate `count` unique employee IDs for a department in one allocation.
+    """
     
-    # Get department prefix or use default
-    prefix = dept_prefixes.get(department, 'EMP')
+    from .sequences import employee_id_allocator
     
-    # Generate random 4-digit number
-    random_num = ''.join(random.choices(string.digits, k=4))
+    prefix = DEPARTMENT_ID_PREFIXES.get(department, DEFAULT_ID_PREFIX)
+    return employee_id_allocator.allocate(prefix, count)
+
+
+def _init_password_worker():
+    """Configure Django in a password hashing worker process"""
+    import django
+    django.setup()
+
+
+class PasswordHashPool:
+    """
+    Hashes passwords across worker processes so slow hashers (PBKDF2) use every core.
+    Use as a context manager around a whole import so workers start only once.
+    """
+    
+    def __init__(self, workers=None):
+        self.workers = workers or settings.BULK_IMPORT_HASH_WORKERS or os.cpu_count() or 1
+        self._executor = None
+    
+    def __enter__(self):
+        if self.workers > 1:
+            # Spawned workers don't inherit the parent's threads or database connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_password_worker,
+            )
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
     
-    return f"{prefix}{random_num}"
+    def hash(self, passwords):
+        """Hash passwords, keeping their order; blank passwords become unusable"""
+        usable = [password for password in passwords if password]
+        if self._executor and len(usable) > 1:
+            chunksize = max(1, len(usable) // (self.workers * 4))
+            hashed = iter(self._executor.map(make_password, usable, chunksize=chunksize))
+        else:
+            hashed = iter([make_password(password) for password in usable])
+        return [next(hashed) if password else make_password(None) for password in passwords]
 
 
 def send_welcome_email(user):
     """
     Send welcome email to newly registered user.
+    The email is queued in the outbox; the outbox worker does the SMTP round trip.
     """
     
+    from notifications.outbox import enqueue_email
+    
     subject = 'Welcome to Office Management System'
     
     # Prepare email context
@@ -49,56 +103,131 @@ def send_welcome_email(user):
         'login_url': f"{settings.FRONTEND_URL}/login" if hasattr(settings, 'FRONTEND_URL') else 'http://localhost:3000/login',
     }
     
-    # Render email templates
-    html_message = render_to_string('emails/welcome.html', context)
-    plain_message = strip_tags(html_message)
-    
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        enqueue_email(subject, 'emails/welcome.html', context, [user.email])
         return True
     except Exception as e:
-        print(f"Failed to send welcome email to {user.email}: {str(e)}")
+        print(f"Failed to queue welcome email to {user.email}: {str(e)}")
         return False
 
 
-def send_approval_notification(user, approved_by):
+def approval_email_context(approved_by):
     """
-    Send email notification when user is approved.
+    Context shared by every approval email from one approver.
     """
     
-    subject = 'Account Approved - Office Management System'
-    
-    context = {
-        'user': user,
+    return {
         'approved_by': approved_by,
         'login_url': f"{settings.FRONTEND_URL}/login" if hasattr(settings, 'FRONTEND_URL') else 'http://localhost:3000/login',
     }
+
+
+def build_approval_email(user, approved_by):
+    """
+    Build the account approval email for a user.
+    """
+    
+    from notifications.outbox import build_email
+    
+    context = dict(approval_email_context(approved_by), user=user)
+    return build_email('Account Approved - Office Management System', 'emails/approval.html', context, [user.email])
+
+
+def send_approval_notification(user, approved_by):
+    """
+    Send email notification when user is approved.
+    """
     
-    html_message = render_to_string('emails/approval.html', context)
-    plain_message = strip_tags(html_message)
+    from notifications.outbox import enqueue_messages
     
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        enqueue_messages([build_approval_email(user, approved_by)])
         return True
     except Exception as e:
-        print(f"Failed to send approval email to {user.email}: {str(e)}")
+        print(f"Failed to queue approval email to {user.email}: {str(e)}")
         return False
 
 
+def refresh_user_search(users):
+    """
+    Refresh search indexes after bulk user writes, which bypass save signals.
+    """
+    
+    from search.indexing import index_objects
+    from .search import user_search_index
+    
+    user_search_index.invalidate()
+    try:
+        index_objects('user', users)
+    except Exception as e:
+        print(f"Failed to index users: {str(e)}")
+
+
+def bulk_set_approval(user_ids, approved_by, approve=True):
+    """
+    Approve or disapprove many users with a single update.
+    Only users whose status actually changes are updated; their approval emails
+    and in-app notifications are sent by a background job.
+    Returns the list of updated users.
+    """
+    
+    from .jobs import deliver_approval_notices
+    from .models import User
+    
+    users = list(User.objects.filter(id__in=user_ids, is_approved=not approve))
+    if not users:
+        return []
+    
+    if approve:
+        changes = {
+            'is_approved': True,
+            'approved_by_id': str(approved_by.id),
+            'approved_at': timezone.now(),
+        }
+    else:
+        changes = {'is_approved': False, 'approved_by_id': None, 'approved_at': None}
+    
+    # The status filter keeps concurrent approvals from being applied twice
+    User.objects.filter(id__in=[user.id for user in users], is_approved=not approve).update(**changes)
+    for user in users:
+        for field, value in changes.items():
+            setattr(user, field, value)
+    
+    if approve:
+        deliver_approval_notices.enqueue(
+            args=[[str(user.id) for user in users], str(approved_by.id)],
+            created_by=approved_by
+        )
+    
+    refresh_user_search(users)
+    return users
+
+
+def approval_notices(users, approved_by):
+    """
+    Build the in-app notifications and fan-out emails telling users their
+    accounts were approved. Returns (notifications, emails).
+    """
+    
+    from notifications.outbox import build_fanout_emails
+    from notifications.models import Notification
+    
+    notifications = [
+        Notification(
+            recipient_id=str(user.id),
+            title='Account approved',
+            message=f'Your account was approved by {approved_by.get_full_name()}. You can now log in.',
+            notification_type='success',
+        )
+        for user in users
+    ]
+    emails = build_fanout_emails(
+        'Account Approved - Office Management System', 'emails/approval.html',
+        approval_email_context(approved_by), users
+    )
+    return notifications, emails
+
+
 def send_admin_notification_new_user(user):
     """
     Notify admins about new user registration requiring approval.
@@ -120,35 +249,32 @@ def send_admin_notification_new_user(user):
         'admin_url': f"{settings.FRONTEND_URL}/admin/approvals" if hasattr(settings, 'FRONTEND_URL') else 'http://localhost:3000/admin/approvals',
     }
     
-    html_message = render_to_string('emails/admin_new_user.html', context)
-    plain_message = strip_tags(html_message)
+    from notifications.outbox import enqueue_email
     
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=admin_emails,
-            html_message=html_message,
-            fail_silently=False,
-        )
+        enqueue_email(subject, 'emails/admin_new_user.html', context, admin_emails)
         return True
     except Exception as e:
-        print(f"Failed to send admin notification: {str(e)}")
+        print(f"Failed to queue admin notification: {str(e)}")
         return False
 
 
 def validate_file_upload(file, allowed_types=None, max_size_mb=5):
     """
     Validate uploaded files for type and size.
+    The type is sniffed from the file's magic bytes, not the client-declared content type.
+    Larger files should go through the resumable upload API in the files app.
     """
     
+    from files.utils import sniff_uploaded_file
+    
     if allowed_types is None:
         allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'application/pdf']
     
     # Check file type
-    if file.content_type not in allowed_types:
-        return False, f"File type {file.content_type} not allowed"
+    content_type = sniff_uploaded_file(file)
+    if content_type not in allowed_types:
+        return False, f"File type {content_type or 'unknown'} not allowed"
     
     # Check file size (convert MB to bytes)
     max_size_bytes = max_size_mb * 1024 * 1024
@@ -158,6 +284,56 @@ def validate_file_upload(file, allowed_types=None, max_size_mb=5):
     return True, "File is valid"
 
 
+def generate_profile_picture_derivatives(user_id):
+    """
+    Build resized WebP/JPEG copies of a user's profile picture.
+    Skips the work if the picture changed again since the job was queued.
+    """
+    
+    from files.images import build_square_derivatives, derivative_names
+    from .models import User
+    
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        return None
+    
+    source = user.profile_picture.name if user.profile_picture else None
+    previous = user.profile_picture_derivatives or {}
+    if not source or previous.get('source') == source:
+        return previous
+    
+    sizes = build_square_derivatives(source, settings.PROFILE_PICTURE_SIZES, 'profiles/derivatives')
+    
+    # Re-check in case a newer picture was uploaded while resizing
+    current = User.objects.filter(id=user_id).values_list('profile_picture', flat=True).first()
+    storage = user.profile_picture.storage
+    if current != source:
+        for name in derivative_names({'sizes': sizes}):
+            storage.delete(name)
+        return None
+    
+    user.profile_picture_derivatives = {'source': source, 'sizes': sizes}
+    user.save(update_fields=['profile_picture_derivatives'])
+    
+    # Release the derivatives of the previous picture
+    for name in derivative_names(previous):
+        storage.delete(name)
+    
+    return user.profile_picture_derivatives
+
+
+def schedule_profile_picture_derivatives(user):
+    """
+    Queue derivative generation for a user's profile picture off the request path.
+    """
+    
+    from .jobs import build_profile_picture_derivatives
+    
+    if user.profile_picture:
+        build_profile_picture_derivatives.delay(user.id)
+
+
 def get_user_permissions(user):
     """
     Get user permissions based on role.
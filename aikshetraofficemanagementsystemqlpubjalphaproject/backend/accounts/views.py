@@ -7,11 +7,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import logout
 from django.utils import timezone
-from django.db.models import Q
 
 from .models import User, UserProfile
+from .onboarding import IMPORT_FORMATS, UserImport, detect_format
+from .permissions import IsAdminUser
 from .serializers import (
     UserRegistrationSerializer,
     CustomTokenObtainPairSerializer,
@@ -21,6 +23,8 @@ from .serializers import (
     UserApprovalSerializer,
     PendingUsersSerializer
 )
+from .search import user_search_index
+from .utils import bulk_set_approval, validate_file_upload
 
 
 class RegisterView(generics.CreateAPIView):
@@ -181,6 +185,51 @@ class ApproveUserView(generics.UpdateAPIView):
         }, status=status.HTTP_200_OK)
 
 
+# Upper bound on users changed by one bulk approval request
+MAX_BULK_APPROVAL_USERS = 1000
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_approve_users(request):
+    """
+    Approve or disapprove many users with a single update (Admin only).
+    Approval emails and notifications are delivered in one background batch.
+    """
+    
+    action = request.data.get('action')  # 'approve' or 'disapprove'
+    if action not in ('approve', 'disapprove'):
+        return Response({
+            'error': 'Invalid action. Use "approve" or "disapprove"'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user_ids = request.data.get('user_ids')
+    if not isinstance(user_ids, list) or not user_ids:
+        return Response({
+            'error': 'user_ids must be a non-empty list'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(user_ids) > MAX_BULK_APPROVAL_USERS:
+        return Response({
+            'error': f'At most {MAX_BULK_APPROVAL_USERS} users can be changed per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        user_ids = list({int(user_id) for user_id in user_ids})
+    except (TypeError, ValueError):
+        return Response({
+            'error': 'user_ids must contain user IDs'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    updated = bulk_set_approval(user_ids, request.user, approve=action == 'approve')
+    updated_ids = {user.id for user in updated}
+    
+    return Response({
+        'message': f"{len(updated)} user(s) {'approved' if action == 'approve' else 'disapproved'}",
+        'updated_ids': sorted(updated_ids),
+        'unchanged_ids': sorted(user_id for user_id in user_ids if user_id not in updated_ids),
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def current_user(request):
@@ -247,13 +296,26 @@ def update_profile_picture(request):
             'error': 'No profile picture provided'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    picture = request.FILES['profile_picture']
+    is_valid, error = validate_file_upload(
+        picture,
+        allowed_types=['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+    )
+    if not is_valid:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Resized derivatives are generated in the background by the post_save signal
     user = request.user
-    user.profile_picture = request.FILES['profile_picture']
+    user.profile_picture = picture
     user.save()
     
     return Response({
         'message': 'Profile picture updated successfully',
-        'profile_picture_url': user.profile_picture.url if user.profile_picture else None
+        'profile_picture_url': user.profile_picture.url if user.profile_picture else None,
+        'avatar': {
+            size: user.get_profile_picture_url(size)
+            for size in settings.PROFILE_PICTURE_SIZES
+        }
     }, status=status.HTTP_200_OK)
 
 
@@ -268,25 +330,39 @@ def search_users(request):
     if not query:
         return Response({'results': []})
     
-    # Basic search available to all users
-    users = User.objects.filter(
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query) |
-        Q(email__icontains=query) |
-        Q(employee_id__icontains=query),
-        is_approved=True
-    ).select_related('profile')[:10]
-    
+    # Basic search available to all users, served from the in-memory index
     results = []
-    for user in users:
-        results.append({
-            'id': user.id,
-            'name': user.get_full_name(),
-            'email': user.email,
-            'role': user.role,
-            'department': user.department,
-            'employee_id': user.employee_id,
-            'profile_picture': user.profile_picture.url if user.profile_picture else None,
-        })
+    for user in user_search_index.search(query, limit=10):
+        result = dict(user)
+        result.pop('is_approved', None)
+        results.append(result)
     
     return Response({'results': results})
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_import_users(request):
+    """
+    Import users from an uploaded CSV or JSONL file (Admin only).
+    Returns a per-row error report and throughput.
+    Use the `import_users` management command for very large files.
+    """
+    
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({
+            'error': 'No file provided'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    import_format = request.data.get('format') or detect_format(upload.name)
+    if import_format not in IMPORT_FORMATS:
+        return Response({
+            'error': f'Unsupported format. Use one of: {", ".join(IMPORT_FORMATS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+    user_import = UserImport(dry_run=dry_run, approved_by=request.user)
+    report = user_import.run(upload, import_format)
+    
+    return Response(report, status=status.HTTP_200_OK)
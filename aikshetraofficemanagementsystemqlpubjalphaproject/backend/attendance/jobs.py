@@ -0,0 +1,20 @@
+"""
+Background jobs for attendance tracking.
+"""
+
+from django.conf import settings
+
+from jobs.registry import job
+from notifications.utils import send_templated_bulk_notifications
+
+from .utils import ensure_indexes, users_without_check_in
+
+
+@job(queue='notifications', concurrency=1, max_attempts=1, cron=settings.ATTENDANCE_REMINDER_CRON)
+def send_attendance_reminders():
+    """Remind everyone who has not checked in yet today"""
+    ensure_indexes()
+    notified = 0
+    for role, user_ids in users_without_check_in().items():
+        notified += send_templated_bulk_notifications(user_ids, 'attendance_reminder', action_url=f'/{role}/attendance')
+    return {'notified': notified}
@@ -7,6 +7,7 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, time
+from djongo import models as djongo_models
 
 
 class AttendanceRecord(models.Model):
@@ -48,6 +49,9 @@ class AttendanceRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Exposes mongo_* collection methods for index management
+    objects = djongo_models.DjongoManager()
+    
     class Meta:
         verbose_name = 'Attendance Record'
         verbose_name_plural = 'Attendance Records'
@@ -147,6 +151,9 @@ class LeaveRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Exposes mongo_* collection methods for index management
+    objects = djongo_models.DjongoManager()
+    
     class Meta:
         verbose_name = 'Leave Request'
         verbose_name_plural = 'Leave Requests'
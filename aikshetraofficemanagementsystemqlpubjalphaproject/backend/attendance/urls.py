@@ -11,4 +11,5 @@ urlpatterns = [
     path('check-out/', views.check_out, name='check_out'),
     path('leave-requests/', views.LeaveRequestListCreateView.as_view(), name='leave_requests'),
     path('leave-requests/<int:pk>/approve/', views.approve_leave, name='approve_leave'),
+    path('leave-requests/<int:pk>/document/', views.leave_document, name='leave_document'),
 ]
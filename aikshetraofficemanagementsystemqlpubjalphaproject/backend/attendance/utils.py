@@ -0,0 +1,76 @@
+"""
+Utility functions for attendance tracking.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from pymongo import ASCENDING
+
+from .models import AttendanceRecord, LeaveRequest
+
+User = get_user_model()
+
+
+# Roles expected to check in every working day
+ATTENDANCE_ROLES = ['employee', 'trainee']
+
+
+def ensure_indexes():
+    """Indexes for looking up a user's attendance and leave on a given day"""
+    AttendanceRecord.objects.mongo_create_index([('user_id', ASCENDING), ('date', ASCENDING)])
+    LeaveRequest.objects.mongo_create_index([('user_id', ASCENDING), ('status', ASCENDING), ('start_date', ASCENDING)])
+
+
+def users_without_check_in(day=None):
+    """
+    Active, approved employees and trainees who have not checked in on `day`
+    and are not on approved leave, found with one anti-join aggregation over
+    the users collection. Returns {role: [user_id, ...]}.
+    """
+    day = day or timezone.localdate()
+    # Dates are stored as midnight datetimes
+    midnight = datetime.combine(day, time.min)
+
+    pipeline = [
+        {'$match': {'is_active': True, 'is_approved': True, 'role': {'$in': ATTENDANCE_ROLES}}},
+        {'$project': {'_id': 0, 'id': 1, 'role': 1}},
+        {'$lookup': {
+            'from': AttendanceRecord._meta.db_table,
+            'let': {'user_id': {'$toString': '$id'}},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': [
+                    {'$eq': ['$user_id', '$$user_id']},
+                    {'$eq': ['$date', midnight]},
+                ]}}},
+                {'$match': {'check_in_time': {'$ne': None}}},
+                {'$limit': 1},
+                {'$project': {'_id': 1}},
+            ],
+            'as': 'checked_in',
+        }},
+        {'$match': {'checked_in': {'$size': 0}}},
+        {'$lookup': {
+            'from': LeaveRequest._meta.db_table,
+            'let': {'user_id': {'$toString': '$id'}},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': [
+                    {'$eq': ['$user_id', '$$user_id']},
+                    {'$eq': ['$status', 'approved']},
+                    {'$lte': ['$start_date', midnight]},
+                ]}}},
+                {'$match': {'end_date': {'$gte': midnight}}},
+                {'$limit': 1},
+                {'$project': {'_id': 1}},
+            ],
+            'as': 'on_leave',
+        }},
+        {'$match': {'on_leave': {'$size': 0}}},
+        {'$project': {'id': 1, 'role': 1}},
+    ]
+    user_ids = defaultdict(list)
+    for row in User.mongo_objects.mongo_aggregate(pipeline):
+        user_ids[row['role']].append(str(row['id']))
+    return dict(user_ids)
@@ -7,6 +7,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.utils import timezone
 from accounts.permissions import IsAdminUser, IsOwnerOrAdmin
+from office_management.media import serve_protected_file
 from .models import AttendanceRecord, LeaveRequest
 from .serializers import AttendanceRecordSerializer, LeaveRequestSerializer
 
@@ -131,3 +132,19 @@ def approve_leave(request, pk):
     
     except LeaveRequest.DoesNotExist:
         return Response({'error': 'Leave request not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def leave_document(request, pk):
+    """Download a leave request's supporting document"""
+    
+    try:
+        leave_request = LeaveRequest.objects.get(pk=pk)
+    except LeaveRequest.DoesNotExist:
+        return Response({'error': 'Leave request not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not request.user.is_admin and leave_request.user_id != str(request.user.id):
+        return Response({'error': 'Leave request not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return serve_protected_file(request, leave_request.supporting_document, as_attachment=True)
@@ -0,0 +1 @@
+# Files app initialization
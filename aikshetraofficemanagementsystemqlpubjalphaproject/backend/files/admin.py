@@ -0,0 +1,21 @@
+"""
+Django admin for stored files.
+"""
+
+from django.contrib import admin
+from .models import StoredBlob, UploadSession
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ['digest', 'name', 'size', 'ref_count', 'created_at', 'updated_at']
+    list_filter = ['created_at']
+    search_fields = ['digest', 'name']
+    readonly_fields = ['digest', 'name', 'size', 'ref_count', 'created_at', 'updated_at']
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'purpose', 'status', 'received_bytes', 'total_size', 'created_at', 'expires_at']
+    list_filter = ['purpose', 'status', 'created_at']
+    search_fields = ['upload_id', 'filename']
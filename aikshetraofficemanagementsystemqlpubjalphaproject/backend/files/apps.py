@@ -0,0 +1,14 @@
+"""
+Files app configuration.
+"""
+
+from django.apps import AppConfig
+
+
+class FilesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'files'
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import files.signals
@@ -0,0 +1,50 @@
+"""
+Image derivative generation for uploaded pictures.
+Derivatives are written through the default (content-addressed) storage, so
+each one gets a content-hash URL that can be cached as immutable.
+"""
+
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 85, 'progressive': True, 'optimize': True},
+}
+
+
+def build_square_derivatives(source_name, sizes, directory):
+    """
+    Build square, center-cropped derivatives of a stored image.
+    `sizes` maps a size label to its edge length in pixels.
+    Returns {label: {format: storage_name}}.
+    """
+    with default_storage.open(source_name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+    derivatives = {}
+    for label, edge in sizes.items():
+        resized = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+        derivatives[label] = {}
+        for extension, options in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, **options)
+            derivatives[label][extension] = default_storage.save(
+                f'{directory}/{label}.{extension}', ContentFile(buffer.getvalue())
+            )
+    return derivatives
+
+
+def derivative_names(derivatives):
+    """Storage names in a {'sizes': {label: {format: name}}} derivatives record"""
+    return [
+        name
+        for formats in (derivatives or {}).get('sizes', {}).values()
+        for name in formats.values()
+        if name
+    ]
+
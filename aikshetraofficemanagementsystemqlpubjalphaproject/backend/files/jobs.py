@@ -0,0 +1,13 @@
+"""
+Background jobs for file uploads.
+"""
+
+from jobs.registry import job
+
+from .utils import cleanup_expired_uploads
+
+
+@job(queue='maintenance', concurrency=1, every=60 * 60)
+def expire_upload_sessions():
+    """Expire stale upload sessions and remove their part files"""
+    return {'expired': cleanup_expired_uploads()}
@@ -0,0 +1,110 @@
+"""
+Garbage-collect unreferenced content-addressed blobs.
+Reference counts are reconciled against every FileField, and the profile
+picture derivatives recorded on users, first, so a drifted counter can never
+cause a live file to be removed.
+"""
+
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from files.images import derivative_names
+from files.models import StoredBlob
+from files.signals import content_addressed_fields
+from files.storage import BLOB_DIRECTORY, ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = 'Reconcile stored blob reference counts and delete unreferenced blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=int, default=24,
+            help='Only delete blobs unreferenced for at least this many hours (protects in-flight uploads)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting')
+
+    def handle(self, *args, **options):
+        storage = ContentAddressedStorage()
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        dry_run = options['dry_run']
+
+        live_counts = self.count_live_references()
+
+        deleted = 0
+        freed_bytes = 0
+        reconciled = 0
+        known_digests = set()
+
+        for blob in StoredBlob.objects.values('digest', 'name', 'size', 'ref_count', 'updated_at').iterator():
+            digest = blob['digest']
+            references = live_counts.get(digest, 0)
+
+            if references == 0 and blob['updated_at'] < cutoff:
+                if not dry_run:
+                    self.remove_file(storage.path(blob['name']))
+                    StoredBlob.objects.mongo_delete_one({'digest': digest})
+                deleted += 1
+                freed_bytes += blob['size']
+                continue
+
+            known_digests.add(digest)
+            if references != blob['ref_count']:
+                if not dry_run:
+                    StoredBlob.objects.mongo_update_one({'digest': digest}, {'$set': {'ref_count': references}})
+                reconciled += 1
+
+        orphans = self.remove_orphan_files(storage, known_digests, cutoff, dry_run)
+
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Deleted {deleted} unreferenced blobs ({freed_bytes / (1024 * 1024):.1f} MB), '
+            f'removed {orphans} orphaned files, reconciled {reconciled} reference counts'
+        ))
+
+    def count_live_references(self):
+        """Count FileField values and profile picture derivatives pointing at each digest"""
+        counts = Counter()
+        for model in apps.get_models():
+            for field in content_addressed_fields(model):
+                names = model._default_manager.values_list(field.attname, flat=True)
+                self.count_names(counts, names.iterator())
+
+        # Derivatives are only referenced from a JSONField, which no FileField walk sees
+        User = apps.get_model('accounts', 'User')
+        for derivatives in User.objects.values_list('profile_picture_derivatives', flat=True).iterator():
+            self.count_names(counts, derivative_names(derivatives))
+        return counts
+
+    def count_names(self, counts, names):
+        for name in names:
+            if name and name.startswith(f'{BLOB_DIRECTORY}/'):
+                counts[os.path.splitext(os.path.basename(name))[0]] += 1
+
+    def remove_orphan_files(self, storage, known_digests, cutoff, dry_run):
+        """Remove blob files and stale temp files with no StoredBlob record"""
+        root = storage.path(BLOB_DIRECTORY)
+        cutoff_timestamp = cutoff.timestamp()
+        removed = 0
+
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                digest = os.path.splitext(filename)[0]
+                is_temp = os.path.basename(directory) == 'tmp'
+                if (is_temp or digest not in known_digests) and os.path.getmtime(path) < cutoff_timestamp:
+                    if not dry_run:
+                        self.remove_file(path)
+                    removed += 1
+        return removed
+
+    def remove_file(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
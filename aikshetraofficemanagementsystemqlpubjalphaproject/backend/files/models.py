@@ -0,0 +1,102 @@
+"""
+Stored file models for content-addressed uploads.
+MongoDB-compatible using djongo.
+"""
+
+from django.db import models
+from djongo import models as djongo_models
+
+
+class StoredBlob(models.Model):
+    """
+    A unique file body stored once under its SHA-256 digest.
+    MongoDB-compatible with djongo.
+    """
+    
+    digest = models.CharField(max_length=64, unique=True, help_text="SHA-256 hex digest of the file contents")
+    name = models.CharField(max_length=100, help_text="Storage name of the blob relative to MEDIA_ROOT")
+    size = models.BigIntegerField(default=0)
+    
+    # Number of FileField values pointing at this blob
+    ref_count = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # Exposes mongo_* collection methods for atomic counter updates
+    objects = djongo_models.DjongoManager()
+    
+    class Meta:
+        verbose_name = 'Stored Blob'
+        verbose_name_plural = 'Stored Blobs'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class UploadSession(models.Model):
+    """
+    Resumable chunked upload of a large file.
+    Chunks are appended in order to a part file and assembled into storage on completion.
+    MongoDB-compatible with djongo.
+    """
+    
+    PURPOSE_CHOICES = [
+        ('course_materials', 'Course Materials'),
+        ('session_materials', 'Session Materials'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+        ('expired', 'Expired'),
+    ]
+    
+    upload_id = models.CharField(max_length=32, unique=True)
+    user_id = models.CharField(max_length=24, help_text="ObjectId reference to uploading User")
+    
+    # Destination of the assembled file
+    purpose = models.CharField(max_length=30, choices=PURPOSE_CHOICES)
+    object_id = models.CharField(max_length=24, help_text="ObjectId of the object receiving the file")
+    
+    # File details
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, help_text="Type sniffed from the first chunk")
+    total_size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    
+    # Result
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    stored_name = models.CharField(max_length=100, blank=True)
+    
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # Exposes mongo_* collection methods for conditional offset updates
+    objects = djongo_models.DjongoManager()
+    
+    class Meta:
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size} bytes, {self.status})"
+    
+    @property
+    def next_chunk(self):
+        """Index of the next chunk the server expects"""
+        return self.received_bytes // self.chunk_size
+    
+    @property
+    def total_chunks(self):
+        """Number of chunks the file is split into"""
+        return max((self.total_size + self.chunk_size - 1) // self.chunk_size, 1)
+    
+    @property
+    def is_complete(self):
+        return self.received_bytes >= self.total_size
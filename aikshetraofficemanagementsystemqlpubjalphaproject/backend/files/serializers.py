@@ -0,0 +1,36 @@
+"""
+Serializers for file uploads.
+"""
+
+from django.conf import settings
+from rest_framework import serializers
+from .models import UploadSession
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable upload sessions"""
+    
+    next_chunk = serializers.ReadOnlyField()
+    total_chunks = serializers.ReadOnlyField()
+    is_complete = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'upload_id', 'purpose', 'object_id', 'filename', 'content_type',
+            'total_size', 'chunk_size', 'received_bytes', 'next_chunk', 'total_chunks',
+            'is_complete', 'status', 'stored_name', 'expires_at', 'created_at'
+        ]
+        read_only_fields = [
+            'upload_id', 'content_type', 'chunk_size', 'received_bytes',
+            'status', 'stored_name', 'expires_at', 'created_at'
+        ]
+    
+    def validate_total_size(self, value):
+        """Validate the declared size against the upload limit"""
+        if value <= 0:
+            raise serializers.ValidationError("File size must be greater than zero")
+        if value > settings.UPLOAD_MAX_SIZE:
+            max_size_mb = settings.UPLOAD_MAX_SIZE // (1024 * 1024)
+            raise serializers.ValidationError(f"File size exceeds {max_size_mb}MB limit")
+        return value
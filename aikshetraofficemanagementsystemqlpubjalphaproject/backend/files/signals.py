@@ -0,0 +1,64 @@
+"""
+Django signals that keep stored blob reference counts in step with model changes.
+"""
+
+from django.apps import apps
+from django.db.models import FileField
+from django.db.models.signals import post_init, post_save, post_delete
+
+from .storage import ContentAddressedStorage
+
+
+def content_addressed_fields(model):
+    """FileFields on a model that are backed by content-addressed storage"""
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def _file_names(instance, fields):
+    """Stored names of the loaded file fields (deferred fields are skipped, not fetched)"""
+    names = {}
+    for field in fields:
+        if field.attname in instance.__dict__:
+            value = instance.__dict__[field.attname]
+            names[field.attname] = getattr(value, 'name', value) or None
+    return names
+
+
+def _remember_file_names(sender, instance, **kwargs):
+    """Capture the stored file names so replaced files can be released on save"""
+    instance._stored_file_names = _file_names(instance, sender._stored_file_fields)
+
+
+def _release_replaced_files(sender, instance, **kwargs):
+    """Release blobs whose FileField value was replaced or cleared"""
+    previous = getattr(instance, '_stored_file_names', {})
+    current = _file_names(instance, sender._stored_file_fields)
+    
+    for field in sender._stored_file_fields:
+        old_name = previous.get(field.attname)
+        if old_name and field.attname in current and old_name != current[field.attname]:
+            field.storage.delete(old_name)
+    
+    instance._stored_file_names = current
+
+
+def _release_deleted_files(sender, instance, **kwargs):
+    """Release every blob referenced by a deleted object"""
+    for field in sender._stored_file_fields:
+        name = getattr(instance, field.attname).name
+        if name:
+            field.storage.delete(name)
+
+
+for model in apps.get_models():
+    fields = content_addressed_fields(model)
+    if not fields:
+        continue
+    
+    model._stored_file_fields = fields
+    post_init.connect(_remember_file_names, sender=model, weak=False)
+    post_save.connect(_release_replaced_files, sender=model, weak=False)
+    post_delete.connect(_release_deleted_files, sender=model, weak=False)
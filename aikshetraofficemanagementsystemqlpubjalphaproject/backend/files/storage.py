@@ -0,0 +1,99 @@
+"""
+Content-addressed, deduplicated file storage.
+Each upload is hashed while it is streamed to disk and stored once under its
+SHA-256 digest; duplicate uploads only bump the blob's reference count.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError
+from django.utils import timezone
+
+
+BLOB_DIRECTORY = 'cas'
+
+
+def blob_name(digest, extension=''):
+    """Storage name for a digest, fanned out over two directory levels"""
+    return f'{BLOB_DIRECTORY}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that keys files by content digest instead of upload path.
+    The original extension is kept so content types and downloads still work.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save, so the requested name never collides
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        temp_dir = self.path(f'{BLOB_DIRECTORY}/tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek') and content.seekable():
+            content.seek(0)
+
+        # Hash while streaming to a temporary file so memory use stays flat
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+
+            name = blob_name(digest.hexdigest(), extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.add_reference(digest.hexdigest(), name, size)
+        return name
+
+    def add_reference(self, digest, name, size):
+        """Record one more FileField value pointing at a blob"""
+        from .models import StoredBlob
+
+        try:
+            StoredBlob.objects.get_or_create(digest=digest, defaults={'name': name, 'size': size})
+        except IntegrityError:
+            # Created concurrently by another upload of the same content
+            pass
+
+        StoredBlob.objects.mongo_update_one(
+            {'digest': digest},
+            {'$inc': {'ref_count': 1}, '$set': {'updated_at': timezone.now()}}
+        )
+
+    def delete(self, name):
+        """
+        Release a reference instead of removing the file.
+        Unreferenced blobs are removed by the `gc_blobs` management command.
+        """
+        if not name:
+            raise ValueError('The name must be given to delete().')
+
+        from .models import StoredBlob
+
+        digest = os.path.splitext(os.path.basename(name))[0]
+        StoredBlob.objects.mongo_update_one(
+            {'digest': digest, 'ref_count': {'$gt': 0}},
+            {'$inc': {'ref_count': -1}, '$set': {'updated_at': timezone.now()}}
+        )
@@ -0,0 +1,70 @@
+"""
+Tests for content-addressed blob storage.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import StoredBlob
+
+User = get_user_model()
+
+
+class GcBlobsTests(TestCase):
+    """gc_blobs must keep every blob that is still referenced"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def save_blob(self, name, content):
+        name = default_storage.save(name, ContentFile(content))
+        # Past the grace period, as if the blob was written long ago
+        StoredBlob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(days=7))
+        return name
+
+    def run_gc(self):
+        call_command('gc_blobs', grace_hours=24, stdout=StringIO())
+
+    def test_keeps_profile_picture_derivatives(self):
+        small = self.save_blob('profiles/derivatives/small.webp', b'small webp')
+        medium = self.save_blob('profiles/derivatives/medium.jpeg', b'medium jpeg')
+        User.objects.create_user(
+            username='derivatives', email='derivatives@example.com', password='password',
+            first_name='Derived', last_name='User',
+            profile_picture_derivatives={
+                'source': 'profiles/source.png',
+                'sizes': {'small': {'webp': small}, 'medium': {'jpeg': medium}},
+            },
+        )
+
+        self.run_gc()
+
+        for name in (small, medium):
+            self.assertTrue(os.path.exists(default_storage.path(name)))
+            blob = StoredBlob.objects.get(name=name)
+            self.assertEqual(blob.ref_count, 1)
+
+    def test_deletes_unreferenced_blobs(self):
+        name = self.save_blob('profiles/derivatives/orphan.webp', b'orphan')
+        default_storage.delete(name)
+
+        self.run_gc()
+
+        self.assertFalse(os.path.exists(default_storage.path(name)))
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
@@ -0,0 +1,13 @@
+"""
+URL patterns for file upload APIs.
+"""
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('uploads/', views.create_upload, name='create_upload'),
+    path('uploads/<str:upload_id>/', views.upload_detail, name='upload_detail'),
+    path('uploads/<str:upload_id>/chunks/<int:index>/', views.upload_chunk, name='upload_chunk'),
+    path('uploads/<str:upload_id>/complete/', views.complete_upload, name='complete_upload'),
+]
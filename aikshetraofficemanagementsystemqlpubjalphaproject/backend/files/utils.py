@@ -0,0 +1,189 @@
+"""
+Utility functions for file uploads.
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import UploadSession
+
+
+# Number of leading bytes needed to recognise every supported type
+SNIFF_BYTES = 512
+
+# Types allowed for each chunked upload purpose
+UPLOAD_PURPOSE_TYPES = {
+    'course_materials': [
+        'application/pdf', 'application/zip', 'video/mp4', 'video/quicktime',
+        'video/webm', 'audio/mpeg', 'image/jpeg', 'image/png',
+    ],
+    'session_materials': [
+        'application/pdf', 'application/zip', 'video/mp4', 'video/quicktime',
+        'video/webm', 'audio/mpeg', 'image/jpeg', 'image/png',
+    ],
+}
+
+# Upload directory used when the assembled file is stored
+UPLOAD_PURPOSE_DIRECTORIES = {
+    'course_materials': 'course_materials',
+    'session_materials': 'session_materials',
+}
+
+
+def sniff_content_type(head):
+    """
+    Detect a file's type from its leading magic bytes.
+    Returns None when the type is not recognised.
+    """
+    if head.startswith(b'%PDF-'):
+        return 'application/pdf'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.startswith(b'RIFF') and head[8:12] == b'AVI ':
+        return 'video/x-msvideo'
+    if head[4:8] == b'ftyp':
+        return 'video/quicktime' if head[8:10] == b'qt' else 'video/mp4'
+    if head.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'video/webm'
+    if head.startswith(b'ID3') or head[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        return 'audio/mpeg'
+    if head.startswith(b'OggS'):
+        return 'audio/ogg'
+    if head.startswith(b'PK\x03\x04'):
+        # Office Open XML documents are zip containers too
+        return 'application/zip'
+    return None
+
+
+def sniff_uploaded_file(file):
+    """Sniff an UploadedFile's type without consuming it"""
+    position = file.tell()
+    head = file.read(SNIFF_BYTES)
+    file.seek(position)
+    return sniff_content_type(head)
+
+
+def upload_part_path(upload_id):
+    """Path of the part file chunks are appended to"""
+    return os.path.join(settings.UPLOAD_SESSION_DIR, f'{upload_id}.part')
+
+
+def append_chunk(session, stream, index, expected_sha256):
+    """
+    Stream one chunk from `stream` into the session's part file at its offset.
+    The chunk is hashed as it is written and rolled back on checksum mismatch,
+    so memory use is bounded by the read size, not the chunk size.
+    Returns (ok, error_message).
+    """
+    offset = index * session.chunk_size
+    expected_length = min(session.chunk_size, session.total_size - offset)
+    digest = hashlib.sha256()
+    written = 0
+    head = b''
+
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    path = upload_part_path(session.upload_id)
+    mode = 'r+b' if os.path.exists(path) else 'wb'
+
+    with open(path, mode) as part:
+        part.seek(offset)
+        while written <= expected_length:
+            data = stream.read(min(64 * 1024, expected_length - written + 1)) if stream else b''
+            if not data:
+                break
+            if index == 0 and len(head) < SNIFF_BYTES:
+                head += data[:SNIFF_BYTES - len(head)]
+            digest.update(data)
+            part.write(data)
+            written += len(data)
+
+        error = None
+        if written != expected_length:
+            error = f'Chunk {index} must be exactly {expected_length} bytes'
+        elif digest.hexdigest() != (expected_sha256 or '').lower():
+            error = f'Checksum mismatch for chunk {index}'
+
+        if error:
+            part.truncate(offset)
+            return False, error
+
+    if index == 0:
+        # Type checks run on the first chunk so bad uploads fail immediately
+        content_type = sniff_content_type(head)
+        if content_type not in UPLOAD_PURPOSE_TYPES[session.purpose]:
+            with open(path, 'r+b') as part:
+                part.truncate(0)
+            return False, f'File type {content_type or "unknown"} not allowed'
+        session.content_type = content_type
+
+    # Only advance if no concurrent request already did
+    result = UploadSession.objects.mongo_update_one(
+        {'upload_id': session.upload_id, 'received_bytes': offset, 'status': 'active'},
+        {'$set': {
+            'received_bytes': offset + written,
+            'content_type': session.content_type,
+            'updated_at': timezone.now(),
+        }}
+    )
+    if result.modified_count:
+        session.received_bytes = offset + written
+    return True, None
+
+
+def assemble_upload(session, expected_sha256=None):
+    """
+    Verify a fully received upload and move it into storage.
+    Returns the stored file name.
+    """
+    path = upload_part_path(session.upload_id)
+
+    if expected_sha256:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as part:
+            for data in iter(lambda: part.read(1024 * 1024), b''):
+                digest.update(data)
+        if digest.hexdigest() != expected_sha256.lower():
+            raise ValueError('Checksum mismatch for assembled file')
+
+    directory = UPLOAD_PURPOSE_DIRECTORIES[session.purpose]
+    with open(path, 'rb') as part:
+        stored_name = default_storage.save(f'{directory}/{session.filename}', File(part))
+
+    os.remove(path)
+    return stored_name
+
+
+def expire_uploads(upload_ids):
+    """Mark active upload sessions expired and remove their part files"""
+    for upload_id in upload_ids:
+        try:
+            os.remove(upload_part_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+    if upload_ids:
+        UploadSession.objects.mongo_update_many(
+            {'upload_id': {'$in': list(upload_ids)}, 'status': 'active'},
+            {'$set': {'status': 'expired', 'updated_at': timezone.now()}}
+        )
+
+
+def cleanup_expired_uploads():
+    """
+    Expire stale upload sessions and remove their part files.
+    """
+    expired = UploadSession.objects.filter(status='active', expires_at__lt=timezone.now())
+    upload_ids = list(expired.values_list('upload_id', flat=True))
+    expire_uploads(upload_ids)
+    return len(upload_ids)
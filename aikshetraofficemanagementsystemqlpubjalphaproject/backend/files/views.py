@@ -0,0 +1,186 @@
+"""
+Resumable chunked upload API views.
+
+Protocol:
+1. POST   uploads/                       -> create a session, returns upload_id and chunk_size
+2. PUT    uploads/<upload_id>/chunks/<n>/ -> raw chunk body with an X-Chunk-SHA256 header
+3. GET    uploads/<upload_id>/           -> resume point (next_chunk / received_bytes)
+4. POST   uploads/<upload_id>/complete/  -> assemble into storage and attach to the target
+"""
+
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.views.static import serve
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from accounts.permissions import IsAdminUser
+from learning.models import Course, TrainingSession
+from .models import UploadSession
+from .serializers import UploadSessionSerializer
+from .utils import append_chunk, assemble_upload, expire_uploads, upload_part_path
+
+
+# Model and FileField receiving the assembled file for each purpose
+UPLOAD_TARGETS = {
+    'course_materials': (Course, 'course_materials'),
+    'session_materials': (TrainingSession, 'session_materials'),
+}
+
+
+def _get_session(request, upload_id):
+    try:
+        return UploadSession.objects.get(upload_id=upload_id, user_id=str(request.user.id))
+    except UploadSession.DoesNotExist:
+        return None
+
+
+def _inactive_response(session):
+    """Error response for a session that can no longer take chunks, or None"""
+    if session.status == 'active' and session.expires_at < timezone.now():
+        # Expired but not yet swept by cleanup_expired_uploads
+        expire_uploads([session.upload_id])
+        return Response({'error': 'Upload expired'}, status=status.HTTP_400_BAD_REQUEST)
+    if session.status != 'active':
+        return Response({'error': f'Upload is {session.status}'}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def create_upload(request):
+    """Start a resumable upload"""
+    
+    serializer = UploadSessionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    model, _ = UPLOAD_TARGETS[serializer.validated_data['purpose']]
+    if not model.objects.filter(pk=serializer.validated_data['object_id']).exists():
+        return Response({'error': 'Upload target not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    session = serializer.save(
+        upload_id=uuid.uuid4().hex,
+        user_id=str(request.user.id),
+        filename=os.path.basename(serializer.validated_data['filename']),
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        expires_at=timezone.now() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+    )
+    
+    return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def upload_detail(request, upload_id):
+    """Get the resume point of an upload, or abort it"""
+    
+    session = _get_session(request, upload_id)
+    if not session:
+        return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.method == 'DELETE':
+        if session.status == 'active':
+            session.status = 'aborted'
+            session.save()
+            try:
+                os.remove(upload_part_path(session.upload_id))
+            except FileNotFoundError:
+                pass
+        return Response({'message': 'Upload aborted'})
+    
+    return Response(UploadSessionSerializer(session).data)
+
+
+@api_view(['PUT'])
+@permission_classes([IsAdminUser])
+def upload_chunk(request, upload_id, index):
+    """Append one chunk; the request body is the raw chunk bytes"""
+    
+    session = _get_session(request, upload_id)
+    if not session:
+        return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    inactive = _inactive_response(session)
+    if inactive:
+        return inactive
+    
+    if index >= session.total_chunks:
+        return Response({'error': 'Chunk index out of range'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Re-sent chunks are acknowledged without rewriting data already accepted
+    if index < session.next_chunk:
+        return Response(UploadSessionSerializer(session).data)
+    
+    if index > session.next_chunk:
+        return Response({
+            'error': f'Expected chunk {session.next_chunk}',
+            'next_chunk': session.next_chunk
+        }, status=status.HTTP_409_CONFLICT)
+    
+    checksum = request.META.get('HTTP_X_CHUNK_SHA256')
+    if not checksum:
+        return Response({'error': 'X-Chunk-SHA256 header is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    ok, error = append_chunk(session, request.stream, index, checksum)
+    if not ok:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    session.refresh_from_db()
+    return Response(UploadSessionSerializer(session).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def complete_upload(request, upload_id):
+    """Assemble a fully received upload and attach it to its target"""
+    
+    session = _get_session(request, upload_id)
+    if not session:
+        return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    inactive = _inactive_response(session)
+    if inactive:
+        return inactive
+    
+    if not session.is_complete:
+        return Response({
+            'error': 'Upload is incomplete',
+            'next_chunk': session.next_chunk
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    model, field_name = UPLOAD_TARGETS[session.purpose]
+    try:
+        target = model.objects.get(pk=session.object_id)
+    except model.DoesNotExist:
+        return Response({'error': 'Upload target not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        stored_name = assemble_upload(session, request.data.get('sha256'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    setattr(target, field_name, stored_name)
+    target.save()
+    
+    session.status = 'completed'
+    session.stored_name = stored_name
+    session.save()
+    
+    return Response({
+        'message': 'Upload completed successfully',
+        'upload': UploadSessionSerializer(session).data
+    })
+
+
+def serve_blob(request, path):
+    """
+    Development server for content-addressed blobs with far-future caching.
+    In production the web server should serve MEDIA_URL/cas/ with the same header.
+    """
+    response = serve(request, f'cas/{path}', document_root=settings.MEDIA_ROOT)
+    response['Cache-Control'] = settings.IMMUTABLE_MEDIA_CACHE_CONTROL
+    return response
@@ -0,0 +1,36 @@
+"""
+Django admin for background jobs.
+"""
+
+from django.contrib import admin
+from .models import Job
+from .queue import cancel_job, retry_job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'queue', 'status', 'attempts', 'run_at', 'finished_at', 'created_at']
+    list_filter = ['status', 'queue', 'name', 'created_at']
+    search_fields = ['name', 'unique_key']
+    readonly_fields = [
+        'name', 'queue', 'args', 'kwargs', 'priority', 'unique_key', 'status', 'run_at',
+        'attempts', 'max_attempts', 'claimed_by', 'claimed_until', 'started_at', 'finished_at',
+        'result', 'last_error', 'created_by_id', 'created_at', 'updated_at'
+    ]
+    
+    actions = ['retry_jobs', 'cancel_jobs']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def retry_jobs(self, request, queryset):
+        """Run failed or cancelled jobs again"""
+        retried = sum(1 for job in queryset.filter(status__in=['failed', 'cancelled']) if retry_job(job))
+        self.message_user(request, f'{retried} job(s) queued for retry.')
+    retry_jobs.short_description = "Retry selected failed jobs"
+    
+    def cancel_jobs(self, request, queryset):
+        """Cancel jobs that have not started"""
+        cancelled = sum(1 for job in queryset.filter(status='queued') if cancel_job(job))
+        self.message_user(request, f'{cancelled} job(s) cancelled.')
+    cancel_jobs.short_description = "Cancel selected queued jobs"
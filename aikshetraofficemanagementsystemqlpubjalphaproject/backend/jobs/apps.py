@@ -0,0 +1,15 @@
+"""
+Jobs app configuration.
+"""
+
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    
+    def ready(self):
+        """Register the jobs defined in each app's jobs.py"""
+        autodiscover_modules('jobs')
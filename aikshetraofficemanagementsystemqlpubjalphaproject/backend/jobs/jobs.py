@@ -0,0 +1,12 @@
+"""
+Maintenance jobs for the job queue itself.
+"""
+
+from .queue import purge_finished_jobs
+from .registry import job
+
+
+@job(queue='maintenance', concurrency=1, cron='45 2 * * *')
+def purge_jobs():
+    """Delete succeeded and cancelled jobs past JOBS_RETENTION_DAYS"""
+    return {'deleted': purge_finished_jobs()}
@@ -0,0 +1,30 @@
+"""
+Run background jobs.
+"""
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued, scheduled and periodic background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', help='Comma-separated queues to take jobs from (default: all)')
+        parser.add_argument('--concurrency', type=int, help='Jobs run at once by this worker')
+        parser.add_argument('--interval', type=float, help='Seconds between polls when no job is due')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of polling')
+
+    def handle(self, *args, **options):
+        queues = [queue.strip() for queue in options['queues'].split(',')] if options['queues'] else None
+        worker = Worker(
+            queues=queues,
+            concurrency=options['concurrency'],
+            interval=options['interval'],
+            stdout=self.stdout,
+        )
+        worker.install_signal_handlers()
+        worker.run(burst=options['burst'])
+
+        self.stdout.write(self.style.SUCCESS('Job worker stopped'))
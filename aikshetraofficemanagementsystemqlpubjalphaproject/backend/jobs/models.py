@@ -0,0 +1,62 @@
+"""
+Background job models for the office management system.
+MongoDB-compatible models using djongo.
+"""
+
+from django.db import models
+from django.utils import timezone
+from djongo import models as djongo_models
+
+
+class Job(models.Model):
+    """
+    A unit of deferred work, run by a `run_jobs` worker.
+    MongoDB-compatible with djongo.
+    """
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    name = models.CharField(max_length=200, help_text="Registered job name, e.g. notifications.cleanup_old_notifications")
+    queue = models.CharField(max_length=50, default='default')
+    args = djongo_models.JSONField(default=list, blank=True)
+    kwargs = djongo_models.JSONField(default=dict, blank=True)
+    priority = models.IntegerField(default=0, help_text="Higher runs first")
+    # Set for jobs that must not be queued twice, e.g. one run per scheduled fire time
+    unique_key = models.CharField(max_length=200, blank=True, null=True)
+    
+    # Execution state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not started before this time")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    claimed_by = models.CharField(max_length=32, blank=True, help_text="Worker claim currently running this job")
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result = djongo_models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_by_id = models.CharField(max_length=24, blank=True, null=True, help_text="ObjectId reference to enqueuing User")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # Exposes mongo_* collection methods for atomic claims
+    objects = djongo_models.DjongoManager()
+    
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed', 'cancelled')
@@ -0,0 +1,320 @@
+"""
+Mongo-backed job queue.
+Enqueuing inserts a Job document. Workers (`manage.py run_jobs`) claim due jobs
+one at a time with an atomic find-and-update, run them on a thread pool and
+record the outcome; failures are retried with exponential backoff until the
+job's max_attempts is reached. A worker holds a lease on each job it runs and
+renews it while the job is running, so the jobs of a worker that dies are
+picked up again once their lease expires. Delivery is therefore at-least-once
+and jobs should be safe to run twice.
+
+JOBS_BACKEND selects where queued jobs run:
+    database    on `run_jobs` workers (default)
+    inprocess   on a thread pool of the enqueuing process, for local development
+    eager       immediately in the caller, retries included, for tests
+"""
+
+import json
+import random
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from .models import Job
+from .registry import get_job, registered_jobs
+
+
+# JOBS_BACKEND = 'inprocess' runs jobs here
+local_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='jobs')
+
+
+def ensure_indexes():
+    """Indexes the claim queries and periodic de-duplication rely on"""
+    Job.objects.mongo_create_index([
+        ('status', ASCENDING), ('queue', ASCENDING), ('priority', DESCENDING), ('run_at', ASCENDING)
+    ])
+    Job.objects.mongo_create_index([('name', ASCENDING), ('status', ASCENDING)])
+    Job.objects.mongo_create_index([('claimed_by', ASCENDING)])
+    Job.objects.mongo_create_index([('status', ASCENDING), ('finished_at', ASCENDING)])
+    # Only one job per unique_key; jobs without one are not indexed
+    Job.objects.mongo_create_index(
+        [('unique_key', ASCENDING)],
+        unique=True,
+        partialFilterExpression={'unique_key': {'$type': 'string'}}
+    )
+
+
+def _store(job_function, args, kwargs, run_at, priority, created_by, unique_key):
+    """Insert a Job; returns (job, created)"""
+    if unique_key:
+        existing = Job.objects.filter(unique_key=unique_key).first()
+        if existing:
+            return existing, False
+    elif job_function.coalesce and not args and not kwargs:
+        # A run that hasn't started yet will also pick up whatever this one was for
+        existing = Job.objects.filter(
+            name=job_function.name, status='queued', run_at__lte=run_at or timezone.now()
+        ).first()
+        if existing:
+            return existing, False
+
+    job = Job(
+        name=job_function.name,
+        queue=job_function.queue,
+        args=list(args or []),
+        kwargs=dict(kwargs or {}),
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=job_function.max_attempts,
+        unique_key=unique_key,
+        created_by_id=str(created_by.id) if created_by else None,
+    )
+    try:
+        job.save()
+    except DatabaseError:
+        if not unique_key:
+            raise
+        # Queued concurrently by another process
+        return Job.objects.filter(unique_key=unique_key).first(), False
+    return job, True
+
+
+def dispatch(job):
+    """Hand a queued job to the configured backend; `database` workers poll for it"""
+    if settings.JOBS_BACKEND == 'eager':
+        run_eagerly(job)
+    elif settings.JOBS_BACKEND == 'inprocess':
+        transaction.on_commit(lambda: submit_local(job.id, job.run_at))
+
+
+def enqueue(job_function, args=None, kwargs=None, run_at=None, priority=0, created_by=None, unique_key=None):
+    """
+    Store a run of a registered job. If `unique_key` is given and a job with
+    that key already exists, the existing job is returned instead.
+    """
+    job, created = _store(job_function, args, kwargs, run_at, priority, created_by, unique_key)
+    if created:
+        dispatch(job)
+    return job
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at JOBS_MAX_RETRY_DELAY"""
+    delay = min(settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOBS_MAX_RETRY_DELAY)
+    return timedelta(seconds=delay * random.uniform(1.0, 1.1))
+
+
+def running_counts(names, now=None):
+    """Runs of each job name currently held by a live worker"""
+    now = now or timezone.now()
+    pipeline = [
+        {'$match': {'name': {'$in': names}, 'status': 'running', 'claimed_until': {'$gte': now}}},
+        {'$group': {'_id': '$name', 'count': {'$sum': 1}}},
+    ]
+    return {row['_id']: row['count'] for row in Job.objects.mongo_aggregate(pipeline)}
+
+
+def claim_job(token, queues=None, job_id=None):
+    """
+    Atomically claim the next due job, or the job `job_id` if it is due.
+    Jobs whose name is at its concurrency limit are skipped.
+    Returns the claimed Job or None.
+    """
+    now = timezone.now()
+    query = {'$or': [
+        {'status': 'queued', 'run_at': {'$lte': now}},
+        # Jobs whose worker died while running them
+        {'status': 'running', 'claimed_until': {'$lt': now}},
+    ]}
+    if job_id is not None:
+        query['id'] = job_id
+    elif queues:
+        query['queue'] = {'$in': list(queues)}
+
+    limits = {name: job_function.concurrency for name, job_function in registered_jobs().items() if job_function.concurrency}
+    if limits:
+        counts = running_counts(list(limits), now)
+        full = [name for name, limit in limits.items() if counts.get(name, 0) >= limit]
+        if full:
+            query['name'] = {'$nin': full}
+
+    row = Job.objects.mongo_find_one_and_update(
+        query,
+        {
+            '$set': {
+                'status': 'running',
+                'claimed_by': token,
+                'claimed_until': now + timedelta(seconds=settings.JOBS_LEASE_SECONDS),
+                'started_at': now,
+                'updated_at': now,
+            },
+            '$inc': {'attempts': 1},
+        },
+        sort=[('priority', -1), ('run_at', 1), ('id', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+    if row is None:
+        return None
+
+    job = Job.objects.get(id=row['id'])
+    limit = limits.get(job.name)
+    if limit and running_counts([job.name], now).get(job.name, 0) > limit:
+        # Another worker claimed a run of the same job at the same moment; give this one back
+        Job.objects.mongo_update_one(
+            {'id': job.id, 'claimed_by': token},
+            {
+                '$set': {
+                    'status': 'queued',
+                    'claimed_by': '',
+                    'claimed_until': None,
+                    'run_at': now + timedelta(seconds=settings.JOBS_POLL_INTERVAL),
+                },
+                '$inc': {'attempts': -1},
+            }
+        )
+        return None
+    return job
+
+
+def extend_leases(tokens):
+    """Renew the leases of jobs a worker is still running"""
+    if not tokens:
+        return
+    now = timezone.now()
+    Job.objects.mongo_update_many(
+        {'claimed_by': {'$in': list(tokens)}, 'status': 'running'},
+        {'$set': {'claimed_until': now + timedelta(seconds=settings.JOBS_LEASE_SECONDS)}}
+    )
+
+
+def _jsonable(result):
+    try:
+        return json.loads(json.dumps(result, cls=DjangoJSONEncoder))
+    except (TypeError, ValueError):
+        return str(result)
+
+
+def _finish(job, token, changes):
+    now = timezone.now()
+    changes.update({'claimed_until': None, 'updated_at': now})
+    if changes['status'] != 'queued':
+        changes['finished_at'] = now
+    # A job cancelled or reclaimed meanwhile keeps its newer state
+    Job.objects.mongo_update_one({'id': job.id, 'claimed_by': token, 'status': 'running'}, {'$set': changes})
+    return changes
+
+
+def run_claimed(job, token):
+    """
+    Run a claimed job and record its outcome.
+    Returns the recorded changes; a 'queued' status means a retry is scheduled.
+    """
+    if job.attempts > job.max_attempts:
+        return _finish(job, token, {'status': 'failed', 'last_error': 'Worker stopped before the job finished'})
+
+    try:
+        job_function = get_job(job.name)
+    except KeyError:
+        return _finish(job, token, {'status': 'failed', 'last_error': f'No job registered as "{job.name}"'})
+
+    try:
+        result = job_function.func(*job.args, **job.kwargs)
+    except Exception:
+        changes = {'last_error': traceback.format_exc()[-4000:]}
+        if job.attempts >= job.max_attempts:
+            changes['status'] = 'failed'
+        else:
+            changes['status'] = 'queued'
+            changes['run_at'] = timezone.now() + retry_delay(job.attempts)
+        return _finish(job, token, changes)
+
+    return _finish(job, token, {'status': 'succeeded', 'result': _jsonable(result), 'last_error': ''})
+
+
+def run_eagerly(job):
+    """Run a job and its retries in the caller, ignoring run_at and backoff"""
+    token = uuid.uuid4().hex
+    while True:
+        claimed = Job.objects.mongo_find_one_and_update(
+            {'id': job.id, 'status': 'queued'},
+            {'$set': {'status': 'running', 'claimed_by': token, 'started_at': timezone.now()}, '$inc': {'attempts': 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if claimed is None:
+            break
+        job.refresh_from_db()
+        if run_claimed(job, token)['status'] != 'queued':
+            break
+    job.refresh_from_db()
+    return job
+
+
+def submit_local(job_id, run_at=None):
+    """Run a job on this process' thread pool, once it is due"""
+    delay = (run_at - timezone.now()).total_seconds() if run_at else 0
+    if delay > 0:
+        timer = threading.Timer(delay, submit_local, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+        return None
+    return local_executor.submit(_run_local, job_id)
+
+
+def _run_local(job_id):
+    token = uuid.uuid4().hex
+    try:
+        job = claim_job(token, job_id=job_id)
+        if job is not None:
+            changes = run_claimed(job, token)
+            if changes['status'] == 'queued':
+                submit_local(job_id, changes['run_at'])
+        elif Job.objects.filter(id=job_id, status='queued').exists():
+            # At its concurrency limit; try again shortly
+            submit_local(job_id, timezone.now() + timedelta(seconds=settings.JOBS_POLL_INTERVAL))
+    except Exception as e:
+        print(f"Failed to run job {job_id}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def retry_job(job):
+    """Queue a finished job to run again from its first attempt"""
+    now = timezone.now()
+    retried = Job.objects.filter(id=job.id, status__in=['failed', 'cancelled']).update(
+        status='queued', attempts=0, run_at=now, claimed_by='', last_error='', updated_at=now
+    ) > 0
+    if retried:
+        job.refresh_from_db()
+        dispatch(job)
+    return retried
+
+
+def cancel_job(job):
+    """Cancel a job that has not started; returns whether it was cancelled"""
+    now = timezone.now()
+    return Job.objects.filter(id=job.id, status='queued').update(
+        status='cancelled', finished_at=now, updated_at=now
+    ) > 0
+
+
+def purge_finished_jobs(days=None):
+    """
+    Delete succeeded and cancelled jobs that finished more than `days`
+    (JOBS_RETENTION_DAYS by default) ago. Failed jobs are kept for inspection
+    and retrying. Returns the number deleted.
+    """
+    days = settings.JOBS_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    result = Job.objects.mongo_delete_many({
+        'status': {'$in': ['succeeded', 'cancelled']},
+        'finished_at': {'$lt': cutoff},
+    })
+    return result.deleted_count
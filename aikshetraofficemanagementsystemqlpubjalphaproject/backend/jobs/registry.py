@@ -0,0 +1,108 @@
+"""
+Job registration.
+Apps declare background work in their own `jobs.py` with the `@job` decorator:
+
+    @job(queue='maintenance', cron='30 2 * * *')
+    def cleanup_notifications(days=30):
+        ...
+
+    cleanup_notifications.delay(days=7)              # run on a worker
+    cleanup_notifications.schedule(countdown=60)     # run in a minute
+    cleanup_notifications(days=7)                    # run inline, as before
+
+Arguments are stored as JSON, so pass ids rather than model instances.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .schedules import Cron, Interval
+
+
+_registry = {}
+
+
+class JobFunction:
+    """A registered job; calling it runs the function inline"""
+
+    def __init__(self, func, name, queue, max_attempts, concurrency, schedule, coalesce=False):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.schedule = schedule
+        self.coalesce = coalesce
+        self.__doc__ = func.__doc__
+        self.__name__ = func.__name__
+        self.__module__ = func.__module__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<job {self.name}>'
+
+    def enqueue(self, args=None, kwargs=None, run_at=None, priority=0, created_by=None, unique_key=None):
+        """Queue a run of this job; returns the Job"""
+        from .queue import enqueue
+
+        return enqueue(
+            self, args=args, kwargs=kwargs, run_at=run_at, priority=priority,
+            created_by=created_by, unique_key=unique_key
+        )
+
+    def delay(self, *args, **kwargs):
+        """Queue a run of this job as soon as a worker is free"""
+        return self.enqueue(args=args, kwargs=kwargs)
+
+    def schedule(self, *args, run_at=None, countdown=None, **kwargs):
+        """Queue a run of this job at `run_at`, or `countdown` seconds from now"""
+        if run_at is None:
+            run_at = timezone.now() + timedelta(seconds=countdown or 0)
+        return self.enqueue(args=args, kwargs=kwargs, run_at=run_at)
+
+
+def job(func=None, *, name=None, queue='default', max_attempts=None, concurrency=None, every=None, cron=None,
+        coalesce=False):
+    """
+    Register a function as a background job.
+    `concurrency` caps how many runs of it execute at once across all workers.
+    `every` (seconds) or `cron` (a five-field cron expression) makes the
+    scheduler queue it periodically.
+    With `coalesce`, queueing it while a run is already waiting to start returns
+    that run instead of adding another, for jobs that drain whatever is pending.
+    """
+    if every and cron:
+        raise ValueError('A job takes either `every` or `cron`, not both')
+    schedule = Interval(every) if every else Cron(cron) if cron else None
+
+    def register(func):
+        job_name = name or f'{func.__module__}.{func.__name__}'
+        if job_name in _registry and _registry[job_name].func is not func:
+            raise ValueError(f'Job "{job_name}" is already registered')
+        _registry[job_name] = JobFunction(
+            func, job_name, queue,
+            max_attempts or settings.JOBS_DEFAULT_MAX_ATTEMPTS,
+            concurrency, schedule, coalesce
+        )
+        return _registry[job_name]
+
+    if func is not None:
+        return register(func)
+    return register
+
+
+def get_job(name):
+    """The registered job called `name`; raises KeyError if there is none"""
+    return _registry[name]
+
+
+def registered_jobs():
+    return dict(_registry)
+
+
+def periodic_jobs():
+    return [job_function for job_function in _registry.values() if job_function.schedule]
@@ -0,0 +1,109 @@
+"""
+Periodic job scheduler.
+Keeps the next run of every periodic job in a min-heap ordered by fire time and
+queues each run when it comes due. Every `run_jobs` worker carries a scheduler,
+but only the elected leader queues runs: leadership is a lease in the shared
+cache that the leader renews and the others take over once it lapses. Runs are
+also queued with a unique key per fire time, so two leaders overlapping for a
+moment can't queue the same run twice.
+
+The last fire time of each job is kept in the cache, so a new leader catches up
+on a run missed during the handover if it is less than
+JOBS_SCHEDULER_MISFIRE_GRACE seconds late.
+"""
+
+import heapq
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .queue import enqueue
+from .registry import periodic_jobs
+
+
+SCHEDULER_LEADER_CACHE_KEY = 'jobs_scheduler_leader'
+SCHEDULER_LAST_FIRE_CACHE_KEY = 'jobs_scheduler_last_fire:{}'
+
+
+class Scheduler:
+    """Queues periodic jobs while this process holds the scheduler lease"""
+
+    def __init__(self):
+        self.instance_id = uuid.uuid4().hex
+        self.heap = []
+        self.jobs = {}
+        self.is_leader = False
+        self._renew_at = 0
+
+    def _hold_lease(self):
+        """Acquire or renew the leader lease; returns whether this process leads"""
+        if time.monotonic() < self._renew_at:
+            return self.is_leader
+
+        lease = settings.JOBS_SCHEDULER_LEASE_SECONDS
+        if cache.add(SCHEDULER_LEADER_CACHE_KEY, self.instance_id, timeout=lease):
+            self.is_leader = True
+        elif cache.get(SCHEDULER_LEADER_CACHE_KEY) == self.instance_id:
+            cache.touch(SCHEDULER_LEADER_CACHE_KEY, lease)
+            self.is_leader = True
+        else:
+            self.is_leader = False
+        # Renew well before the lease runs out
+        self._renew_at = time.monotonic() + lease / 3
+        return self.is_leader
+
+    def _build(self, now):
+        """Fill the heap with each periodic job's next run"""
+        self.jobs = {job_function.name: job_function for job_function in periodic_jobs()}
+        last_fires = cache.get_many([SCHEDULER_LAST_FIRE_CACHE_KEY.format(name) for name in self.jobs])
+        grace = timedelta(seconds=settings.JOBS_SCHEDULER_MISFIRE_GRACE)
+
+        self.heap = []
+        for name, job_function in self.jobs.items():
+            last_fire = last_fires.get(SCHEDULER_LAST_FIRE_CACHE_KEY.format(name))
+            fire_at = job_function.schedule.next_after(last_fire) if last_fire else None
+            if fire_at is None or fire_at < now - grace:
+                fire_at = job_function.schedule.next_after(now)
+            self.heap.append((fire_at, name))
+        heapq.heapify(self.heap)
+
+    def tick(self, now=None):
+        """
+        Queue every run that is due. Returns the number queued, or None when
+        another process is the leader.
+        """
+        if not self._hold_lease():
+            self.heap = []
+            return None
+
+        now = now or timezone.now()
+        if not self.heap:
+            self._build(now)
+
+        queued = 0
+        while self.heap and self.heap[0][0] <= now:
+            fire_at, name = heapq.heappop(self.heap)
+            job_function = self.jobs[name]
+            try:
+                enqueue(job_function, run_at=fire_at, unique_key=f'scheduled:{name}:{int(fire_at.timestamp())}')
+                cache.set(SCHEDULER_LAST_FIRE_CACHE_KEY.format(name), fire_at, timeout=None)
+                queued += 1
+            except Exception as e:
+                print(f"Failed to schedule job {name}: {str(e)}")
+            # Runs missed while this process was stalled are skipped, not queued in a burst
+            heapq.heappush(self.heap, (job_function.schedule.next_after(max(fire_at, now)), name))
+        return queued
+
+    def next_fire(self):
+        return self.heap[0][0] if self.heap else None
+
+    def resign(self):
+        """Give up leadership so another process takes over without waiting for the lease"""
+        if self.is_leader and cache.get(SCHEDULER_LEADER_CACHE_KEY) == self.instance_id:
+            cache.delete(SCHEDULER_LEADER_CACHE_KEY)
+        self.is_leader = False
+        self.heap = []
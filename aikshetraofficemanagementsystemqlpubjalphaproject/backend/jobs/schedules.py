@@ -0,0 +1,88 @@
+"""
+Schedules for periodic jobs.
+Each schedule answers one question: when is the first run after a given time?
+"""
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+
+class Interval:
+    """Every `seconds`, aligned to the epoch so all processes agree on run times"""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError('Interval must be positive')
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f'every {self.seconds}s'
+
+    def next_after(self, after):
+        slot = int(after.timestamp() // self.seconds) + 1
+        return datetime.fromtimestamp(slot * self.seconds, tz=dt_timezone.utc)
+
+
+def _parse_field(field, low, high):
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/', 1)
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f'Invalid cron field "{field}"')
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class Cron:
+    """
+    Standard five-field cron expression (minute hour day-of-month month
+    day-of-week) in the project time zone. Sunday is 0 or 7.
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression "{expression}" must have five fields')
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = set(_parse_field(fields[2], 1, 31))
+        self.months = set(_parse_field(fields[3], 1, 12))
+        self.weekdays = {weekday % 7 for weekday in _parse_field(fields[4], 0, 7)}
+        # As in cron, a restricted day-of-month and day-of-week match either
+        self.either_day = fields[2] != '*' and fields[4] != '*'
+
+    def __repr__(self):
+        return f'cron "{self.expression}"'
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        return in_month or in_week if self.either_day else in_month and in_week
+
+    def next_after(self, after):
+        start = timezone.localtime(after).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        # Any valid expression fires within a leap-year cycle
+        for _ in range(366 * 4 + 1):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime.combine(day, time(hour, minute))
+                        if candidate >= start:
+                            return timezone.make_aware(candidate)
+            day += timedelta(days=1)
+        raise ValueError(f'Cron expression "{self.expression}" never fires')
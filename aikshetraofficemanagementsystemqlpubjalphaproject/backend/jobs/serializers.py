@@ -0,0 +1,19 @@
+"""
+Serializers for background jobs.
+"""
+
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for job status"""
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'queue', 'status', 'priority', 'args', 'kwargs',
+            'attempts', 'max_attempts', 'run_at', 'started_at', 'finished_at',
+            'result', 'last_error', 'created_by_id', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
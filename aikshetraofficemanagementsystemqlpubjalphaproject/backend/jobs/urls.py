@@ -0,0 +1,13 @@
+"""
+URL patterns for background job APIs.
+"""
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.JobListView.as_view(), name='job_list'),
+    path('<int:pk>/', views.job_detail, name='job_detail'),
+    path('<int:pk>/retry/', views.retry_failed_job, name='retry_job'),
+    path('<int:pk>/cancel/', views.cancel_queued_job, name='cancel_job'),
+]
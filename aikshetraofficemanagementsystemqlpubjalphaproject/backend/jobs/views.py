@@ -0,0 +1,80 @@
+"""
+Background job status API views.
+"""
+
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from accounts.permissions import IsAdminUser
+from .models import Job
+from .queue import cancel_job, retry_job
+from .serializers import JobSerializer
+
+
+class JobListView(generics.ListAPIView):
+    """List jobs, filtered by status, name or queue (admin only)"""
+    
+    serializer_class = JobSerializer
+    permission_classes = [IsAdminUser]
+    
+    def get_queryset(self):
+        queryset = Job.objects.all().order_by('-created_at')
+        for field in ['status', 'name', 'queue']:
+            value = self.request.GET.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def job_detail(request, pk):
+    """Get the status of a job the user queued (admins see every job)"""
+    
+    try:
+        job = Job.objects.get(pk=pk)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not request.user.is_admin and job.created_by_id != str(request.user.id):
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response(JobSerializer(job).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def retry_failed_job(request, pk):
+    """Run a failed or cancelled job again"""
+    
+    try:
+        job = Job.objects.get(pk=pk)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not retry_job(job):
+        return Response({
+            'error': 'Only failed or cancelled jobs can be retried'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    job.refresh_from_db()
+    return Response(JobSerializer(job).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def cancel_queued_job(request, pk):
+    """Cancel a job that has not started yet"""
+    
+    try:
+        job = Job.objects.get(pk=pk)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not cancel_job(job):
+        return Response({
+            'error': 'Only queued jobs can be cancelled'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    job.refresh_from_db()
+    return Response(JobSerializer(job).data)
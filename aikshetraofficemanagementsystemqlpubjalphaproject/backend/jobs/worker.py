@@ -0,0 +1,111 @@
+"""
+Job worker process.
+Runs up to `concurrency` jobs at once from the given queues, renews the leases
+of running jobs and queues periodic jobs while it leads the scheduler.
+SIGTERM/SIGINT stop claiming new jobs and let the running ones finish.
+"""
+
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .queue import claim_job, ensure_indexes, extend_leases, run_claimed
+from .scheduler import Scheduler
+
+
+class Worker:
+    """Claims and runs jobs until stopped"""
+
+    def __init__(self, queues=None, concurrency=None, interval=None, stdout=None):
+        self.queues = queues or None
+        self.concurrency = concurrency or settings.JOBS_WORKER_CONCURRENCY
+        self.interval = interval if interval is not None else settings.JOBS_POLL_INTERVAL
+        self.stdout = stdout
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job-worker')
+        self.running = {}
+        self.scheduler = Scheduler()
+        self.stopping = False
+        self._wake = threading.Event()
+        self._last_heartbeat = 0
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def stop(self, *args):
+        if not self.stopping:
+            self.log('Stopping after running jobs finish')
+        self.stopping = True
+        self._wake.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def _execute(self, job, token):
+        try:
+            changes = run_claimed(job, token)
+            self.log(f"{job.name} [{job.id}] {changes['status']}")
+        except Exception as e:
+            # The job's lease runs out and another worker retries it
+            print(f"Failed to record job {job.id}: {str(e)}")
+        finally:
+            close_old_connections()
+            self._wake.set()
+
+    def _reap(self):
+        for token, future in list(self.running.items()):
+            if future.done():
+                del self.running[token]
+
+    def _heartbeat(self):
+        if time.monotonic() - self._last_heartbeat >= settings.JOBS_LEASE_SECONDS / 3:
+            extend_leases(self.running)
+            self._last_heartbeat = time.monotonic()
+
+    def _schedule(self):
+        try:
+            self.scheduler.tick()
+        except Exception as e:
+            # The cache is unreachable; jobs already queued still run
+            print(f"Job scheduler failed: {str(e)}")
+
+    def _fill(self):
+        """Claim jobs for free threads; returns how many were claimed"""
+        claimed = 0
+        while not self.stopping and len(self.running) < self.concurrency:
+            token = uuid.uuid4().hex
+            job = claim_job(token, queues=self.queues)
+            if job is None:
+                break
+            self.running[token] = self.executor.submit(self._execute, job, token)
+            claimed += 1
+        return claimed
+
+    def run(self, burst=False):
+        """Work until stopped, or with `burst` until no job is due"""
+        ensure_indexes()
+        while not self.stopping:
+            self._wake.clear()
+            self._reap()
+            self._heartbeat()
+            self._schedule()
+            claimed = self._fill()
+            if burst and not claimed and not self.running:
+                break
+            if not claimed:
+                close_old_connections()
+                self._wake.wait(self.interval)
+
+        self.scheduler.resign()
+        while self.running:
+            self._reap()
+            self._heartbeat()
+            self._wake.wait(1)
+            self._wake.clear()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,14 @@
+"""
+Learning app configuration.
+"""
+
+from django.apps import AppConfig
+
+
+class LearningConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'learning'
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import learning.signals
@@ -0,0 +1,13 @@
+"""
+Background jobs for learning management.
+"""
+
+from jobs.registry import job
+
+from .utils import send_training_session_reminders
+
+
+@job(queue='notifications', concurrency=1, max_attempts=1, every=5 * 60)
+def remind_training_sessions():
+    """Remind participants of training sessions starting soon"""
+    return {'sessions': send_training_session_reminders()}
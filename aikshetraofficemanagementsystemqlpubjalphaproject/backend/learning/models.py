@@ -123,6 +123,9 @@ class CourseEnrollment(models.Model):
     
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Exposes mongo_* collection methods for aggregations
+    objects = djongo_models.DjongoManager()
+    
     class Meta:
         verbose_name = 'Course Enrollment'
         verbose_name_plural = 'Course Enrollments'
@@ -231,6 +234,7 @@ class TrainingSession(models.Model):
     
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
+    reminder_sent_at = models.DateTimeField(null=True, blank=True, help_text="When participants were reminded of the session")
     
     # Materials
     session_materials = models.FileField(upload_to='session_materials/', blank=True, null=True)
@@ -0,0 +1,252 @@
+"""
+Scheduling conflict detection for training sessions.
+Keeps sorted interval indexes per instructor, location and participant so
+double-bookings and free slots can be answered without scanning sessions.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from office_management.change_log import ChangeLog
+
+from .models import TrainingSession
+
+
+ACTIVE_SESSION_STATUSES = ('scheduled', 'ongoing')
+
+
+class IntervalIndex:
+    """
+    Intervals [start, end) for a single resource, sorted by start.
+    A running maximum of end times lets overlap queries stop as soon as no
+    earlier interval can reach the queried window.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._entries = []
+        self._max_ends = []
+        self._session_starts = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, start, end, session_id):
+        """Insert an interval, keeping the index sorted by start"""
+        position = bisect_right(self._starts, start)
+        self._starts.insert(position, start)
+        self._entries.insert(position, (start, end, session_id))
+        self._max_ends.insert(position, end)
+        self._session_starts[session_id] = start
+
+        # Later running maxima only change while they are below the new end
+        if position and self._max_ends[position - 1] > end:
+            self._max_ends[position] = self._max_ends[position - 1]
+        for i in range(position + 1, len(self._max_ends)):
+            if self._max_ends[i] >= end:
+                break
+            self._max_ends[i] = end
+
+    def remove(self, session_id):
+        """Remove a session's interval if present"""
+        start = self._session_starts.pop(session_id, None)
+        if start is None:
+            return
+
+        position = bisect_left(self._starts, start)
+        while self._entries[position][2] != session_id:
+            position += 1
+        del self._starts[position]
+        del self._entries[position]
+        del self._max_ends[position]
+
+        running = self._max_ends[position - 1] if position else None
+        for i in range(position, len(self._entries)):
+            end = self._entries[i][1]
+            running = end if running is None or end > running else running
+            self._max_ends[i] = running
+
+    def overlapping(self, start, end):
+        """Yield (start, end, session_id) for intervals overlapping [start, end)"""
+        j = bisect_left(self._starts, end) - 1
+        while j >= 0 and self._max_ends[j] > start:
+            entry = self._entries[j]
+            if entry[1] > start:
+                yield entry
+            j -= 1
+
+
+class SessionScheduler:
+    """
+    Per-process scheduling index over active training sessions.
+    Other processes publish changes by bumping a shared version counter; a
+    stale index is rebuilt from the database on its next use.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._indexes = {}
+        self._session_resources = {}
+        self._changes = ChangeLog('training_schedule_version')
+
+    @staticmethod
+    def _normalize_location(location):
+        return (location or '').strip().lower()
+
+    def _resource_keys(self, instructor_id=None, location='', participant_ids=()):
+        keys = []
+        if instructor_id:
+            keys.append(('instructor', str(instructor_id)))
+        location = self._normalize_location(location)
+        if location:
+            keys.append(('location', location))
+        keys.extend(('participant', str(participant_id)) for participant_id in participant_ids or [])
+        return keys
+
+    def _index_session(self, session_id, start, end, instructor_id, location, participant_ids):
+        keys = self._resource_keys(instructor_id, location, participant_ids)
+        for key in keys:
+            self._indexes.setdefault(key, IntervalIndex()).add(start, end, session_id)
+        self._session_resources[session_id] = keys
+
+    def _unindex_session(self, session_id):
+        for key in self._session_resources.pop(session_id, []):
+            index = self._indexes.get(key)
+            if index is not None:
+                index.remove(session_id)
+                if not len(index):
+                    del self._indexes[key]
+
+    def _rebuild(self, version):
+        self._indexes = {}
+        self._session_resources = {}
+        sessions = TrainingSession.objects.filter(
+            status__in=ACTIVE_SESSION_STATUSES,
+            end_datetime__gte=timezone.now()
+        ).values('id', 'start_datetime', 'end_datetime', 'instructor_id', 'location', 'participant_ids')
+
+        for session in sessions:
+            self._index_session(
+                session['id'], session['start_datetime'], session['end_datetime'],
+                session['instructor_id'], session['location'], session['participant_ids']
+            )
+        self._version = version
+
+    def _ensure_current(self):
+        version = self._changes.current()
+        if version != self._version:
+            self._rebuild(version)
+
+    def _apply_change(self, session_id, session=None):
+        """Publish a change and apply it locally if no other change was missed"""
+        with self._lock:
+            new_version = self._changes.publish()
+            if not self._changes.follows(self._version, new_version):
+                # Missed another process' change, rebuild lazily on next use
+                self._version = None
+                return
+
+            self._unindex_session(session_id)
+            if session is not None and session.status in ACTIVE_SESSION_STATUSES:
+                self._index_session(
+                    session.id, session.start_datetime, session.end_datetime,
+                    session.instructor_id, session.location, session.participant_ids
+                )
+            self._version = new_version
+
+    def session_saved(self, session):
+        """Update the index after a training session is created or changed"""
+        self._apply_change(session.id, session)
+
+    def session_deleted(self, session_id):
+        """Update the index after a training session is deleted"""
+        self._apply_change(session_id)
+
+    def find_conflicts(self, start, end, instructor_id=None, location='',
+                       participant_ids=(), exclude_session_id=None):
+        """
+        Find sessions that would double-book the given instructor, location or participants.
+        Returns a list of {'resource', 'resource_id', 'session_id', 'start', 'end'} dicts.
+        """
+        conflicts = []
+        with self._lock:
+            self._ensure_current()
+            for resource, resource_id in self._resource_keys(instructor_id, location, participant_ids):
+                index = self._indexes.get((resource, resource_id))
+                if index is None:
+                    continue
+                for busy_start, busy_end, session_id in index.overlapping(start, end):
+                    if session_id == exclude_session_id:
+                        continue
+                    conflicts.append({
+                        'resource': resource,
+                        'resource_id': resource_id,
+                        'session_id': session_id,
+                        'start': busy_start,
+                        'end': busy_end,
+                    })
+        return conflicts
+
+    def free_slots(self, participant_ids, window_start, window_end, min_duration,
+                   instructor_id=None, location=''):
+        """
+        Find time ranges within working hours where all given people (and
+        optionally the instructor and location) are free for at least min_duration.
+        """
+        busy = []
+        with self._lock:
+            self._ensure_current()
+            for key in self._resource_keys(instructor_id, location, participant_ids):
+                index = self._indexes.get(key)
+                if index is not None:
+                    busy.extend((start, end) for start, end, _ in index.overlapping(window_start, window_end))
+
+        # Merge busy intervals of everybody involved
+        busy.sort()
+        merged = []
+        for start, end in busy:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        day_start_hour, day_end_hour = settings.TRAINING_SESSION_WORKDAY_HOURS
+        tz = timezone.get_current_timezone()
+        slots = []
+        position = 0
+        day = timezone.localtime(window_start).date()
+        last_day = timezone.localtime(window_end).date()
+
+        while day <= last_day:
+            free_start = max(window_start, timezone.make_aware(datetime.combine(day, time(day_start_hour)), tz))
+            day_end = min(window_end, timezone.make_aware(datetime.combine(day, time(day_end_hour)), tz))
+
+            while position < len(merged) and merged[position][1] <= free_start:
+                position += 1
+
+            cursor = position
+            while free_start < day_end:
+                if cursor < len(merged) and merged[cursor][0] < day_end:
+                    free_end = merged[cursor][0]
+                else:
+                    free_end = day_end
+
+                if free_end - free_start >= min_duration:
+                    slots.append({'start': free_start, 'end': free_end})
+
+                if cursor >= len(merged) or merged[cursor][0] >= day_end:
+                    break
+                free_start = max(free_start, merged[cursor][1])
+                cursor += 1
+
+            day += timedelta(days=1)
+
+        return slots
+
+
+scheduler = SessionScheduler()
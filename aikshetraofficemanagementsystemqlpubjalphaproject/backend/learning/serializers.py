@@ -40,7 +40,7 @@ class LearningPathSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_course_count(self, obj):
-        return obj.courses.count()
+        return len(obj.course_ids or [])
 
 
 class TrainingSessionSerializer(serializers.ModelSerializer):
@@ -53,6 +53,18 @@ class TrainingSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrainingSession
         fields = '__all__'
+        read_only_fields = ['reminder_sent_at']
+    
+    def validate(self, attrs):
+        """Validate that the session ends after it starts"""
+        start = attrs.get('start_datetime', getattr(self.instance, 'start_datetime', None))
+        end = attrs.get('end_datetime', getattr(self.instance, 'end_datetime', None))
+        if start and end and end <= start:
+            raise serializers.ValidationError("Session end time must be after its start time")
+        if self.instance and start != self.instance.start_datetime:
+            # Rescheduled sessions are reminded again for their new time
+            attrs['reminder_sent_at'] = None
+        return attrs
 
 
 class SessionAttendanceSerializer(serializers.ModelSerializer):
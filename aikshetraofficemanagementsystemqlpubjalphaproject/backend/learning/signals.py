@@ -0,0 +1,35 @@
+"""
+Django signals for learning management.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import CourseEnrollment, TrainingSession
+from .scheduling import scheduler
+from .utils import invalidate_learning_path_progress
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    """
+    Drop cached learning path progress when a user's enrollment changes.
+    """
+    invalidate_learning_path_progress(instance.user_id)
+
+
+@receiver(post_save, sender=TrainingSession)
+def training_session_saved(sender, instance, **kwargs):
+    """
+    Keep the scheduling conflict index in sync with training sessions.
+    """
+    scheduler.session_saved(instance)
+
+
+@receiver(post_delete, sender=TrainingSession)
+def training_session_deleted(sender, instance, **kwargs):
+    """
+    Remove deleted training sessions from the scheduling conflict index.
+    """
+    scheduler.session_deleted(instance.id)
@@ -8,7 +8,12 @@ from . import views
 urlpatterns = [
     path('courses/', views.CourseListCreateView.as_view(), name='course_list'),
     path('courses/<int:course_id>/enroll/', views.enroll_course, name='enroll_course'),
+    path('courses/<int:course_id>/materials/', views.course_materials, name='course_materials'),
     path('enrollments/', views.CourseEnrollmentListCreateView.as_view(), name='course_enrollments'),
     path('learning-paths/', views.LearningPathListView.as_view(), name='learning_paths'),
+    path('learning-paths/<int:path_id>/progress/', views.learning_path_progress, name='learning_path_progress'),
     path('training-sessions/', views.TrainingSessionListCreateView.as_view(), name='training_sessions'),
+    path('training-sessions/<int:session_id>/register/', views.register_training_session, name='register_training_session'),
+    path('training-sessions/free-slots/', views.training_session_free_slots, name='training_session_free_slots'),
+    path('training-sessions/<int:session_id>/materials/', views.session_materials, name='session_materials'),
 ]
@@ -0,0 +1,188 @@
+"""
+Utility functions for learning management.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from notifications.utils import send_templated_bulk_notifications
+
+from .models import CourseEnrollment, TrainingSession
+
+
+ACTIVE_ENROLLMENT_STATUSES = ('enrolled', 'in_progress')
+
+
+def _progress_cache_key(user_id):
+    """Cache key holding every cached path progress entry for a user"""
+    return f'learning_path_progress:{user_id}'
+
+
+def _path_version(path):
+    """Version stamp so edits to a path's course list invalidate cached progress"""
+    return path.updated_at.isoformat() if path.updated_at else ''
+
+
+def _build_progress(path, course_ids, user_id, enrollments):
+    """
+    Compute progress through an ordered learning path from a user's enrollments.
+    `enrollments` maps course_id to {'status': ..., 'progress': ...}.
+    """
+    def status_of(course_id):
+        return enrollments.get(course_id, {}).get('status')
+
+    total_courses = len(course_ids)
+    unfinished = [course_id for course_id in course_ids if status_of(course_id) != 'completed']
+    completed_courses = total_courses - len(unfinished)
+
+    # Partially completed courses count towards overall completion
+    progress_points = completed_courses * 100
+    for course_id in unfinished:
+        if status_of(course_id) in ACTIVE_ENROLLMENT_STATUSES:
+            progress_points += min(enrollments[course_id]['progress'] or 0, 100)
+
+    # Current course is the first unfinished one being taken, next is the one after it
+    current_course_id = next(
+        (course_id for course_id in unfinished if status_of(course_id) in ACTIVE_ENROLLMENT_STATUSES),
+        None
+    )
+    if current_course_id is not None:
+        remaining = unfinished[unfinished.index(current_course_id) + 1:]
+    else:
+        remaining = unfinished
+    next_course_id = remaining[0] if remaining else None
+
+    return {
+        'learning_path_id': path.id,
+        'user_id': user_id,
+        'total_courses': total_courses,
+        'completed_courses': completed_courses,
+        'completion_percentage': progress_points // total_courses if total_courses else 0,
+        'is_completed': total_courses > 0 and not unfinished,
+        'current_course_id': current_course_id,
+        'next_course_id': next_course_id,
+    }
+
+
+def _aggregate_path_enrollments(course_ids, user_ids=None):
+    """
+    Join the path's courses against CourseEnrollment in a single aggregation.
+    Returns {user_id: {course_id: {'status': ..., 'progress': ...}}}.
+    """
+    match = {'course_id': {'$in': course_ids}}
+    if user_ids is not None:
+        match['user_id'] = {'$in': user_ids}
+
+    pipeline = [
+        {'$match': match},
+        # Most recent enrollment wins when a course was retaken
+        {'$sort': {'enrolled_at': 1}},
+        {'$group': {
+            '_id': '$user_id',
+            'enrollments': {'$push': {
+                'course_id': '$course_id',
+                'status': '$status',
+                'progress': '$progress_percentage',
+            }},
+        }},
+    ]
+
+    results = {}
+    for row in CourseEnrollment.objects.mongo_aggregate(pipeline):
+        results[row['_id']] = {
+            item['course_id']: {'status': item['status'], 'progress': item['progress']}
+            for item in row['enrollments']
+        }
+    return results
+
+
+def get_learning_path_progress(path, user_ids=None):
+    """
+    Get progress through a learning path for the given users.
+    When user_ids is None the whole cohort (everyone enrolled in any course of
+    the path) is returned. Results are cached per user until their enrollments change.
+    """
+    course_ids = [str(course_id) for course_id in (path.course_ids or [])]
+    version = _path_version(path)
+    path_key = str(path.id)
+    progress = {}
+
+    if user_ids is not None:
+        user_ids = [str(user_id) for user_id in user_ids]
+        cached = cache.get_many([_progress_cache_key(user_id) for user_id in user_ids])
+        for user_id in user_ids:
+            entry = cached.get(_progress_cache_key(user_id), {}).get(path_key)
+            if entry and entry['version'] == version:
+                progress[user_id] = entry['progress']
+
+        missing = [user_id for user_id in user_ids if user_id not in progress]
+        if not missing:
+            return [progress[user_id] for user_id in user_ids]
+    else:
+        cached = None
+        missing = None
+
+    enrollments_by_user = _aggregate_path_enrollments(course_ids, missing) if course_ids else {}
+    computed_user_ids = missing if missing is not None else list(enrollments_by_user)
+    if cached is None:
+        cached = cache.get_many([_progress_cache_key(user_id) for user_id in computed_user_ids])
+
+    to_cache = {}
+    for user_id in computed_user_ids:
+        user_progress = _build_progress(path, course_ids, user_id, enrollments_by_user.get(user_id, {}))
+        progress[user_id] = user_progress
+
+        key = _progress_cache_key(user_id)
+        entry = dict(cached.get(key, {}))
+        entry[path_key] = {'version': version, 'progress': user_progress}
+        to_cache[key] = entry
+
+    if to_cache:
+        cache.set_many(to_cache, timeout=settings.LEARNING_PATH_PROGRESS_CACHE_TIMEOUT)
+
+    ordered_user_ids = user_ids if user_ids is not None else computed_user_ids
+    return [progress[user_id] for user_id in ordered_user_ids]
+
+
+def invalidate_learning_path_progress(user_id):
+    """Drop cached learning path progress for a user after an enrollment change"""
+    cache.delete(_progress_cache_key(str(user_id)))
+
+
+def send_training_session_reminders(now=None):
+    """
+    Remind participants and the instructor of scheduled sessions starting
+    within TRAINING_SESSION_REMINDER_MINUTES. Each session is reminded once.
+    Returns the number of sessions reminded.
+    """
+    now = now or timezone.now()
+    upcoming = TrainingSession.objects.filter(
+        status='scheduled',
+        reminder_sent_at__isnull=True,
+        start_datetime__gt=now,
+        start_datetime__lte=now + timedelta(minutes=settings.TRAINING_SESSION_REMINDER_MINUTES)
+    )
+    
+    reminded = 0
+    for session in upcoming:
+        # Claim the session first so overlapping runs don't remind twice
+        if not TrainingSession.objects.filter(id=session.id, reminder_sent_at__isnull=True).update(reminder_sent_at=now):
+            continue
+        
+        recipient_ids = set(session.participant_ids or [])
+        if session.instructor_id:
+            recipient_ids.add(session.instructor_id)
+        send_templated_bulk_notifications(
+            recipient_ids,
+            'training_session',
+            {
+                'session_title': session.title,
+                'datetime': timezone.localtime(session.start_datetime).strftime('%b %d, %Y %H:%M'),
+            },
+            action_url='/trainee/learning'
+        )
+        reminded += 1
+    return reminded
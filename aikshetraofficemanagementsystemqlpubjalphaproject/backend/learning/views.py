@@ -2,15 +2,23 @@
 Learning management API views.
 """
 
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from accounts.permissions import IsAdminUser, IsTraineeOrAbove
+from office_management.media import serve_protected_file
 from .models import Course, CourseEnrollment, LearningPath, TrainingSession, SessionAttendance
 from .serializers import (
     CourseSerializer, CourseEnrollmentSerializer, LearningPathSerializer,
     TrainingSessionSerializer, SessionAttendanceSerializer
 )
+from .scheduling import scheduler
+from .utils import get_learning_path_progress
 
 
 class CourseListCreateView(generics.ListCreateAPIView):
@@ -81,6 +89,39 @@ class LearningPathListView(generics.ListAPIView):
     permission_classes = [IsTraineeOrAbove]
 
 
+@api_view(['GET'])
+@permission_classes([IsTraineeOrAbove])
+def learning_path_progress(request, path_id):
+    """
+    Progress through a learning path.
+    Returns the current user's progress; admins may pass `user_ids`
+    (comma-separated) or `cohort=true` for everyone enrolled in the path.
+    """
+    
+    try:
+        path = LearningPath.objects.get(pk=path_id, is_active=True)
+    except LearningPath.DoesNotExist:
+        return Response({'error': 'Learning path not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    user_ids = [str(request.user.id)]
+    if request.user.is_admin:
+        if request.GET.get('cohort') == 'true':
+            user_ids = None
+        elif request.GET.get('user_ids'):
+            user_ids = [user_id.strip() for user_id in request.GET['user_ids'].split(',') if user_id.strip()]
+    
+    progress = get_learning_path_progress(path, user_ids)
+    
+    if user_ids is not None and len(user_ids) == 1:
+        return Response(progress[0])
+    
+    return Response({
+        'learning_path_id': path.id,
+        'count': len(progress),
+        'results': progress
+    })
+
+
 class TrainingSessionListCreateView(generics.ListCreateAPIView):
     """List and create training sessions"""
     
@@ -92,3 +133,177 @@ class TrainingSessionListCreateView(generics.ListCreateAPIView):
         if self.request.method == 'POST':
             return [IsAdminUser()]
         return [IsTraineeOrAbove()]
+    
+    def create(self, request, *args, **kwargs):
+        self.schedule_conflicts = []
+        response = super().create(request, *args, **kwargs)
+        if self.schedule_conflicts:
+            response.data['conflicts'] = self.schedule_conflicts
+        return response
+    
+    def perform_create(self, serializer):
+        """Reject or warn when the session double-books its instructor, location or participants"""
+        data = serializer.validated_data
+        conflicts = scheduler.find_conflicts(
+            data['start_datetime'],
+            data['end_datetime'],
+            instructor_id=data.get('instructor_id'),
+            location=data.get('location', ''),
+            participant_ids=data.get('participant_ids') or [],
+        )
+        
+        allow_conflicts = str(self.request.data.get('allow_conflicts', '')).lower() == 'true'
+        if conflicts and settings.TRAINING_SESSION_CONFLICT_MODE == 'reject' and not allow_conflicts:
+            raise ValidationError({
+                'error': 'Training session conflicts with existing sessions',
+                'conflicts': conflicts
+            })
+        
+        self.schedule_conflicts = conflicts
+        serializer.save()
+
+
+@api_view(['POST'])
+@permission_classes([IsTraineeOrAbove])
+def register_training_session(request, session_id):
+    """Register for a training session"""
+    
+    try:
+        session = TrainingSession.objects.get(pk=session_id)
+    except TrainingSession.DoesNotExist:
+        return Response({'error': 'Training session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    user_id = str(request.user.id)
+    participant_ids = [str(participant_id) for participant_id in (session.participant_ids or [])]
+    
+    if session.status != 'scheduled':
+        return Response({
+            'error': 'Registration is not open for this session'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if user_id in participant_ids:
+        return Response({
+            'error': 'Already registered for this session'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if session.is_full:
+        return Response({
+            'error': 'Training session is full'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    conflicts = scheduler.find_conflicts(
+        session.start_datetime,
+        session.end_datetime,
+        participant_ids=[user_id],
+        exclude_session_id=session.id,
+    )
+    if conflicts and settings.TRAINING_SESSION_CONFLICT_MODE == 'reject':
+        return Response({
+            'error': 'You are already booked for another session at this time',
+            'conflicts': conflicts
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    session.participant_ids = participant_ids + [user_id]
+    session.save()
+    
+    SessionAttendance.objects.create(session_id=str(session.id), user_id=user_id)
+    
+    response_data = {
+        'message': 'Successfully registered for training session',
+        'session': TrainingSessionSerializer(session).data
+    }
+    if conflicts:
+        response_data['conflicts'] = conflicts
+    
+    return Response(response_data)
+
+
+def _parse_window_bound(value):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is None:
+            return None
+        parsed = datetime.combine(parsed_date, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@api_view(['GET'])
+@permission_classes([IsTraineeOrAbove])
+def training_session_free_slots(request):
+    """
+    Find free slots shared by a group of people.
+    Query params: `user_ids` (comma-separated), optional `start`/`end`
+    (defaults to the current week), `duration` in minutes (default 60),
+    `instructor_id` and `location`.
+    """
+    
+    user_ids = [user_id.strip() for user_id in request.GET.get('user_ids', '').split(',') if user_id.strip()]
+    
+    today = timezone.localdate()
+    week_start = timezone.make_aware(datetime.combine(today - timedelta(days=today.weekday()), time.min))
+    start = _parse_window_bound(request.GET['start']) if request.GET.get('start') else week_start
+    end = _parse_window_bound(request.GET['end']) if request.GET.get('end') else week_start + timedelta(days=7)
+    
+    try:
+        duration = timedelta(minutes=int(request.GET.get('duration', 60)))
+    except ValueError:
+        return Response({'error': 'duration must be a number of minutes'}, status=status.HTTP_400_BAD_REQUEST)
+    if duration <= timedelta(0):
+        return Response({'error': 'duration must be a positive number of minutes'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if start is None or end is None or end <= start:
+        return Response({'error': 'Invalid time window'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    slots = scheduler.free_slots(
+        user_ids,
+        max(start, timezone.now()),
+        end,
+        duration,
+        instructor_id=request.GET.get('instructor_id'),
+        location=request.GET.get('location', ''),
+    )
+    
+    return Response({
+        'start': start,
+        'end': end,
+        'slots': slots
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsTraineeOrAbove])
+def course_materials(request, course_id):
+    """Download or stream a course's materials"""
+    
+    try:
+        course = Course.objects.get(pk=course_id)
+    except Course.DoesNotExist:
+        return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    user_id = str(request.user.id)
+    if course.status != 'published' and not request.user.is_admin and course.instructor_id != user_id:
+        return Response({'error': 'You do not have access to these materials'}, status=status.HTTP_403_FORBIDDEN)
+    
+    return serve_protected_file(request, course.course_materials)
+
+
+@api_view(['GET'])
+@permission_classes([IsTraineeOrAbove])
+def session_materials(request, session_id):
+    """Download or stream a training session's materials"""
+    
+    try:
+        session = TrainingSession.objects.get(pk=session_id)
+    except TrainingSession.DoesNotExist:
+        return Response({'error': 'Training session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    user_id = str(request.user.id)
+    participant_ids = [str(participant_id) for participant_id in (session.participant_ids or [])]
+    if not request.user.is_admin and session.instructor_id != user_id and user_id not in participant_ids:
+        return Response({'error': 'You do not have access to these materials'}, status=status.HTTP_403_FORBIDDEN)
+    
+    return serve_protected_file(request, session.session_materials)
@@ -4,7 +4,10 @@ Django admin for notification management.
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Notification, NotificationPreference, SystemAnnouncement
+from django.utils import timezone
+from .models import BroadcastNotification, ChannelEvent, Notification, NotificationPreference, OutboundEmail, SystemAnnouncement
+from .events import schedule_relay
+from .outbox import schedule_drain
 
 
 @admin.register(Notification)
@@ -38,10 +41,18 @@ class NotificationAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('recipient')
 
 
+@admin.register(BroadcastNotification)
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    list_display = ['title', 'audience_type', 'audience', 'notification_type', 'created_at']
+    list_filter = ['audience_type', 'notification_type', 'created_at']
+    search_fields = ['title', 'message', 'audience']
+    readonly_fields = ['created_at']
+
+
 @admin.register(NotificationPreference)
 class NotificationPreferenceAdmin(admin.ModelAdmin):
-    list_display = ['user', 'email_enabled', 'push_enabled', 'inapp_enabled', 'quiet_hours_enabled']
-    list_filter = ['email_enabled', 'push_enabled', 'inapp_enabled', 'quiet_hours_enabled']
+    list_display = ['user', 'email_enabled', 'email_frequency', 'push_enabled', 'inapp_enabled', 'quiet_hours_enabled']
+    list_filter = ['email_enabled', 'email_frequency', 'push_enabled', 'inapp_enabled', 'quiet_hours_enabled']
     search_fields = ['user__first_name', 'user__last_name', 'user__email']
     
     fieldsets = (
@@ -54,6 +65,9 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
                 'email_salary_updates', 'email_learning_updates', 'email_system_updates'
             )
         }),
+        ('Email Digests', {
+            'fields': ('email_frequency', 'last_digest_at')
+        }),
         ('Push Notifications', {
             'fields': (
                 'push_enabled', 'push_task_updates', 'push_attendance_reminders',
@@ -70,6 +84,7 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
             'fields': ('quiet_hours_enabled', 'quiet_hours_start', 'quiet_hours_end')
         }),
     )
+    readonly_fields = ['last_digest_at']
 
 
 @admin.register(SystemAnnouncement)
@@ -98,3 +113,53 @@ class SystemAnnouncementAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('created_by')
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject']
+    readonly_fields = [
+        'subject', 'body', 'html_body', 'from_email', 'to', 'notification_ids', 'status', 'attempts',
+        'next_attempt_at', 'claimed_by', 'claimed_until', 'last_error', 'sent_at', 'created_at', 'updated_at'
+    ]
+    
+    actions = ['retry_emails']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def retry_emails(self, request, queryset):
+        """Send failed emails again"""
+        updated = queryset.filter(status='failed').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), last_error=''
+        )
+        schedule_drain()
+        self.message_user(request, f'{updated} email(s) queued for retry.')
+    retry_emails.short_description = "Retry selected failed emails"
+
+
+@admin.register(ChannelEvent)
+class ChannelEventAdmin(admin.ModelAdmin):
+    list_display = ['group', 'entity_key', 'status', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['group', 'entity_key']
+    readonly_fields = [
+        'group', 'message', 'entity_key', 'status', 'attempts', 'next_attempt_at',
+        'claimed_by', 'claimed_until', 'last_error', 'created_at'
+    ]
+    
+    actions = ['retry_events']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def retry_events(self, request, queryset):
+        """Publish failed events again"""
+        updated = queryset.filter(status='failed').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), last_error=''
+        )
+        schedule_relay()
+        self.message_user(request, f'{updated} event(s) queued for retry.')
+    retry_events.short_description = "Retry selected failed events"
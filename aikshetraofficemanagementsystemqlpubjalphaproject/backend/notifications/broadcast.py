@@ -0,0 +1,224 @@
+"""
+Role and department broadcasts.
+A notification for a whole role or department is stored once as a
+BroadcastNotification and pushed with a single group_send (via the event
+outbox) to the audience's channel group, which every notification socket joins
+on connect. Read state is kept per user as BroadcastReceipts, written only when
+a user reads one.
+
+Only active, approved users receive broadcasts, and only those sent after they
+joined. Their broadcast counts are cached per user and counted into the
+notification stats; sending a broadcast bumps its audience's version, which
+makes the cached counts of everyone in that audience stale.
+"""
+
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Q
+
+from .events import enqueue_event
+from .models import BroadcastNotification, BroadcastReceipt
+from .preferences import allows, preference_masks
+
+
+User = get_user_model()
+
+
+AUDIENCE_VERSION_CACHE_KEY = 'broadcast_audience_version:{}'
+BROADCAST_COUNTS_CACHE_KEY = 'broadcast_counts:{}'
+
+# Most recent broadcasts counted and marked read per user; older ones drop out of the badge
+MAX_COUNTED_BROADCASTS = 200
+
+GROUP_PREFIXES = {
+    'role': 'role',
+    'department': 'dept',
+}
+
+
+def broadcast_group_name(audience_type, audience):
+    """Channel group for an audience (group names only allow [A-Za-z0-9_.-])"""
+    safe_audience = re.sub(r'[^A-Za-z0-9_.-]', '_', audience)[:80]
+    return f'{GROUP_PREFIXES[audience_type]}_{safe_audience}'
+
+
+def receives_broadcasts(user):
+    return user.is_active and user.is_approved
+
+
+def audience_groups(user):
+    """Broadcast groups a user's sockets belong to"""
+    groups = [broadcast_group_name('role', user.role)]
+    if user.department:
+        groups.append(broadcast_group_name('department', user.department))
+    return groups
+
+
+def broadcast_event_data(broadcast, is_read=False):
+    """Websocket payload for a broadcast"""
+    return {
+        'id': broadcast.id,
+        'title': broadcast.title,
+        'message': broadcast.message,
+        'type': broadcast.notification_type,
+        'is_read': is_read,
+        'created_at': broadcast.created_at.isoformat(),
+        'action_url': broadcast.action_url,
+        'action_label': broadcast.action_label,
+    }
+
+
+def create_broadcast(audience_type, audience, title, message, notification_type='info',
+                     action_url='', action_label='', data=None, exclude_user=None):
+    """Store one notification for an audience and push it with one group_send"""
+    broadcast = BroadcastNotification.objects.create(
+        audience_type=audience_type,
+        audience=audience,
+        excluded_user_ids=[str(exclude_user.id)] if exclude_user else [],
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        action_url=action_url,
+        action_label=action_label,
+        data=data or {}
+    )
+
+    version_key = AUDIENCE_VERSION_CACHE_KEY.format(broadcast_group_name(audience_type, audience))
+    cache.add(version_key, 0, timeout=None)
+    cache.incr(version_key)
+
+    enqueue_event(
+        broadcast_group_name(audience_type, audience),
+        {
+            'type': 'broadcast_message',
+            'broadcast': broadcast_event_data(broadcast),
+            'excluded_user_ids': broadcast.excluded_user_ids,
+        },
+        f'broadcast:{broadcast.id}'
+    )
+
+    return broadcast
+
+
+def broadcasts_for_user(user, limit=50):
+    """
+    Recent broadcasts addressed to a user that their preferences allow in-app.
+    Returns (broadcasts, read_ids).
+    """
+    if not receives_broadcasts(user):
+        return [], set()
+
+    audience = Q(audience_type='role', audience=user.role)
+    if user.department:
+        audience |= Q(audience_type='department', audience=user.department)
+
+    broadcasts = BroadcastNotification.objects.filter(
+        audience, created_at__gte=user.date_joined
+    ).order_by('-created_at')[:limit]
+
+    mask = preference_masks.get(user.id)
+    broadcasts = [
+        broadcast for broadcast in broadcasts
+        if broadcast.is_for_user(user) and allows(mask, broadcast.notification_type, 'inapp')
+    ]
+    read_ids = set(BroadcastReceipt.objects.filter(
+        user_id=str(user.id),
+        broadcast_id__in=[str(broadcast.id) for broadcast in broadcasts]
+    ).values_list('broadcast_id', flat=True))
+    return broadcasts, read_ids
+
+
+def _audience_versions(groups):
+    keys = [AUDIENCE_VERSION_CACHE_KEY.format(group) for group in groups]
+    versions = cache.get_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+def broadcast_counts(user_id, user=None):
+    """
+    A user's broadcast counts in the notification stats layout
+    ({'total': n, 'unread': n, 'type:<type>': n}, zero counts omitted),
+    over their MAX_COUNTED_BROADCASTS most recent broadcasts.
+    Cached until a broadcast reaches one of their audiences, they read one or
+    their in-app preferences change.
+    """
+    key = BROADCAST_COUNTS_CACHE_KEY.format(user_id)
+    entry = cache.get(key)
+    if entry and entry['mask'] == preference_masks.get(user_id) and _audience_versions(entry['groups']) == entry['versions']:
+        return entry['counts']
+
+    if user is None:
+        user = User.objects.filter(id=user_id).first()
+        if user is None:
+            return {}
+
+    groups = audience_groups(user)
+    # Read before counting, so a broadcast sent meanwhile makes this entry stale
+    versions = _audience_versions(groups)
+    mask = preference_masks.get(user_id)
+    broadcasts, read_ids = broadcasts_for_user(user, limit=MAX_COUNTED_BROADCASTS)
+
+    counts = defaultdict(int)
+    for broadcast in broadcasts:
+        counts['total'] += 1
+        counts[f'type:{broadcast.notification_type}'] += 1
+        if str(broadcast.id) not in read_ids:
+            counts['unread'] += 1
+    counts = dict(counts)
+
+    cache.set(
+        key, {'groups': groups, 'versions': versions, 'mask': mask, 'counts': counts},
+        timeout=settings.NOTIFICATION_STATS_CACHE_TIMEOUT
+    )
+    return counts
+
+
+def mark_broadcasts_read(user_id, broadcast_ids):
+    """Record receipts for broadcasts a user has read; returns how many were new"""
+    user_id = str(user_id)
+    broadcast_ids = {str(broadcast_id) for broadcast_id in broadcast_ids}
+    already_read = set(BroadcastReceipt.objects.filter(
+        user_id=user_id, broadcast_id__in=list(broadcast_ids)
+    ).values_list('broadcast_id', flat=True))
+
+    receipts = [
+        BroadcastReceipt(broadcast_id=broadcast_id, user_id=user_id)
+        for broadcast_id in broadcast_ids - already_read
+    ]
+    try:
+        BroadcastReceipt.objects.bulk_create(receipts)
+    except IntegrityError:
+        # Read concurrently from another tab; receipts are idempotent
+        for receipt in receipts:
+            try:
+                receipt.pk = None
+                receipt.save()
+            except IntegrityError:
+                continue
+    if receipts:
+        cache.delete(BROADCAST_COUNTS_CACHE_KEY.format(user_id))
+    return len(receipts)
+
+
+def mark_all_broadcasts_read(user_id, before=None, notification_type=None):
+    """
+    Mark a user's unread broadcasts among their MAX_COUNTED_BROADCASTS most
+    recent as read, optionally only those created before a time and/or of one
+    type. Returns how many were marked.
+    """
+    user = User.objects.filter(id=user_id).first()
+    if user is None:
+        return 0
+
+    broadcasts, read_ids = broadcasts_for_user(user, limit=MAX_COUNTED_BROADCASTS)
+    return mark_broadcasts_read(user_id, [
+        broadcast.id for broadcast in broadcasts
+        if str(broadcast.id) not in read_ids
+        and (before is None or broadcast.created_at < before)
+        and (notification_type is None or broadcast.notification_type == notification_type)
+    ])
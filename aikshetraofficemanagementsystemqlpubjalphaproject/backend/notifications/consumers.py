@@ -2,16 +2,88 @@
 WebSocket consumers for real-time functionality.
 """
 
-import json
+import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.dateparse import parse_datetime
+from .broadcast import audience_groups, mark_broadcasts_read, receives_broadcasts
 from .models import Notification
+from .preferences import allows, preference_masks
+from .utils import get_unread_count, mark_notifications_read, publish_unread_count
+from .wire import WireFormatMixin
 
 User = get_user_model()
 
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+class BatchedSendMixin(WireFormatMixin):
+    """
+    Per-connection outbound buffer for group events.
+    Events queued within WEBSOCKET_BATCH_WINDOW of each other are coalesced by
+    entity (a later event replaces an earlier one for the same key) and sent as
+    one array frame, never later than WEBSOCKET_MAX_LATENCY after the first.
+    One send is in flight at a time, so a slow client only makes its buffer
+    coalesce more; past WEBSOCKET_MAX_BUFFERED_EVENTS the backlog is dropped
+    and the client is told to resync.
+    """
+    
+    def init_send_buffer(self):
+        self.outbound = {}
+        self.first_queued_at = None
+        self.last_queued_at = None
+        self.send_task = None
+        self.send_lock = asyncio.Lock()
+    
+    def queue_frame(self, frame, key=None):
+        """Buffer a frame; frames with the same key collapse to the latest"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if not self.outbound:
+            self.first_queued_at = now
+        self.last_queued_at = now
+        
+        key = key or (frame['type'], id(frame))
+        self.outbound.pop(key, None)
+        self.outbound[key] = frame
+        
+        if len(self.outbound) > settings.WEBSOCKET_MAX_BUFFERED_EVENTS:
+            # Client can't keep up; have it refetch instead of replaying the backlog
+            self.outbound = {'resync': {'type': 'resync', 'reason': 'backlog'}}
+        
+        if self.send_task is None:
+            self.send_task = asyncio.ensure_future(self.send_buffered_later())
+    
+    async def send_buffered_later(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline = min(
+                self.last_queued_at + settings.WEBSOCKET_BATCH_WINDOW,
+                self.first_queued_at + settings.WEBSOCKET_MAX_LATENCY
+            )
+            delay = deadline - loop.time()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        self.send_task = None
+        await self.send_buffered()
+    
+    async def send_buffered(self):
+        """Send everything buffered as one frame (an array when more than one event)"""
+        async with self.send_lock:
+            frames, self.outbound = list(self.outbound.values()), {}
+            if not frames:
+                return
+            await self.send_payload(frames if len(frames) > 1 else frames[0])
+    
+    async def close_send_buffer(self):
+        """Stop the pending send on disconnect"""
+        if getattr(self, 'send_task', None) is not None:
+            self.send_task.cancel()
+            self.send_task = None
+
+
+class NotificationConsumer(BatchedSendMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time notifications.
     """
@@ -21,6 +93,11 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         self.user_id = self.scope['url_route']['kwargs']['user_id']
         self.user_group_name = f'user_{self.user_id}'
         
+        # Individual read events are coalesced into one write per short window
+        self.pending_reads = set()
+        self.read_flush_task = None
+        self.init_send_buffer()
+        
         # Verify user authentication
         user = await self.get_user(self.user_id)
         if not user:
@@ -33,58 +110,154 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         
-        await self.accept()
+        # Join role and department groups for broadcasts
+        self.broadcast_groups = audience_groups(user) if receives_broadcasts(user) else []
+        for group_name in self.broadcast_groups:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+        
+        await self.accept_negotiated()
         
         # Send initial unread notification count
         unread_count = await self.get_unread_count(user)
-        await self.send(text_data=json.dumps({
+        await self.send_payload({
             'type': 'unread_count',
             'count': unread_count
-        }))
+        })
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        await self.close_send_buffer()
+        if getattr(self, 'pending_reads', None):
+            await self.flush_reads()
+        
         await self.channel_layer.group_discard(
             self.user_group_name,
             self.channel_name
         )
+        for group_name in getattr(self, 'broadcast_groups', []):
+            await self.channel_layer.group_discard(group_name, self.channel_name)
     
-    async def receive(self, text_data):
-        """Handle messages from WebSocket"""
+    async def receive(self, text_data=None, bytes_data=None):
+        """Handle messages from WebSocket (JSON text or MessagePack binary frames)"""
         try:
-            text_data_json = json.loads(text_data)
-            message_type = text_data_json.get('type')
+            message = self.decode_payload(text_data, bytes_data)
+            message_type = message.get('type')
             
             if message_type == 'mark_read':
-                notification_id = text_data_json.get('notification_id')
-                await self.mark_notification_read(notification_id)
+                broadcast_ids = message.get('broadcast_ids')
+                if broadcast_ids:
+                    await self.mark_broadcasts_read(broadcast_ids)
+                else:
+                    notification_ids = message.get('notification_ids') or [message.get('notification_id')]
+                    self.queue_reads(notification_ids)
+            
+            elif message_type == 'mark_all_read':
+                before = message.get('before')
+                if before:
+                    before = self.parse_before(before)
+                    if before is None:
+                        # Never widen a bounded request to the whole inbox
+                        await self.send_payload({
+                            'type': 'error',
+                            'message': 'Invalid before timestamp'
+                        })
+                        return
+                await self.flush_reads()
+                await self.mark_notifications_read(
+                    before=before or None,
+                    notification_type=message.get('notification_type')
+                )
             
             elif message_type == 'get_notifications':
                 notifications = await self.get_recent_notifications()
-                await self.send(text_data=json.dumps({
+                await self.send_payload({
                     'type': 'notifications_list',
                     'notifications': notifications
-                }))
+                })
         
-        except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
+        except (ValueError, AttributeError):
+            await self.send_payload({
                 'type': 'error',
-                'message': 'Invalid JSON'
-            }))
+                'message': 'Invalid message'
+            })
+    
+    @staticmethod
+    def parse_before(value):
+        """Parse a mark_all_read cutoff, None if it isn't a valid datetime"""
+        try:
+            return parse_datetime(value) if isinstance(value, str) else None
+        except ValueError:
+            return None
+    
+    def queue_reads(self, notification_ids):
+        """Buffer read events and schedule one write for the whole burst"""
+        for notification_id in notification_ids:
+            try:
+                self.pending_reads.add(int(notification_id))
+            except (TypeError, ValueError):
+                continue
+        
+        if self.pending_reads and self.read_flush_task is None:
+            self.read_flush_task = asyncio.ensure_future(self.flush_reads_later())
+    
+    async def flush_reads_later(self):
+        await asyncio.sleep(settings.NOTIFICATION_READ_COALESCE_SECONDS)
+        self.read_flush_task = None
+        await self.flush_reads()
+    
+    async def flush_reads(self):
+        """Write buffered read events with a single update"""
+        if self.read_flush_task is not None:
+            self.read_flush_task.cancel()
+            self.read_flush_task = None
+        
+        notification_ids, self.pending_reads = list(self.pending_reads), set()
+        if notification_ids:
+            await self.mark_notifications_read(notification_ids=notification_ids)
     
     async def notification_message(self, event):
         """Send notification to WebSocket"""
-        await self.send(text_data=json.dumps({
+        notification_id = event['notification']['id']
+        # Bulk-inserted notifications may carry no id; those never collapse
+        self.queue_frame({
             'type': 'new_notification',
             'notification': event['notification']
-        }))
+        }, key=('notification', notification_id) if notification_id is not None else None)
+    
+    async def notification_updated(self, event):
+        """Send an in-place update for a collapsed notification"""
+        key = ('notification', event['notification']['id'])
+        pending = self.outbound.get(key)
+        if pending and pending['type'] == 'new_notification':
+            # Not delivered yet, so it still arrives as new, with the latest content
+            pending['notification'] = event['notification']
+            return
+        self.queue_frame({
+            'type': 'notification_update',
+            'notification': event['notification']
+        }, key=key)
+    
+    async def broadcast_message(self, event):
+        """
+        Send a role or department broadcast to WebSocket.
+        Clients add unread broadcasts to their badge themselves; recounting here
+        would make every socket in the audience recompute its count at once.
+        """
+        if self.user_id in event['excluded_user_ids']:
+            return
+        if not await self.allows_inapp(event['broadcast']['type']):
+            return
+        self.queue_frame({
+            'type': 'new_broadcast',
+            'broadcast': event['broadcast']
+        }, key=('broadcast', event['broadcast']['id']))
     
     async def unread_count_update(self, event):
         """Send updated unread count"""
-        await self.send(text_data=json.dumps({
+        self.queue_frame({
             'type': 'unread_count',
             'count': event['count']
-        }))
+        }, key=('unread_count',))
     
     @database_sync_to_async
     def get_user(self, user_id):
@@ -96,8 +269,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     
     @database_sync_to_async
     def get_unread_count(self, user):
-        """Get unread notification count"""
-        return Notification.objects.filter(recipient=user, is_read=False).count()
+        """Get unread notification and broadcast count"""
+        return get_unread_count(self.user_id, user)
+    
+    @database_sync_to_async
+    def allows_inapp(self, notification_type):
+        """Check the user's cached preference mask"""
+        return allows(preference_masks.get(self.user_id), notification_type, 'inapp')
     
     @database_sync_to_async
     def get_recent_notifications(self):
@@ -119,21 +297,19 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         } for notif in notifications]
     
     @database_sync_to_async
-    def mark_notification_read(self, notification_id):
-        """Mark notification as read"""
-        try:
-            user = User.objects.get(id=self.user_id)
-            notification = Notification.objects.get(
-                id=notification_id,
-                recipient=user
-            )
-            notification.mark_as_read()
-            return True
-        except (User.DoesNotExist, Notification.DoesNotExist):
-            return False
+    def mark_notifications_read(self, **filters):
+        """Mark notifications as read and send the new unread count once"""
+        if mark_notifications_read(self.user_id, **filters):
+            publish_unread_count(self.user_id)
+    
+    @database_sync_to_async
+    def mark_broadcasts_read(self, broadcast_ids):
+        """Record broadcast receipts and send the new unread count"""
+        if mark_broadcasts_read(self.user_id, broadcast_ids):
+            publish_unread_count(self.user_id)
 
 
-class AttendanceConsumer(AsyncWebsocketConsumer):
+class AttendanceConsumer(BatchedSendMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time attendance updates.
     """
@@ -142,6 +318,7 @@ class AttendanceConsumer(AsyncWebsocketConsumer):
         """Handle WebSocket connection"""
         self.user_id = self.scope['url_route']['kwargs']['user_id']
         self.attendance_group_name = f'attendance_{self.user_id}'
+        self.init_send_buffer()
         
         # Verify user authentication
         user = await self.get_user(self.user_id)
@@ -155,10 +332,11 @@ class AttendanceConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         
-        await self.accept()
+        await self.accept_negotiated()
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        await self.close_send_buffer()
         await self.channel_layer.group_discard(
             self.attendance_group_name,
             self.channel_name
@@ -166,10 +344,10 @@ class AttendanceConsumer(AsyncWebsocketConsumer):
     
     async def attendance_update(self, event):
         """Send attendance update to WebSocket"""
-        await self.send(text_data=json.dumps({
+        self.queue_frame({
             'type': 'attendance_update',
             'data': event['data']
-        }))
+        }, key=('attendance_update', event['data'].get('id')))
     
     @database_sync_to_async
     def get_user(self, user_id):
@@ -180,7 +358,7 @@ class AttendanceConsumer(AsyncWebsocketConsumer):
             return None
 
 
-class TaskConsumer(AsyncWebsocketConsumer):
+class TaskConsumer(BatchedSendMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time task updates.
     """
@@ -189,6 +367,7 @@ class TaskConsumer(AsyncWebsocketConsumer):
         """Handle WebSocket connection"""
         self.user_id = self.scope['url_route']['kwargs']['user_id']
         self.task_group_name = f'tasks_{self.user_id}'
+        self.init_send_buffer()
         
         # Verify user authentication
         user = await self.get_user(self.user_id)
@@ -202,10 +381,11 @@ class TaskConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         
-        await self.accept()
+        await self.accept_negotiated()
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        await self.close_send_buffer()
         await self.channel_layer.group_discard(
             self.task_group_name,
             self.channel_name
@@ -213,17 +393,17 @@ class TaskConsumer(AsyncWebsocketConsumer):
     
     async def task_update(self, event):
         """Send task update to WebSocket"""
-        await self.send(text_data=json.dumps({
+        self.queue_frame({
             'type': 'task_update',
             'data': event['data']
-        }))
+        }, key=('task_update', event['data'].get('id')))
     
     async def task_assigned(self, event):
         """Send task assignment notification"""
-        await self.send(text_data=json.dumps({
+        self.queue_frame({
             'type': 'task_assigned',
             'data': event['data']
-        }))
+        }, key=('task_assigned', event['data'].get('id')))
     
     @database_sync_to_async
     def get_user(self, user_id):
@@ -234,7 +414,7 @@ class TaskConsumer(AsyncWebsocketConsumer):
             return None
 
 
-class SystemConsumer(AsyncWebsocketConsumer):
+class SystemConsumer(BatchedSendMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for system-wide announcements.
     """
@@ -242,6 +422,7 @@ class SystemConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         """Handle WebSocket connection"""
         self.system_group_name = 'system_announcements'
+        self.init_send_buffer()
         
         # Join system announcements group
         await self.channel_layer.group_add(
@@ -249,10 +430,11 @@ class SystemConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         
-        await self.accept()
+        await self.accept_negotiated()
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        await self.close_send_buffer()
         await self.channel_layer.group_discard(
             self.system_group_name,
             self.channel_name
@@ -260,7 +442,7 @@ class SystemConsumer(AsyncWebsocketConsumer):
     
     async def system_announcement(self, event):
         """Send system announcement to WebSocket"""
-        await self.send(text_data=json.dumps({
+        self.queue_frame({
             'type': 'system_announcement',
             'data': event['data']
-        }))
+        }, key=('system_announcement', event['data'].get('id')))
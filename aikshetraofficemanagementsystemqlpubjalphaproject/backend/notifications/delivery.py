@@ -0,0 +1,17 @@
+"""
+Batched delivery of notifications and emails off the request path.
+A batch's in-app notifications are written with one bulk insert (filtered by
+in-app preferences and pushed to the recipients' sockets) and its emails are
+handed to the outbox with one insert, to be sent over a pooled SMTP connection.
+Callers run it from a background job so the batch survives a process restart.
+"""
+
+from .outbox import enqueue_messages
+from .utils import deliver_notifications
+
+
+def deliver_batch(notifications=(), emails=()):
+    """Write notifications and enqueue their caller-built emails"""
+    if notifications:
+        deliver_notifications(list(notifications), send_emails=False)
+    return enqueue_messages(list(emails))
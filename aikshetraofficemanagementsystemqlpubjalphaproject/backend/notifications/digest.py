@@ -0,0 +1,160 @@
+"""
+Notification email digests.
+Email-eligible notifications for users on an hourly or daily cadence, or in
+their quiet hours, are buffered as DigestItems instead of being emailed one by
+one. The digest scheduler sends each due user a single summary email of
+everything buffered since their last digest.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import DigestItem, NotificationPreference
+from .outbox import build_email, enqueue_messages
+from .preferences import allows, email_frequency, is_digest_due, is_quiet, preference_masks
+
+User = get_user_model()
+
+
+# Items listed in one digest email; the rest are summarised as a count
+DIGEST_MAX_ITEMS = 50
+
+# Last digest time per user as a UNIX timestamp, 0 for never. Only
+# send_due_digests writes last_digest_at, so it keeps this cache current.
+LAST_DIGEST_CACHE_KEY = 'notification_last_digest:{}'
+LAST_DIGEST_CACHE_TIMEOUT = 2 * 24 * 60 * 60
+
+
+def should_buffer(mask, now=None):
+    """Whether a user's notification emails go to the digest instead of out immediately"""
+    return email_frequency(mask) != 'immediate' or is_quiet(mask, now)
+
+
+def buffer_notifications(items):
+    """Add (notification, user) pairs to their users' next digest with a single insert"""
+    digest_items = [
+        DigestItem(
+            user_id=str(user.id),
+            notification_id=str(notification.id) if notification.id else None,
+            title=notification.title,
+            message=notification.message,
+            notification_type=notification.notification_type,
+            action_url=notification.action_url,
+        )
+        for notification, user in items
+    ]
+    if digest_items:
+        DigestItem.objects.bulk_create(digest_items)
+    return len(digest_items)
+
+
+def pending_user_ids():
+    """Users with at least one buffered item"""
+    pipeline = [{'$group': {'_id': '$user_id'}}]
+    return [row['_id'] for row in DigestItem.objects.mongo_aggregate(pipeline)]
+
+
+def last_digest_times(user_ids):
+    """Map user ids to their last digest time (None if never), reading the database only for cache misses"""
+    cached = cache.get_many([LAST_DIGEST_CACHE_KEY.format(user_id) for user_id in user_ids])
+    times = {}
+    missing = []
+    for user_id in user_ids:
+        timestamp = cached.get(LAST_DIGEST_CACHE_KEY.format(user_id))
+        if timestamp is None:
+            missing.append(user_id)
+        else:
+            times[user_id] = datetime.fromtimestamp(timestamp, dt_timezone.utc) if timestamp else None
+
+    if missing:
+        loaded = dict.fromkeys(missing)
+        loaded.update(
+            NotificationPreference.objects.filter(user_id__in=missing).values_list('user_id', 'last_digest_at')
+        )
+        cache.set_many({
+            LAST_DIGEST_CACHE_KEY.format(user_id): value.timestamp() if value else 0
+            for user_id, value in loaded.items()
+        }, timeout=LAST_DIGEST_CACHE_TIMEOUT)
+        times.update(loaded)
+    return times
+
+
+def build_digest(user, items):
+    """Render one digest email for a user's buffered items"""
+    if len(items) == 1:
+        subject = f"[Office Management] {items[0].title}"
+    else:
+        subject = f"[Office Management] You have {len(items)} new notifications"
+
+    context = {
+        'user': user,
+        'items': items[:DIGEST_MAX_ITEMS],
+        'remaining': max(len(items) - DIGEST_MAX_ITEMS, 0),
+        'total': len(items),
+    }
+    return build_email(subject, 'emails/digest.html', context, [user.email])
+
+
+def send_due_digests(now=None):
+    """
+    Enqueue one digest email for every user whose cadence has elapsed and who
+    is outside quiet hours, then clear their buffered items.
+    Returns {'users': n, 'items': n} for the digests sent.
+    """
+    now = now or timezone.now()
+    user_ids = pending_user_ids()
+    if not user_ids:
+        return {'users': 0, 'items': 0}
+
+    # Cadence and quiet hours come from the cached masks, so no preference documents are read
+    masks = preference_masks.get_many(user_ids)
+    last_digests = last_digest_times(user_ids)
+    due_ids = [
+        user_id for user_id in user_ids
+        if is_digest_due(masks[user_id], last_digests[user_id], now)
+    ]
+    if not due_ids:
+        return {'users': 0, 'items': 0}
+
+    users = {str(user.id): user for user in User.objects.filter(id__in=due_ids, is_active=True)}
+    items_by_user = defaultdict(list)
+    item_ids = []
+    for item in DigestItem.objects.filter(user_id__in=due_ids, created_at__lte=now).order_by('created_at'):
+        item_ids.append(item.id)
+        # Preferences may have changed since the item was buffered
+        if not allows(masks[item.user_id], item.notification_type, 'email'):
+            continue
+        items_by_user[item.user_id].append(item)
+
+    messages = []
+    notification_ids = []
+    sent_items = 0
+    for user_id, items in items_by_user.items():
+        user = users.get(user_id)
+        if not user or not user.email:
+            continue
+        messages.append(build_digest(user, items))
+        notification_ids.append([item.notification_id for item in items if item.notification_id])
+        sent_items += len(items)
+
+    enqueue_messages(messages, notification_ids)
+    # Items of deleted or inactive users are dropped along with the sent ones
+    DigestItem.objects.mongo_delete_many({'id': {'$in': item_ids}})
+
+    existing = set(NotificationPreference.objects.filter(user_id__in=due_ids).values_list('user_id', flat=True))
+    NotificationPreference.objects.filter(user_id__in=existing).update(last_digest_at=now)
+    missing = [user_id for user_id in due_ids if user_id not in existing]
+    if missing:
+        NotificationPreference.objects.bulk_create([
+            NotificationPreference(user_id=user_id, last_digest_at=now) for user_id in missing
+        ])
+    cache.set_many(
+        {LAST_DIGEST_CACHE_KEY.format(user_id): now.timestamp() for user_id in due_ids},
+        timeout=LAST_DIGEST_CACHE_TIMEOUT
+    )
+
+    return {'users': len(messages), 'items': sent_items}
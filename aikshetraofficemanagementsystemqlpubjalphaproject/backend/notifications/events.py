@@ -0,0 +1,260 @@
+"""
+Outbox relay for real-time channel events.
+Signal handlers and notification helpers record the group_send they would have
+made as a ChannelEvent, a single local insert, so writes never wait on the
+channel layer and events survive a Redis outage. The relay claims due events in
+batches, publishes them from one event loop and deletes them; failures are
+retried with backoff.
+
+Events sharing an entity_key are published in the order they were recorded: an
+entity whose earlier event is waiting for a retry or being published by
+another relay is skipped until that event is out. Relays claiming at the same
+time can still pick up different events of one entity, so after claiming a
+relay hands back the events of any entity that has an older event it does not
+hold.
+
+Unread count events are recorded with only the user id and counted when they
+are published (see fill_unread_counts).
+"""
+
+import asyncio
+import random
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChannelEvent
+
+
+def enqueue_events(events):
+    """
+    Record (group, message, entity_key) events with a single insert.
+    The relay is woken once the surrounding transaction commits.
+    """
+    now = timezone.now()
+    rows = [
+        ChannelEvent(group=group, message=message, entity_key=entity_key, created_at=now, next_attempt_at=now)
+        for group, message, entity_key in events
+    ]
+    if rows:
+        ChannelEvent.objects.bulk_create(rows)
+        transaction.on_commit(schedule_relay)
+    return rows
+
+
+def enqueue_event(group, message, entity_key):
+    """Record one group_send for the relay"""
+    return enqueue_events([(group, message, entity_key)])[0]
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at CHANNEL_EVENT_MAX_RETRY_DELAY"""
+    delay = min(settings.CHANNEL_EVENT_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.CHANNEL_EVENT_MAX_RETRY_DELAY)
+    return timedelta(seconds=delay * random.uniform(1.0, 1.1))
+
+
+def blocked_entities(now):
+    """Entities with an earlier event that is backing off or being published elsewhere"""
+    pipeline = [
+        {'$match': {'$or': [
+            {'status': 'pending', 'next_attempt_at': {'$gt': now}},
+            {'status': 'sending', 'claimed_until': {'$gte': now}},
+        ]}},
+        {'$group': {'_id': '$entity_key'}},
+    ]
+    return [row['_id'] for row in ChannelEvent.objects.mongo_aggregate(pipeline)]
+
+
+def claim_events(batch_size):
+    """
+    Atomically claim up to `batch_size` due events for this relay.
+    Returns (claim_token, events) with events in publish order.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = {'$or': [
+        {'status': 'pending', 'next_attempt_at': {'$lte': now}},
+        # Batches whose relay died before recording a result
+        {'status': 'sending', 'claimed_until': {'$lt': now}},
+    ]}
+
+    query = dict(due)
+    blocked = blocked_entities(now)
+    if blocked:
+        query['entity_key'] = {'$nin': blocked}
+
+    cursor = ChannelEvent.objects.mongo_find(query, {'id': 1}).sort([('created_at', 1), ('id', 1)]).limit(batch_size)
+    event_ids = [row['id'] for row in cursor]
+    if not event_ids:
+        return token, []
+
+    ChannelEvent.objects.mongo_update_many(
+        {'id': {'$in': event_ids}, **due},
+        {'$set': {
+            'status': 'sending',
+            'claimed_by': token,
+            'claimed_until': now + timedelta(seconds=settings.CHANNEL_EVENT_LEASE_SECONDS),
+        }}
+    )
+    events = list(ChannelEvent.objects.filter(claimed_by=token, status='sending').order_by('created_at', 'id'))
+
+    # Another relay may have claimed an older event of the same entity meanwhile
+    held = held_entities(token, events)
+    if held:
+        ChannelEvent.objects.mongo_update_many(
+            {'claimed_by': token, 'entity_key': {'$in': list(held)}},
+            {'$set': {'status': 'pending', 'claimed_by': '', 'claimed_until': None}}
+        )
+        events = [event for event in events if event.entity_key not in held]
+    return token, events
+
+
+def held_entities(token, events):
+    """Entities of claimed events that have an older undelivered event not claimed with `token`"""
+    first_events = {}
+    for event in events:
+        first_events.setdefault(event.entity_key, event)
+    if not first_events:
+        return set()
+
+    older = [
+        {
+            'entity_key': entity_key,
+            '$or': [
+                {'created_at': {'$lt': event.created_at}},
+                {'created_at': event.created_at, 'id': {'$lt': event.id}},
+            ],
+        }
+        for entity_key, event in first_events.items()
+    ]
+    query = {'status': {'$in': ['pending', 'sending']}, 'claimed_by': {'$ne': token}, '$or': older}
+    return {row['entity_key'] for row in ChannelEvent.objects.mongo_find(query, {'entity_key': 1})}
+
+
+async def _publish(events):
+    """
+    group_send each event in order from one event loop.
+    Returns {event_id: error} for the events that were not published.
+    """
+    channel_layer = get_channel_layer()
+    errors = {}
+    held_entities = set()
+    for event in events:
+        if event.entity_key in held_entities:
+            errors[event.id] = None
+            continue
+        try:
+            await asyncio.wait_for(
+                channel_layer.group_send(event.group, event.message),
+                timeout=settings.CHANNEL_EVENT_SEND_TIMEOUT
+            )
+        except Exception as e:
+            errors[event.id] = str(e) or e.__class__.__name__
+            # Later events for this entity wait for this one
+            held_entities.add(event.entity_key)
+    return errors
+
+
+def fill_unread_counts(events):
+    """Replace each unread count event's user id with the user's count, counting each user once"""
+    from .utils import get_unread_count
+
+    counts = {}
+    for event in events:
+        message = event.message
+        if message.get('type') != 'unread_count_update' or 'user_id' not in message:
+            continue
+        user_id = message['user_id']
+        if user_id not in counts:
+            counts[user_id] = get_unread_count(user_id)
+        event.message = {'type': 'unread_count_update', 'count': counts[user_id]}
+
+
+def publish_batch(token, events):
+    """
+    Publish claimed events and record the outcome.
+    Returns {'published': n, 'retrying': n, 'failed': n}.
+    """
+    result = {'published': 0, 'retrying': 0, 'failed': 0}
+    if not events:
+        return result
+
+    try:
+        fill_unread_counts(events)
+        errors = async_to_sync(_publish)(events)
+    except Exception as e:
+        errors = {event.id: str(e) for event in events}
+
+    published_ids = [event.id for event in events if event.id not in errors]
+    if published_ids:
+        ChannelEvent.objects.mongo_delete_many({'id': {'$in': published_ids}, 'claimed_by': token})
+        result['published'] = len(published_ids)
+
+    now = timezone.now()
+    for event in events:
+        if event.id not in errors:
+            continue
+        error = errors[event.id]
+        if error is None:
+            # Held back behind a failed event for the same entity; not an attempt of its own
+            ChannelEvent.objects.mongo_update_one(
+                {'id': event.id, 'claimed_by': token},
+                {'$set': {'status': 'pending', 'next_attempt_at': now}}
+            )
+            result['retrying'] += 1
+            continue
+
+        attempts = event.attempts + 1
+        changes = {'attempts': attempts, 'last_error': error[:2000]}
+        if attempts >= settings.CHANNEL_EVENT_MAX_ATTEMPTS:
+            changes['status'] = 'failed'
+            result['failed'] += 1
+        else:
+            changes['status'] = 'pending'
+            changes['next_attempt_at'] = now + retry_delay(attempts)
+            result['retrying'] += 1
+        ChannelEvent.objects.mongo_update_one({'id': event.id, 'claimed_by': token}, {'$set': changes})
+
+    return result
+
+
+def relay_events(batch_size=None, max_batches=None):
+    """
+    Publish due events until none are left (or `max_batches` is reached).
+    Returns totals of published, retrying and failed events.
+    """
+    batch_size = batch_size or settings.CHANNEL_EVENT_BATCH_SIZE
+    totals = {'published': 0, 'retrying': 0, 'failed': 0}
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        token, events = claim_events(batch_size)
+        if not events:
+            break
+        result = publish_batch(token, events)
+        for key, count in result.items():
+            totals[key] += count
+        batches += 1
+        if not result['published']:
+            # Everything claimed is backing off; leave it for a later run
+            break
+
+    return totals
+
+
+def schedule_relay():
+    """
+    Queue a relay run on the job queue.
+    A run that is already waiting to start is reused, so bursts of enqueues
+    share one relay.
+    """
+    if not settings.CHANNEL_EVENT_RELAY_ON_ENQUEUE:
+        return None
+
+    from .jobs import relay_channel_events
+    return relay_channel_events.delay()
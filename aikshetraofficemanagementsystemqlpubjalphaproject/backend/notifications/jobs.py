@@ -0,0 +1,43 @@
+"""
+Background jobs for notifications.
+Drains and relays also run on enqueue; the periodic runs pick up retries and
+anything left behind by a process that stopped.
+"""
+
+from jobs.registry import job
+
+from .digest import send_due_digests
+from .events import relay_events
+from .outbox import drain_outbox
+from .utils import cleanup_old_notifications, reconcile_notification_stats
+
+
+@job(queue='maintenance', concurrency=1, cron='30 2 * * *')
+def cleanup_notifications(days=30):
+    """Delete read notifications older than `days`"""
+    return {'deleted': cleanup_old_notifications(days)}
+
+
+@job(queue='maintenance', concurrency=1, max_attempts=1, every=15 * 60)
+def reconcile_stats():
+    """Drop cached notification counters that drifted from the stored notifications"""
+    return {'drifted': reconcile_notification_stats()}
+
+
+@job(queue='notifications', concurrency=1, max_attempts=1, every=60)
+def send_digests():
+    """Send notification digests that are due"""
+    return send_due_digests()
+
+
+@job(queue='notifications', concurrency=1, max_attempts=1, every=60, coalesce=True)
+def drain_email_outbox():
+    """Send due emails from the outbox"""
+    return drain_outbox()
+
+
+@job(queue='notifications', concurrency=1, max_attempts=1, every=10, coalesce=True)
+def relay_channel_events():
+    """Publish due channel events"""
+    return relay_events()
+
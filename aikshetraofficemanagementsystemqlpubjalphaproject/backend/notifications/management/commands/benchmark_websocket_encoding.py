@@ -0,0 +1,94 @@
+"""
+Compare websocket frame sizes and encode/decode cost for JSON and MessagePack.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.wire import decode_json, decode_msgpack, encode_json, encode_msgpack
+
+
+def sample_frames():
+    """Representative frames, shaped like the ones the consumers send"""
+    task_update = {
+        'type': 'task_update',
+        'data': {
+            'id': 4821,
+            'title': 'Prepare quarterly budget review',
+            'status': 'in_progress',
+            'priority': 'high',
+            'due_date': '2024-03-29',
+            'completion_percentage': 60,
+            'assigned_by': 'Priya Sharma',
+        },
+    }
+    attendance_update = {
+        'type': 'attendance_update',
+        'data': {
+            'id': 99812,
+            'date': '2024-03-18',
+            'status': 'present',
+            'check_in_time': '09:02:11',
+            'check_out_time': '18:07:45',
+            'hours_worked': 9.09,
+        },
+    }
+    notification = {
+        'type': 'new_notification',
+        'notification': {
+            'id': 150233,
+            'title': 'New Task Assigned',
+            'message': 'You have been assigned a new task: Prepare quarterly budget review',
+            'type': 'task',
+            'is_read': False,
+            'created_at': '2024-03-18T09:15:02.114000+00:00',
+            'action_url': '/tasks/4821',
+            'action_label': 'View Task',
+            'collapse_key': 'task:4821:assigned',
+            'collapse_count': 1,
+        },
+    }
+    return {
+        'task_update': task_update,
+        'attendance_update': attendance_update,
+        'new_notification': notification,
+        'unread_count': {'type': 'unread_count', 'count': 12},
+        'batch_of_50_task_updates': [task_update] * 50,
+    }
+
+
+def time_per_call(function, argument, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function(argument)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+class Command(BaseCommand):
+    help = 'Measure bytes on the wire and CPU per frame for JSON and MessagePack websocket encodings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000, help='Encode/decode calls timed per frame')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        self.stdout.write(
+            f"{'frame':<26}{'json B':>8}{'mpack B':>9}{'saved':>7}"
+            f"{'json enc us':>13}{'mpack enc us':>14}{'json dec us':>13}{'mpack dec us':>14}"
+        )
+
+        for name, payload in sample_frames().items():
+            json_frame = encode_json(payload)
+            msgpack_frame = encode_msgpack(payload)
+            json_bytes = len(json_frame.encode('utf-8'))
+            msgpack_bytes = len(msgpack_frame)
+            frame_iterations = max(iterations // (50 if isinstance(payload, list) else 1), 100)
+
+            self.stdout.write(
+                f"{name:<26}{json_bytes:>8}{msgpack_bytes:>9}{1 - msgpack_bytes / json_bytes:>7.0%}"
+                f"{time_per_call(encode_json, payload, frame_iterations):>13.2f}"
+                f"{time_per_call(encode_msgpack, payload, frame_iterations):>14.2f}"
+                f"{time_per_call(decode_json, json_frame, frame_iterations):>13.2f}"
+                f"{time_per_call(decode_msgpack, msgpack_frame, frame_iterations):>14.2f}"
+            )
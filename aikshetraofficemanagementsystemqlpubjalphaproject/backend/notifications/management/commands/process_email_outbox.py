@@ -0,0 +1,34 @@
+"""
+Send queued emails from the outbox.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Drain the email outbox, sending each batch over one SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Emails sent per SMTP connection')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            totals = drain_outbox(batch_size=options['batch_size'])
+            if any(totals.values()):
+                self.stdout.write(
+                    f"Sent {totals['sent']}, retrying {totals['retrying']}, failed {totals['failed']}"
+                )
+
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Email outbox drained'))
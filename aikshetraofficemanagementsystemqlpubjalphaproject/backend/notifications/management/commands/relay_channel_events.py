@@ -0,0 +1,34 @@
+"""
+Publish outboxed real-time events to the channel layer.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.events import relay_events
+
+
+class Command(BaseCommand):
+    help = 'Relay outboxed channel events to their groups in batches, in order per entity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Events claimed per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=1, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            totals = relay_events(batch_size=options['batch_size'])
+            if any(totals.values()):
+                self.stdout.write(
+                    f"Published {totals['published']}, retrying {totals['retrying']}, failed {totals['failed']}"
+                )
+
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Channel events relayed'))
@@ -0,0 +1,31 @@
+"""
+Send notification digest emails to users whose digest is due.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.digest import send_due_digests
+
+
+class Command(BaseCommand):
+    help = 'Email each due user one summary of their buffered notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep checking for due digests instead of exiting')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between checks with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            result = send_due_digests()
+            if result['users']:
+                self.stdout.write(f"Queued {result['users']} digests covering {result['items']} notifications")
+
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Notification digests sent'))
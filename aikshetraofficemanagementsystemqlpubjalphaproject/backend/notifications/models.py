@@ -49,9 +49,16 @@ class Notification(models.Model):
     is_sent = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
     
+    # Repeated events with the same key update the unread notification instead of adding one
+    collapse_key = models.CharField(max_length=200, blank=True, null=True, help_text="e.g. task:<id>:update")
+    collapse_count = models.PositiveIntegerField(default=1, help_text="Events collapsed into this notification")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Exposes mongo_* collection methods for stats aggregation and collapsing upserts
+    objects = djongo_models.DjongoManager()
+    
     class Meta:
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
@@ -73,9 +80,12 @@ class Notification(models.Model):
     def mark_as_read(self):
         """Mark notification as read"""
         if not self.is_read:
+            from .utils import record_notifications_read
+            
             self.is_read = True
             self.read_at = timezone.now()
             self.save()
+            record_notifications_read(self.recipient_id)
     
     def mark_as_sent(self):
         """Mark notification as sent"""
@@ -122,6 +132,15 @@ class NotificationPreference(models.Model):
     quiet_hours_start = models.TimeField(null=True, blank=True)
     quiet_hours_end = models.TimeField(null=True, blank=True)
     
+    # Email digests
+    EMAIL_FREQUENCY_CHOICES = [
+        ('immediate', 'Immediately'),
+        ('hourly', 'Hourly digest'),
+        ('daily', 'Daily digest'),
+    ]
+    email_frequency = models.CharField(max_length=10, choices=EMAIL_FREQUENCY_CHOICES, default='immediate')
+    last_digest_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -166,6 +185,97 @@ class NotificationPreference(models.Model):
         return True
 
 
+class BroadcastNotification(models.Model):
+    """
+    One notification shared by everyone with a role or in a department.
+    Stored once per audience; per-user read state lives in BroadcastReceipt.
+    MongoDB-compatible with djongo.
+    """
+    
+    AUDIENCE_CHOICES = [
+        ('role', 'Role'),
+        ('department', 'Department'),
+    ]
+    
+    audience_type = models.CharField(max_length=20, choices=AUDIENCE_CHOICES)
+    audience = models.CharField(max_length=50, help_text="Role or department name")
+    excluded_user_ids = djongo_models.JSONField(default=list, blank=True, help_text="Users in the audience who don't get it")
+    
+    # Notification content
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES, default='info')
+    data = djongo_models.JSONField(default=dict, blank=True, help_text="Additional data for the notification")
+    action_url = models.URLField(blank=True, help_text="URL to navigate when notification is clicked")
+    action_label = models.CharField(max_length=50, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Broadcast Notification'
+        verbose_name_plural = 'Broadcast Notifications'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.title} ({self.audience_type}: {self.audience})"
+    
+    def is_for_user(self, user):
+        """Check if a user is in this broadcast's audience"""
+        if str(user.id) in (self.excluded_user_ids or []):
+            return False
+        if self.audience_type == 'role':
+            return user.role == self.audience
+        return user.department == self.audience
+
+
+class BroadcastReceipt(models.Model):
+    """
+    Marks a broadcast notification as read by one user.
+    MongoDB-compatible with djongo.
+    """
+    
+    broadcast_id = models.CharField(max_length=24, help_text="ObjectId reference to BroadcastNotification")
+    user_id = models.CharField(max_length=24, help_text="ObjectId reference to User")
+    read_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = 'Broadcast Receipt'
+        verbose_name_plural = 'Broadcast Receipts'
+        unique_together = ['broadcast_id', 'user_id']
+    
+    def __str__(self):
+        return f"Broadcast {self.broadcast_id} read by user {self.user_id}"
+
+
+class DigestItem(models.Model):
+    """
+    Email-eligible notification buffered for a user's next digest.
+    MongoDB-compatible with djongo.
+    """
+    
+    user_id = models.CharField(max_length=24, help_text="ObjectId reference to User")
+    notification_id = models.CharField(max_length=24, blank=True, null=True, help_text="ObjectId reference to Notification")
+    
+    # Copied so a digest renders without loading the notifications
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, default='info')
+    action_url = models.URLField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    # Exposes mongo_* collection methods for aggregation and batch deletes
+    objects = djongo_models.DjongoManager()
+    
+    class Meta:
+        verbose_name = 'Digest Item'
+        verbose_name_plural = 'Digest Items'
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f"{self.title} (for user {self.user_id})"
+
+
 class SystemAnnouncement(models.Model):
     """
     System-wide announcements for all users.
@@ -254,3 +364,91 @@ class SystemAnnouncement(models.Model):
                 pass
         
         return True
+
+
+class OutboundEmail(models.Model):
+    """
+    Persistent email outbox.
+    Requests only insert rows here; the outbox worker sends them in batches over
+    one SMTP connection and retries failures with exponential backoff.
+    MongoDB-compatible with djongo.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = djongo_models.JSONField(default=list, help_text="List of recipient addresses")
+    
+    # Notifications marked as sent once the email is delivered (several for a digest)
+    notification_ids = djongo_models.JSONField(default=list, blank=True, help_text="ObjectId references to Notifications")
+    
+    # Delivery state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True, help_text="Worker batch currently sending this email")
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # Exposes mongo_* collection methods for atomic batch claims
+    objects = djongo_models.DjongoManager()
+    
+    class Meta:
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to or [])} ({self.status})"
+
+
+class ChannelEvent(models.Model):
+    """
+    Outbox of real-time events for the channel layer.
+    Signal handlers only insert rows here; the relay publishes them to their
+    channel groups in batches, in order per entity, retrying failures.
+    MongoDB-compatible with djongo.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('failed', 'Failed'),
+    ]
+    
+    group = models.CharField(max_length=100, help_text="Channel group the event is sent to")
+    message = djongo_models.JSONField(default=dict, help_text="group_send message, including its handler type")
+    entity_key = models.CharField(max_length=100, help_text="Events with the same key are published in order, e.g. task:<id>")
+    
+    # Delivery state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True, help_text="Relay batch currently publishing this event")
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    # Exposes mongo_* collection methods for atomic batch claims
+    objects = djongo_models.DjongoManager()
+    
+    class Meta:
+        verbose_name = 'Channel Event'
+        verbose_name_plural = 'Channel Events'
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f"{self.message.get('type', 'event')} -> {self.group} ({self.status})"
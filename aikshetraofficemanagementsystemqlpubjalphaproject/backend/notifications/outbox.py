@@ -0,0 +1,246 @@
+"""
+Persistent email outbox.
+Callers render and insert emails into the OutboundEmail collection and return
+immediately. The outbox worker claims due emails in batches, sends each batch
+over one reused SMTP connection, and records delivery state, retrying failures
+with exponential backoff.
+
+Delivery is at-least-once: a batch whose worker dies mid-send is reclaimed
+after its lease expires, so an email may occasionally be sent twice.
+
+For local testing point EMAIL_HOST/EMAIL_PORT at an SMTP stand-in such as
+`python -m aiosmtpd -n -l localhost:1025` and run `process_email_outbox`.
+"""
+
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from .models import Notification, OutboundEmail
+from .rendering import FanoutTemplate, render_email
+
+
+def _message(subject, text_body, html_body, recipient_list):
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=text_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=recipient_list,
+    )
+    message.attach_alternative(html_body, 'text/html')
+    return message
+
+
+def build_email(subject, template_name, context, recipient_list):
+    """Render an email template (HTML plus its .txt part) into a message"""
+    text_body, html_body = render_email(template_name, context)
+    return _message(subject, text_body, html_body, recipient_list)
+
+
+def build_fanout_emails(subject, template_name, shared_context, recipients, recipient_var='user'):
+    """
+    Render one email per recipient from a template pre-rendered with the shared context.
+    Each recipient is exposed to the template as `recipient_var`.
+    """
+    template = FanoutTemplate(template_name, shared_context, recipient_var)
+    messages = []
+    for recipient in recipients:
+        text_body, html_body = template.render_for(recipient)
+        messages.append(_message(subject, text_body, html_body, [recipient.email]))
+    return messages
+
+
+def enqueue_messages(messages, notification_ids=None):
+    """
+    Store email messages in the outbox with a single insert.
+    `notification_ids` optionally links each message to the Notification it
+    delivers, or to a list of them for a digest.
+    """
+    notification_ids = notification_ids or [None] * len(messages)
+    emails = []
+    for message, linked in zip(messages, notification_ids):
+        if not isinstance(linked, (list, tuple)):
+            linked = [linked] if linked else []
+        html_body = next(
+            (content for content, mimetype in getattr(message, 'alternatives', []) if mimetype == 'text/html'),
+            ''
+        )
+        emails.append(OutboundEmail(
+            subject=message.subject[:255],
+            body=message.body,
+            html_body=html_body,
+            from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(message.to),
+            notification_ids=[str(notification_id) for notification_id in linked],
+        ))
+
+    if emails:
+        OutboundEmail.objects.bulk_create(emails)
+        schedule_drain()
+    return emails
+
+
+def enqueue_email(subject, template_name, context, recipient_list, notification=None):
+    """Render a template email and store it in the outbox"""
+    message = build_email(subject, template_name, context, recipient_list)
+    notification_ids = [notification.id] if notification else None
+    return enqueue_messages([message], notification_ids)[0]
+
+
+def _to_message(email):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at EMAIL_OUTBOX_MAX_RETRY_DELAY"""
+    delay = min(settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.EMAIL_OUTBOX_MAX_RETRY_DELAY)
+    return timedelta(seconds=delay * random.uniform(1.0, 1.1))
+
+
+def claim_batch(batch_size):
+    """
+    Atomically claim up to `batch_size` due emails for this worker.
+    Returns (claim_token, emails).
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = {'$or': [
+        {'status': 'pending', 'next_attempt_at': {'$lte': now}},
+        # Batches whose worker died before recording a result
+        {'status': 'sending', 'claimed_until': {'$lt': now}},
+    ]}
+
+    cursor = OutboundEmail.objects.mongo_find(due, {'id': 1}).sort('next_attempt_at', 1).limit(batch_size)
+    email_ids = [row['id'] for row in cursor]
+    if not email_ids:
+        return token, []
+
+    # Re-checking `due` in the update means concurrent workers never claim the same email
+    OutboundEmail.objects.mongo_update_many(
+        {'id': {'$in': email_ids}, **due},
+        {'$set': {
+            'status': 'sending',
+            'claimed_by': token,
+            'claimed_until': now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+            'updated_at': now,
+        }}
+    )
+    return token, list(OutboundEmail.objects.filter(claimed_by=token, status='sending'))
+
+
+def _record_failure(email, token, error):
+    attempts = email.attempts + 1
+    now = timezone.now()
+    changes = {'attempts': attempts, 'last_error': error[:2000], 'updated_at': now}
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        changes['status'] = 'failed'
+    else:
+        changes['status'] = 'pending'
+        changes['next_attempt_at'] = now + retry_delay(attempts)
+    OutboundEmail.objects.mongo_update_one({'id': email.id, 'claimed_by': token}, {'$set': changes})
+    return changes['status']
+
+
+def send_batch(token, emails):
+    """
+    Send claimed emails over a single SMTP connection.
+    Returns {'sent': n, 'retrying': n, 'failed': n}.
+    """
+    result = {'sent': 0, 'retrying': 0, 'failed': 0}
+    if not emails:
+        return result
+
+    def failed(email, error):
+        status = _record_failure(email, token, error)
+        result['failed' if status == 'failed' else 'retrying'] += 1
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            failed(email, f'Could not connect to mail server: {str(e)}')
+        return result
+
+    sent_ids = []
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([_to_message(email)])
+                sent_ids.append(email.id)
+            except Exception as e:
+                failed(email, str(e))
+                # A failed send can leave the SMTP session unusable
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception as reconnect_error:
+                    for remaining in emails[emails.index(email) + 1:]:
+                        failed(remaining, f'Could not reconnect to mail server: {str(reconnect_error)}')
+                    break
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    if sent_ids:
+        now = timezone.now()
+        OutboundEmail.objects.mongo_update_many(
+            {'id': {'$in': sent_ids}, 'claimed_by': token},
+            {'$set': {'status': 'sent', 'sent_at': now, 'last_error': '', 'updated_at': now}, '$inc': {'attempts': 1}}
+        )
+        notification_ids = [
+            notification_id
+            for email in emails if email.id in sent_ids
+            for notification_id in email.notification_ids or []
+        ]
+        if notification_ids:
+            Notification.objects.filter(id__in=notification_ids, is_sent=False).update(is_sent=True, sent_at=now)
+        result['sent'] = len(sent_ids)
+    return result
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """
+    Send due emails until the outbox has none left (or `max_batches` is reached).
+    Returns totals of sent, retrying and failed emails.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        token, emails = claim_batch(batch_size)
+        if not emails:
+            break
+        for key, count in send_batch(token, emails).items():
+            totals[key] += count
+        batches += 1
+
+    return totals
+
+
+def schedule_drain():
+    """
+    Queue an outbox drain on the job queue.
+    A drain that is already waiting to start is reused, so bursts of enqueues
+    share one run.
+    """
+    if not settings.EMAIL_OUTBOX_DRAIN_ON_ENQUEUE:
+        return None
+
+    from .jobs import drain_email_outbox
+    return drain_email_outbox.delay()
@@ -0,0 +1,215 @@
+"""
+Compact notification preference masks.
+Each user's channel and per-type flags, digest cadence and quiet-hours window
+are packed into one integer, so delivery checks are bit operations instead of
+preference document reads. Masks are cached per process; saving a preference
+publishes the change through the cache so other processes drop their copy.
+
+Layout, from the lowest bit:
+    channel flags   3 channels x (enabled + 5 types)    bits 0-17
+    quiet hours     enabled                             bit 18
+    email cadence   EMAIL_FREQUENCY_CHOICES index       bits 19-20
+    quiet start     minutes after midnight              bits 21-31
+    quiet end       minutes after midnight              bits 32-42
+"""
+
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from office_management.change_log import ChangeLog
+
+
+# Beyond this many missed changes it is cheaper to drop every cached mask
+MAX_REPLAYED_CHANGES = 500
+# Cached masks per process before the cache is emptied and refilled on demand
+MAX_CACHED_MASKS = 100000
+
+CHANNELS = ['email', 'push', 'inapp']
+# Notification types with their own flag; other types only need the channel enabled
+TYPE_FLAGS = {
+    'task': 'task_updates',
+    'attendance': 'attendance_reminders',
+    'salary': 'salary_updates',
+    'learning': 'learning_updates',
+    'system': 'system_updates',
+}
+FLAGS_PER_CHANNEL = 1 + len(TYPE_FLAGS)
+
+QUIET_HOURS_BIT = len(CHANNELS) * FLAGS_PER_CHANNEL
+FREQUENCY_SHIFT = QUIET_HOURS_BIT + 1
+FREQUENCY_BITS = 0b11
+QUIET_START_SHIFT = FREQUENCY_SHIFT + 2
+QUIET_END_SHIFT = QUIET_START_SHIFT + 11
+MINUTES_BITS = 0x7ff
+
+FREQUENCIES = ['immediate', 'hourly', 'daily']
+
+
+def _flag_bit(channel, notification_type=None):
+    offset = CHANNELS.index(channel) * FLAGS_PER_CHANNEL
+    if notification_type is None:
+        return 1 << offset
+    return 1 << (offset + 1 + list(TYPE_FLAGS).index(notification_type))
+
+
+def required_bits(notification_type, channel):
+    """Bits a mask must have set for this notification type on this channel"""
+    bits = _flag_bit(channel)
+    if notification_type in TYPE_FLAGS:
+        bits |= _flag_bit(channel, notification_type)
+    return bits
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def pack_preference(preference):
+    """Pack a NotificationPreference into its integer mask"""
+    mask = 0
+    for channel in CHANNELS:
+        if getattr(preference, f'{channel}_enabled'):
+            mask |= _flag_bit(channel)
+        for notification_type, flag in TYPE_FLAGS.items():
+            if getattr(preference, f'{channel}_{flag}'):
+                mask |= _flag_bit(channel, notification_type)
+
+    if preference.quiet_hours_enabled and preference.quiet_hours_start and preference.quiet_hours_end:
+        mask |= 1 << QUIET_HOURS_BIT
+        mask |= _minutes(preference.quiet_hours_start) << QUIET_START_SHIFT
+        mask |= _minutes(preference.quiet_hours_end) << QUIET_END_SHIFT
+
+    frequency = FREQUENCIES.index(preference.email_frequency) if preference.email_frequency in FREQUENCIES else 0
+    mask |= frequency << FREQUENCY_SHIFT
+    return mask
+
+
+def allows(mask, notification_type, channel):
+    """Check a mask allows a notification type on a channel"""
+    bits = required_bits(notification_type, channel)
+    return mask & bits == bits
+
+
+def email_frequency(mask):
+    return FREQUENCIES[(mask >> FREQUENCY_SHIFT) & FREQUENCY_BITS]
+
+
+def is_quiet(mask, now=None):
+    """Check a mask's quiet hours are in effect (ranges may span midnight)"""
+    if not mask & (1 << QUIET_HOURS_BIT):
+        return False
+
+    local = timezone.localtime(now or timezone.now())
+    current = local.hour * 60 + local.minute
+    start = (mask >> QUIET_START_SHIFT) & MINUTES_BITS
+    end = (mask >> QUIET_END_SHIFT) & MINUTES_BITS
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+def is_digest_due(mask, last_digest_at, now=None):
+    """Check a user's buffered notifications should be emailed now"""
+    now = now or timezone.now()
+    if is_quiet(mask, now):
+        return False
+    frequency = email_frequency(mask)
+    if frequency == 'immediate' or not last_digest_at:
+        return True
+
+    interval = settings.NOTIFICATION_DIGEST_INTERVALS.get(frequency, 60)
+    return now - last_digest_at >= timedelta(minutes=interval)
+
+
+def _default_mask():
+    from .models import NotificationPreference
+
+    # An unsaved preference carries the model defaults
+    return pack_preference(NotificationPreference())
+
+
+class PreferenceMaskCache:
+    """
+    Per-process cache of preference masks keyed by user id.
+    Kept current with a version counter and change log in the shared cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._masks = {}
+        self._version = None
+        self._default = None
+        self._changes = ChangeLog(
+            'notification_preference_version', 'notification_preference_change:{}', MAX_REPLAYED_CHANGES
+        )
+
+    @property
+    def default_mask(self):
+        if self._default is None:
+            self._default = _default_mask()
+        return self._default
+
+    def _ensure_current(self):
+        version, changed = self._changes.changes_since(self._version)
+        if changed is None:
+            self._masks = {}
+        else:
+            for user_id in changed:
+                self._masks.pop(user_id, None)
+        self._version = version
+
+    def _load(self, user_ids):
+        from .models import NotificationPreference
+
+        masks = dict.fromkeys(user_ids, self.default_mask)
+        for preference in NotificationPreference.objects.filter(user_id__in=user_ids):
+            masks[preference.user_id] = pack_preference(preference)
+        return masks
+
+    def get_many(self, user_ids):
+        """Masks for many users, loading uncached ones with a single query"""
+        user_ids = [str(user_id) for user_id in user_ids]
+        with self._lock:
+            self._ensure_current()
+            version = self._version
+            masks = {user_id: self._masks[user_id] for user_id in user_ids if user_id in self._masks}
+
+        missing = [user_id for user_id in set(user_ids) if user_id not in masks]
+        if missing:
+            loaded = self._load(missing)
+            masks.update(loaded)
+            with self._lock:
+                if self._version != version:
+                    # A preference changed while loading; don't cache what may be stale
+                    return masks
+                if len(self._masks) + len(loaded) > MAX_CACHED_MASKS:
+                    self._masks = {}
+                self._masks.update(loaded)
+        return masks
+
+    def get(self, user_id):
+        return self.get_many([user_id])[str(user_id)]
+
+    def filter_allowed(self, user_ids, notification_type, channel):
+        """The user ids whose preferences allow a notification type on a channel"""
+        bits = required_bits(notification_type, channel)
+        masks = self.get_many(user_ids)
+        return [user_id for user_id in user_ids if masks[str(user_id)] & bits == bits]
+
+    def invalidate(self, user_id):
+        """Drop a user's mask here and in every other process"""
+        user_id = str(user_id)
+        with self._lock:
+            version = self._changes.publish(user_id)
+            self._masks.pop(user_id, None)
+            if self._changes.follows(self._version, version):
+                self._version = version
+            else:
+                # Missed another process' change, resync on next use
+                self._version = None
+
+
+preference_masks = PreferenceMaskCache()
@@ -0,0 +1,174 @@
+"""
+Email rendering with compiled-template caching and fan-out splitting.
+
+Each email template has an HTML part (`emails/x.html`) and a plain-text part
+(`emails/x.txt`), so the text alternative is rendered from its own compiled
+template instead of running strip_tags over the HTML for every message.
+
+For fan-out, a template is rendered once with the shared context and the
+recipient replaced by a placeholder whose attributes render as sentinels. The
+output is split on the sentinels into static segments, and each recipient's
+email is just the segments joined with that recipient's escaped values.
+Recipient values must therefore only be output (`{{ user.first_name }}`).
+Templates that branch on them or transform them are detected and fall back to
+a full render per recipient.
+"""
+
+import re
+import uuid
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import conditional_escape, strip_tags
+
+
+_template_cache = {}
+
+
+def _get_template(name):
+    """Compiled template, cached for the life of the process outside DEBUG"""
+    template = _template_cache.get(name)
+    if template is None:
+        template = get_template(name)
+        if not settings.DEBUG:
+            _template_cache[name] = template
+    return template
+
+
+def _text_template_name(html_template_name):
+    return re.sub(r'\.html$', '.txt', html_template_name)
+
+
+def render_email(template_name, context):
+    """
+    Render one email.
+    Returns (text_body, html_body).
+    """
+    html_body = _get_template(template_name).render(context)
+    try:
+        text_body = _get_template(_text_template_name(template_name)).render(context)
+    except TemplateDoesNotExist:
+        text_body = strip_tags(html_body)
+    return text_body.strip() + '\n', html_body
+
+
+class _RecipientPlaceholder:
+    """
+    Stands in for the recipient while rendering shared parts.
+    Every attribute renders as a sentinel naming the attribute path.
+    """
+
+    def __init__(self, fanout, path=()):
+        self._fanout = fanout
+        self._path = path
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _RecipientPlaceholder(self._fanout, self._path + (name,))
+
+    def __str__(self):
+        return self._fanout.sentinel(self._path)
+
+    __html__ = __str__
+
+    def _used_in_logic(self, *args):
+        # Branching or comparing on a recipient value can't be pre-rendered
+        self._fanout.is_splittable = False
+        return True
+
+    __bool__ = __eq__ = __ne__ = __lt__ = __gt__ = __contains__ = _used_in_logic
+    __hash__ = object.__hash__
+
+    def __len__(self):
+        self._fanout.is_splittable = False
+        return 1
+
+    def __iter__(self):
+        self._fanout.is_splittable = False
+        return iter(())
+
+
+class FanoutTemplate:
+    """
+    An email template pre-rendered with a shared context and split into static
+    segments and recipient attribute paths.
+    """
+
+    def __init__(self, template_name, shared_context, recipient_var='user'):
+        self.template_name = template_name
+        self.shared_context = dict(shared_context)
+        self.recipient_var = recipient_var
+
+        self._token = uuid.uuid4().hex
+        self._paths = []
+        self._pattern = re.compile(rf'RCPT{self._token}N(\d+)E')
+        self._verified = False
+        self.is_splittable = True
+
+        context = dict(shared_context)
+        context[recipient_var] = _RecipientPlaceholder(self)
+        text_body, html_body = render_email(template_name, context)
+
+        self.text_parts = self._split(text_body)
+        self.html_parts = self._split(html_body)
+        # Sentinels altered by filters can't be substituted safely
+        if not (self._intact(text_body) and self._intact(html_body)):
+            self.is_splittable = False
+
+    def sentinel(self, path):
+        if path not in self._paths:
+            self._paths.append(path)
+        return f'RCPT{self._token}N{self._paths.index(path)}E'
+
+    def _split(self, body):
+        parts = self._pattern.split(body)
+        # Odd positions hold sentinel indexes
+        return [part if i % 2 == 0 else self._paths[int(part)] for i, part in enumerate(parts)]
+
+    def _intact(self, body):
+        leftover = self._pattern.sub('', body)
+        return self._token not in leftover.lower()
+
+    @staticmethod
+    def _resolve(recipient, path):
+        value = recipient
+        for name in path:
+            value = getattr(value, name, '')
+            if callable(value):
+                value = value()
+        return '' if value is None else value
+
+    def _join(self, parts, recipient, escape):
+        output = []
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                output.append(part)
+            else:
+                value = self._resolve(recipient, part)
+                output.append(str(conditional_escape(value)) if escape else str(value))
+        return ''.join(output)
+
+    def _render_full(self, recipient):
+        context = dict(self.shared_context)
+        context[self.recipient_var] = recipient
+        return render_email(self.template_name, context)
+
+    def render_for(self, recipient):
+        """Returns (text_body, html_body) for one recipient"""
+        if not self.is_splittable:
+            return self._render_full(recipient)
+
+        bodies = self._join(self.text_parts, recipient, escape=False), self._join(self.html_parts, recipient, escape=True)
+        if not self._verified:
+            # Check the split output once against a real render (catches filters like truncatechars)
+            full = self._render_full(recipient)
+            self._verified = True
+            if full != bodies:
+                self.is_splittable = False
+                return full
+        return bodies
@@ -3,7 +3,7 @@ Serializers for notification management.
 """
 
 from rest_framework import serializers
-from .models import Notification, NotificationPreference, SystemAnnouncement
+from .models import BroadcastNotification, Notification, NotificationPreference, SystemAnnouncement
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -15,13 +15,40 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['recipient', 'is_sent', 'sent_at']
 
 
+class BroadcastNotificationSerializer(serializers.ModelSerializer):
+    """Serializer for role and department broadcasts, with the viewer's read state"""
+    
+    is_read = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = BroadcastNotification
+        exclude = ['excluded_user_ids']
+    
+    def get_is_read(self, obj):
+        return str(obj.id) in self.context.get('read_ids', ())
+
+
+class NotificationReadSerializer(serializers.Serializer):
+    """Selects the notifications a bulk mark-read applies to"""
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    before = serializers.DateTimeField(required=False)
+    notification_type = serializers.ChoiceField(choices=Notification.TYPE_CHOICES, required=False)
+    all = serializers.BooleanField(required=False, default=False)
+    
+    def validate(self, attrs):
+        if not attrs.get('all') and not any(field in attrs for field in ('ids', 'before', 'notification_type')):
+            raise serializers.ValidationError('Provide ids, before or notification_type, or set all')
+        return attrs
+
+
 class NotificationPreferenceSerializer(serializers.ModelSerializer):
     """Serializer for notification preferences"""
     
     class Meta:
         model = NotificationPreference
         fields = '__all__'
-        read_only_fields = ['user']
+        read_only_fields = ['user', 'last_digest_at']
 
 
 class SystemAnnouncementSerializer(serializers.ModelSerializer):
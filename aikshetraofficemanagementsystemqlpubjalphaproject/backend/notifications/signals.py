@@ -1,19 +1,24 @@
 """
 Django signals for real-time notifications.
+Channel sends are recorded in the event outbox and published by its relay, so
+saves never wait on the channel layer.
 """
 
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-import json
 
-from .models import Notification, SystemAnnouncement
-from tasks.models import Task
+from .models import Notification, NotificationPreference, SystemAnnouncement
+from .events import enqueue_event, enqueue_events
+from .preferences import preference_masks
+from .utils import (
+    create_notification, invalidate_notification_stats, notification_event, record_notifications_created,
+    unread_count_event
+)
+from django.contrib.auth import get_user_model
+from tasks.models import Task, TaskComment
 from attendance.models import AttendanceRecord, LeaveRequest
 
-
-channel_layer = get_channel_layer()
+User = get_user_model()
 
 
 @receiver(post_save, sender=Notification)
@@ -22,41 +27,10 @@ def notification_created(sender, instance, created, **kwargs):
     Send real-time notification when a new notification is created.
     """
     if created:
-        # Send to user's notification group
-        user_group_name = f'user_{instance.recipient.id}'
-        
-        notification_data = {
-            'id': instance.id,
-            'title': instance.title,
-            'message': instance.message,
-            'type': instance.notification_type,
-            'is_read': instance.is_read,
-            'created_at': instance.created_at.isoformat(),
-            'action_url': instance.action_url,
-            'action_label': instance.action_label,
-        }
-        
-        async_to_sync(channel_layer.group_send)(
-            user_group_name,
-            {
-                'type': 'notification_message',
-                'notification': notification_data
-            }
-        )
-        
-        # Update unread count
-        unread_count = Notification.objects.filter(
-            recipient=instance.recipient,
-            is_read=False
-        ).count()
+        record_notifications_created([instance])
         
-        async_to_sync(channel_layer.group_send)(
-            user_group_name,
-            {
-                'type': 'unread_count_update',
-                'count': unread_count
-            }
-        )
+        # Send to user's notification group, followed by the new unread count
+        enqueue_events([notification_event(instance), unread_count_event(instance.recipient_id)])
 
 
 @receiver(post_save, sender=Task)
@@ -64,7 +38,8 @@ def task_updated(sender, instance, created, **kwargs):
     """
     Send real-time update when a task is created or updated.
     """
-    task_group_name = f'tasks_{instance.assigned_to.id}'
+    task_group_name = f'tasks_{instance.assigned_to_id}'
+    assigned_by = instance.get_assigned_by()
     
     task_data = {
         'id': instance.id,
@@ -73,36 +48,78 @@ def task_updated(sender, instance, created, **kwargs):
         'priority': instance.priority,
         'due_date': instance.due_date.isoformat(),
         'completion_percentage': instance.completion_percentage,
-        'assigned_by': instance.assigned_by.get_full_name() if instance.assigned_by else None,
+        'assigned_by': assigned_by.get_full_name() if assigned_by else None,
     }
     
+    enqueue_event(
+        task_group_name,
+        {
+            # New task assigned, or task updated
+            'type': 'task_assigned' if created else 'task_update',
+            'data': task_data
+        },
+        f'task:{instance.id}'
+    )
+    
     if created:
-        # New task assigned
-        async_to_sync(channel_layer.group_send)(
-            task_group_name,
-            {
-                'type': 'task_assigned',
-                'data': task_data
-            }
-        )
-        
         # Create notification for task assignment
-        Notification.objects.create(
-            recipient=instance.assigned_to,
-            title='New Task Assigned',
-            message=f'You have been assigned a new task: {instance.title}',
+        assigned_to = instance.get_assigned_to()
+        if assigned_to:
+            create_notification(
+                assigned_to,
+                title='New Task Assigned',
+                message=f'You have been assigned a new task: {instance.title}',
+                notification_type='task',
+                action_url=f'/tasks/{instance.id}',
+                action_label='View Task'
+            )
+    
+    elif getattr(instance, '_loaded_status', None) not in (None, instance.status):
+        # Status changes repeat, so each assigner keeps one unread notice per task
+        if assigned_by and str(assigned_by.id) != instance.assigned_to_id:
+            create_notification(
+                assigned_by,
+                title='Task Status Changed',
+                message=f'Task "{instance.title}" is now {instance.get_status_display()}',
+                notification_type='task',
+                action_url=f'/tasks/{instance.id}',
+                action_label='View Task',
+                collapse_key=f'task:{instance.id}:status'
+            )
+    instance._loaded_status = instance.status
+
+
+@receiver(post_init, sender=Task)
+def task_loaded(sender, instance, **kwargs):
+    """Remember the stored status so saves can tell when it changed"""
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=TaskComment)
+def task_comment_created(sender, instance, created, **kwargs):
+    """
+    Tell a task's assignee and assigner about new comments, one unread notice
+    per task that counts the comments since they last read it.
+    """
+    if not created:
+        return
+    
+    task = instance.get_task()
+    if not task:
+        return
+    
+    author = instance.get_user()
+    author_name = author.get_full_name() if author else 'Someone'
+    recipient_ids = {task.assigned_to_id, task.assigned_by_id} - {None, '', str(instance.user_id)}
+    for recipient in User.objects.filter(id__in=list(recipient_ids)):
+        create_notification(
+            recipient,
+            title='New Comment',
+            message=f'{author_name} commented on "{task.title}"',
             notification_type='task',
-            action_url=f'/tasks/{instance.id}',
-            action_label='View Task'
-        )
-    else:
-        # Task updated
-        async_to_sync(channel_layer.group_send)(
-            task_group_name,
-            {
-                'type': 'task_update',
-                'data': task_data
-            }
+            action_url=f'/tasks/{task.id}',
+            action_label='View Task',
+            collapse_key=f'task:{task.id}:comments'
         )
 
 
@@ -111,7 +128,7 @@ def attendance_updated(sender, instance, created, **kwargs):
     """
     Send real-time update when attendance is recorded.
     """
-    attendance_group_name = f'attendance_{instance.user.id}'
+    attendance_group_name = f'attendance_{instance.user_id}'
     
     attendance_data = {
         'id': instance.id,
@@ -122,12 +139,13 @@ def attendance_updated(sender, instance, created, **kwargs):
         'hours_worked': float(instance.hours_worked),
     }
     
-    async_to_sync(channel_layer.group_send)(
+    enqueue_event(
         attendance_group_name,
         {
             'type': 'attendance_update',
             'data': attendance_data
-        }
+        },
+        f'attendance:{instance.id}'
     )
 
 
@@ -140,14 +158,17 @@ def leave_request_updated(sender, instance, created, **kwargs):
         # Notify employee about leave request decision
         status_text = 'approved' if instance.status == 'approved' else 'rejected'
         
-        Notification.objects.create(
-            recipient=instance.user,
-            title=f'Leave Request {status_text.title()}',
-            message=f'Your leave request from {instance.start_date} to {instance.end_date} has been {status_text}.',
-            notification_type='info',
-            action_url='/employee/leave-requests',
-            action_label='View Leave Requests'
-        )
+        user = instance.get_user()
+        if user:
+            create_notification(
+                user,
+                title=f'Leave Request {status_text.title()}',
+                message=f'Your leave request from {instance.start_date} to {instance.end_date} has been {status_text}.',
+                notification_type='info',
+                action_url='/employee/leave-requests',
+                action_label='View Leave Requests',
+                collapse_key=f'leave:{instance.id}:status'
+            )
 
 
 @receiver(post_save, sender=SystemAnnouncement)
@@ -164,10 +185,28 @@ def system_announcement_created(sender, instance, created, **kwargs):
             'created_at': instance.created_at.isoformat(),
         }
         
-        async_to_sync(channel_layer.group_send)(
+        enqueue_event(
             'system_announcements',
             {
                 'type': 'system_announcement',
                 'data': announcement_data
-            }
+            },
+            f'announcement:{instance.id}'
         )
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    """
+    Drop the recipient's cached stats after a notification is deleted.
+    """
+    invalidate_notification_stats([instance.recipient_id])
+
+
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def notification_preference_changed(sender, instance, **kwargs):
+    """
+    Drop the cached preference mask in every process.
+    """
+    preference_masks.invalidate(instance.user_id)
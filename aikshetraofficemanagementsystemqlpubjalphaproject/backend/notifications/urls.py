@@ -7,7 +7,11 @@ from . import views
 
 urlpatterns = [
     path('', views.NotificationListView.as_view(), name='notification_list'),
+    path('read/', views.mark_notifications_read_bulk, name='mark_notifications_read_bulk'),
     path('<int:pk>/read/', views.mark_notification_read, name='mark_notification_read'),
+    path('broadcasts/', views.broadcast_list, name='broadcast_list'),
+    path('broadcasts/<int:pk>/read/', views.mark_broadcast_read, name='mark_broadcast_read'),
+    path('stats/', views.notification_stats, name='notification_stats'),
     path('preferences/', views.NotificationPreferenceView.as_view(), name='notification_preferences'),
     path('announcements/', views.SystemAnnouncementListCreateView.as_view(), name='system_announcements'),
 ]
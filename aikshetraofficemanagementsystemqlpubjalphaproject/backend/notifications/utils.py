@@ -2,42 +2,171 @@
 Utility functions for notification management.
 """
 
-from .models import Notification, NotificationPreference
-from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
+from collections import defaultdict
+from datetime import timedelta
+
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.utils import timezone
+from pymongo import ASCENDING, ReturnDocument
+
+from .broadcast import broadcast_counts, create_broadcast, mark_all_broadcasts_read
+from .digest import buffer_notifications, should_buffer
+from .events import enqueue_event, enqueue_events
+from .models import Notification
+from .outbox import build_fanout_emails, enqueue_email, enqueue_messages
+from .preferences import allows, preference_masks
+from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+_indexes_ensured = False
+
+
+def ensure_indexes():
+    """
+    One unread notification per recipient and collapse key, so concurrent
+    events with the same key can't both insert.
+    """
+    global _indexes_ensured
+    
+    Notification.objects.mongo_create_index(
+        [('recipient_id', ASCENDING), ('collapse_key', ASCENDING)],
+        unique=True,
+        partialFilterExpression={'is_read': False, 'collapse_key': {'$type': 'string'}}
+    )
+    _indexes_ensured = True
+
+
 def create_notification(recipient, title, message, notification_type='info', 
-                       action_url='', action_label='', data=None):
+                       action_url='', action_label='', data=None, collapse_key=None):
     """
     Create a new notification for a user.
+    With a collapse_key, an unread notification with the same key is updated
+    in place (count and timestamp bumped) instead of adding another one.
     """
-    return Notification.objects.create(
-        recipient=recipient,
-        title=title,
-        message=message,
-        notification_type=notification_type,
-        action_url=action_url,
-        action_label=action_label,
-        data=data or {}
+    fields = {
+        'recipient_id': str(recipient.id),
+        'title': title,
+        'message': message,
+        'notification_type': notification_type,
+        'action_url': action_url,
+        'action_label': action_label,
+        'data': data or {},
+        'collapse_key': collapse_key,
+    }
+    if not collapse_key:
+        return Notification.objects.create(**fields)
+    
+    if not _indexes_ensured:
+        ensure_indexes()
+    
+    collapse_args = (recipient, collapse_key, title, message, notification_type, action_url, action_label, data)
+    notification = collapse_notification(*collapse_args)
+    if notification:
+        return notification
+    
+    try:
+        return Notification.objects.create(**fields)
+    except IntegrityError:
+        # An event with the same key inserted first; fold into its notification
+        notification = collapse_notification(*collapse_args)
+        if notification:
+            return notification
+        raise
+
+
+def collapse_notification(recipient, collapse_key, title, message, notification_type='info',
+                          action_url='', action_label='', data=None):
+    """
+    Fold a repeated event into the recipient's unread notification with the same key.
+    Returns the updated notification, or None when there is nothing to collapse into.
+    """
+    user_id = str(recipient.id)
+    now = timezone.now()
+    previous = Notification.objects.mongo_find_one_and_update(
+        {'recipient_id': user_id, 'collapse_key': collapse_key, 'is_read': False},
+        {
+            '$set': {
+                'title': title,
+                'message': message,
+                'notification_type': notification_type,
+                'action_url': action_url,
+                'action_label': action_label,
+                'data': data or {},
+                'created_at': now,
+                'updated_at': now,
+            },
+            '$inc': {'collapse_count': 1},
+        },
+        return_document=ReturnDocument.BEFORE
     )
+    if not previous:
+        return None
+    
+    if previous['notification_type'] != notification_type:
+        _adjust_stats({
+            (user_id, f"type:{previous['notification_type']}"): -1,
+            (user_id, f'type:{notification_type}'): 1,
+        })
+    
+    notification = Notification.objects.get(id=previous['id'])
+    publish_notification(notification, 'notification_updated')
+    return notification
+
+
+def notification_event_data(notification):
+    """Websocket payload for a notification"""
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.notification_type,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+        'action_url': notification.action_url,
+        'action_label': notification.action_label,
+        'collapse_key': notification.collapse_key,
+        'collapse_count': notification.collapse_count,
+    }
+
+
+def notification_event(notification, event_type='notification_message'):
+    """Outbox event for a new (notification_message) or updated (notification_updated) notification"""
+    return (
+        f'user_{notification.recipient_id}',
+        {
+            'type': event_type,
+            'notification': notification_event_data(notification)
+        },
+        f'user:{notification.recipient_id}'
+    )
+
+
+def publish_notification(notification, event_type='notification_message'):
+    """Push a notification to the recipient's sockets through the event outbox"""
+    return enqueue_event(*notification_event(notification, event_type))
 
 
 def create_bulk_notifications(recipients, title, message, notification_type='info',
                             action_url='', action_label='', data=None):
     """
-    Create notifications for multiple users.
+    Create notifications for the users whose preferences allow in-app delivery.
     """
+    recipients = list(recipients)
+    allowed_ids = set(preference_masks.filter_allowed(
+        [str(recipient.id) for recipient in recipients], notification_type, 'inapp'
+    ))
+    
     notifications = []
     for recipient in recipients:
+        if str(recipient.id) not in allowed_ids:
+            continue
         notifications.append(
             Notification(
-                recipient=recipient,
+                recipient_id=str(recipient.id),
                 title=title,
                 message=message,
                 notification_type=notification_type,
@@ -47,16 +176,17 @@ def create_bulk_notifications(recipients, title, message, notification_type='inf
             )
         )
     
-    return Notification.objects.bulk_create(notifications)
+    created = Notification.objects.bulk_create(notifications)
+    record_notifications_created(created)
+    return created
 
 
 def notify_admins(title, message, notification_type='system', action_url='', action_label=''):
     """
     Send notification to all admin users.
     """
-    admin_users = User.objects.filter(role='admin', is_active=True)
-    return create_bulk_notifications(
-        recipients=admin_users,
+    return notify_role(
+        'admin',
         title=title,
         message=message,
         notification_type=notification_type,
@@ -69,23 +199,18 @@ def notify_department(department_name, title, message, notification_type='info',
                      action_url='', action_label='', exclude_user=None):
     """
     Send notification to all users in a department.
+    Stored once as a broadcast and pushed with a single group_send; in-app only.
+    Returns the BroadcastNotification.
     """
-    users = User.objects.filter(
-        department=department_name,
-        is_active=True,
-        is_approved=True
-    )
-    
-    if exclude_user:
-        users = users.exclude(id=exclude_user.id)
-    
-    return create_bulk_notifications(
-        recipients=users,
+    return create_broadcast(
+        'department',
+        department_name,
         title=title,
         message=message,
         notification_type=notification_type,
         action_url=action_url,
-        action_label=action_label
+        action_label=action_label,
+        exclude_user=exclude_user
     )
 
 
@@ -93,68 +218,105 @@ def notify_role(role, title, message, notification_type='info',
                action_url='', action_label='', exclude_user=None):
     """
     Send notification to all users with a specific role.
+    Stored once as a broadcast and pushed with a single group_send; in-app only.
+    Returns the BroadcastNotification.
     """
-    users = User.objects.filter(
-        role=role,
-        is_active=True,
-        is_approved=True
-    )
-    
-    if exclude_user:
-        users = users.exclude(id=exclude_user.id)
-    
-    return create_bulk_notifications(
-        recipients=users,
+    return create_broadcast(
+        'role',
+        role,
         title=title,
         message=message,
         notification_type=notification_type,
         action_url=action_url,
-        action_label=action_label
+        action_label=action_label,
+        exclude_user=exclude_user
     )
 
 
 def send_email_notification(notification):
     """
-    Send email notification if user preferences allow it.
+    Queue an email for a notification if user preferences allow it.
+    Users on a digest cadence or in quiet hours get it in their next digest.
+    The notification is marked as sent once the outbox delivers the email.
     """
     try:
-        preferences = notification.recipient.notification_preferences
+        recipient = notification.get_recipient()
+        if not recipient:
+            return False
         
         # Check if email notifications are enabled
-        if not preferences.should_send_notification(
-            notification.notification_type, 
-            'email'
-        ):
+        mask = preference_masks.get(recipient.id)
+        if not allows(mask, notification.notification_type, 'email'):
             return False
         
+        if should_buffer(mask):
+            buffer_notifications([(notification, recipient)])
+            return True
+        
         subject = f"[Office Management] {notification.title}"
         
         context = {
             'notification': notification,
-            'user': notification.recipient,
+            'user': recipient,
             'action_url': notification.action_url,
         }
         
-        html_message = render_to_string('emails/notification.html', context)
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[notification.recipient.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        
-        notification.mark_as_sent()
+        enqueue_email(subject, 'emails/notification.html', context, [recipient.email], notification=notification)
         return True
         
     except Exception as e:
-        print(f"Failed to send email notification: {str(e)}")
+        print(f"Failed to queue email notification: {str(e)}")
         return False
 
 
+def send_bulk_email_notifications(notifications):
+    """
+    Queue emails for many notifications at once.
+    Notifications with the same content share one pre-rendered template that
+    only has each recipient's details filled in. Notifications for users on a
+    digest cadence or in quiet hours are buffered for their next digest.
+    Returns the number of queued emails.
+    """
+    notifications = list(notifications)
+    recipient_ids = list({str(notification.recipient_id) for notification in notifications})
+    users = {str(user.id): user for user in User.objects.filter(id__in=recipient_ids)}
+    masks = preference_masks.get_many(recipient_ids)
+    
+    groups = defaultdict(list)
+    buffered = []
+    for notification in notifications:
+        recipient_id = str(notification.recipient_id)
+        user = users.get(recipient_id)
+        if not user:
+            continue
+        mask = masks[recipient_id]
+        if not allows(mask, notification.notification_type, 'email'):
+            continue
+        if should_buffer(mask):
+            buffered.append((notification, user))
+            continue
+        content = (
+            notification.title, notification.message, notification.notification_type,
+            notification.action_url, notification.action_label,
+        )
+        groups[content].append((notification, user))
+    
+    messages = []
+    notification_ids = []
+    for items in groups.values():
+        notification = items[0][0]
+        messages.extend(build_fanout_emails(
+            f"[Office Management] {notification.title}",
+            'emails/notification.html',
+            {'notification': notification, 'action_url': notification.action_url},
+            [user for _, user in items],
+        ))
+        notification_ids.extend(notification.id for notification, _ in items)
+    
+    buffer_notifications(buffered)
+    return len(enqueue_messages(messages, notification_ids))
+
+
 def cleanup_old_notifications(days=30):
     """
     Clean up old read notifications.
@@ -164,35 +326,214 @@ def cleanup_old_notifications(days=30):
     
     cutoff_date = timezone.now() - timedelta(days=days)
     
-    deleted_count = Notification.objects.filter(
+    notifications = Notification.objects.filter(
         is_read=True,
         read_at__lt=cutoff_date
-    ).delete()[0]
+    )
+    recipient_ids = set(notifications.values_list('recipient_id', flat=True))
+    deleted_count = notifications.delete()[0]
     
+    invalidate_notification_stats(recipient_ids)
     return deleted_count
 
 
+STATS_FIELDS = ['total', 'unread'] + [f'type:{value}' for value, _ in Notification.TYPE_CHOICES]
+
+
+def _stats_cache_key(user_id, field):
+    return f'notification_stats:{user_id}:{field}'
+
+
+def _format_stats(counts):
+    return {
+        'total': counts['total'],
+        'unread': counts['unread'],
+        'by_type': {value: counts[f'type:{value}'] for value, _ in Notification.TYPE_CHOICES},
+    }
+
+
+def aggregate_notification_stats(user_ids):
+    """
+    Count notifications for many users in a single $group aggregation.
+    Returns {user_id: {field: count}} for every field in STATS_FIELDS.
+    """
+    user_ids = [str(user_id) for user_id in user_ids]
+    stats = {user_id: dict.fromkeys(STATS_FIELDS, 0) for user_id in user_ids}
+    pipeline = [
+        {'$match': {'recipient_id': {'$in': user_ids}}},
+        {'$group': {
+            '_id': {'recipient_id': '$recipient_id', 'type': '$notification_type', 'is_read': '$is_read'},
+            'count': {'$sum': 1},
+        }},
+    ]
+    for row in Notification.objects.mongo_aggregate(pipeline):
+        counts = stats[row['_id']['recipient_id']]
+        counts['total'] += row['count']
+        if not row['_id']['is_read']:
+            counts['unread'] += row['count']
+        type_field = f"type:{row['_id']['type']}"
+        if type_field in counts:
+            counts[type_field] += row['count']
+    return stats
+
+
+def _cached_stats(user_id):
+    user_id = str(user_id)
+    keys = {field: _stats_cache_key(user_id, field) for field in STATS_FIELDS}
+    cached = cache.get_many(list(keys.values()))
+    if len(cached) == len(keys):
+        return {field: cached[key] for field, key in keys.items()}
+    
+    counts = aggregate_notification_stats([user_id])[user_id]
+    cache.set_many(
+        {keys[field]: count for field, count in counts.items()},
+        timeout=settings.NOTIFICATION_STATS_CACHE_TIMEOUT
+    )
+    return counts
+
+
 def get_notification_stats(user):
     """
-    Get notification statistics for a user.
+    Get notification statistics for a user, role and department broadcasts included.
+    Counters are cached and kept current as notifications are created and read;
+    a cache miss recomputes them with one aggregation.
+    """
+    counts = dict(_cached_stats(user.id))
+    for field, count in broadcast_counts(str(user.id), user).items():
+        if field in counts:
+            counts[field] += count
+    return _format_stats(counts)
+
+
+def get_unread_count(user_id, user=None):
+    """Unread notification and broadcast count for a user, from the cached stats"""
+    user_id = str(user_id)
+    return _cached_stats(user_id)['unread'] + broadcast_counts(user_id, user).get('unread', 0)
+
+
+def _adjust_stats(changes):
     """
-    notifications = Notification.objects.filter(recipient=user)
+    Apply {(user_id, field): delta} to cached counters.
+    Users without cached counters are skipped; a partially expired set is dropped.
+    """
+    stale = set()
+    for (user_id, field), delta in changes.items():
+        if not delta or user_id in stale:
+            continue
+        try:
+            cache.incr(_stats_cache_key(user_id, field), delta)
+        except ValueError:
+            stale.add(user_id)
+    if stale:
+        invalidate_notification_stats(stale)
+
+
+def record_notifications_created(notifications):
+    """Count newly created notifications into their recipients' cached stats"""
+    changes = defaultdict(int)
+    for notification in notifications:
+        user_id = str(notification.recipient_id)
+        changes[(user_id, 'total')] += 1
+        changes[(user_id, f'type:{notification.notification_type}')] += 1
+        if not notification.is_read:
+            changes[(user_id, 'unread')] += 1
+    _adjust_stats(changes)
+
+
+def record_notifications_read(user_id, count=1):
+    """Take notifications just marked as read off a user's cached unread count"""
+    _adjust_stats({(str(user_id), 'unread'): -count})
+
+
+def invalidate_notification_stats(user_ids):
+    """Drop cached stats so they are recomputed on next use"""
+    cache.delete_many([_stats_cache_key(str(user_id), field) for user_id in user_ids for field in STATS_FIELDS])
+
+
+def reconcile_notification_stats(since=None, batch_size=500):
+    """
+    Compare the cached counters of users whose notifications changed since
+    `since` with a fresh aggregation and drop the ones that drifted.
+    Counters that are not cached are left alone. Returns the number of users
+    whose counters were dropped.
+    """
+    since = since or timezone.now() - timedelta(seconds=settings.NOTIFICATION_STATS_CACHE_TIMEOUT)
+    pipeline = [
+        {'$match': {'$or': [{'created_at': {'$gte': since}}, {'read_at': {'$gte': since}}]}},
+        {'$group': {'_id': '$recipient_id'}},
+    ]
+    user_ids = [row['_id'] for row in Notification.objects.mongo_aggregate(pipeline) if row['_id']]
     
-    return {
-        'total': notifications.count(),
-        'unread': notifications.filter(is_read=False).count(),
-        'by_type': {
-            'info': notifications.filter(notification_type='info').count(),
-            'success': notifications.filter(notification_type='success').count(),
-            'warning': notifications.filter(notification_type='warning').count(),
-            'error': notifications.filter(notification_type='error').count(),
-            'task': notifications.filter(notification_type='task').count(),
-            'attendance': notifications.filter(notification_type='attendance').count(),
-            'salary': notifications.filter(notification_type='salary').count(),
-            'learning': notifications.filter(notification_type='learning').count(),
-            'system': notifications.filter(notification_type='system').count(),
-        }
-    }
+    drifted = []
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        keys = {(user_id, field): _stats_cache_key(user_id, field) for user_id in batch for field in STATS_FIELDS}
+        cached = cache.get_many(list(keys.values()))
+        if not cached:
+            continue
+        actual = aggregate_notification_stats(batch)
+        for user_id in batch:
+            if any(
+                keys[(user_id, field)] in cached and cached[keys[(user_id, field)]] != actual[user_id][field]
+                for field in STATS_FIELDS
+            ):
+                drifted.append(user_id)
+    
+    # Dropped rather than overwritten, so increments racing this check aren't lost
+    invalidate_notification_stats(drifted)
+    return len(drifted)
+
+
+def mark_notifications_read(user_id, notification_ids=None, before=None, notification_type=None):
+    """
+    Mark a user's unread notifications as read with a single update_many.
+    Narrow the update to explicit ids, notifications created before a time
+    and/or one notification type; with none given every notification is marked.
+    Without explicit ids the user's matching broadcasts are marked as well.
+    Returns the number of notifications and broadcasts marked.
+    """
+    user_id = str(user_id)
+    query = {'recipient_id': user_id, 'is_read': False}
+    if notification_ids is not None:
+        query['id'] = {'$in': [int(notification_id) for notification_id in notification_ids]}
+    if before is not None:
+        query['created_at'] = {'$lt': before}
+    if notification_type is not None:
+        query['notification_type'] = notification_type
+    
+    now = timezone.now()
+    result = Notification.objects.mongo_update_many(
+        query,
+        {'$set': {'is_read': True, 'read_at': now, 'updated_at': now}}
+    )
+    if result.modified_count:
+        record_notifications_read(user_id, result.modified_count)
+    
+    marked = result.modified_count
+    if notification_ids is None:
+        marked += mark_all_broadcasts_read(user_id, before=before, notification_type=notification_type)
+    return marked
+
+
+def unread_count_event(user_id):
+    """
+    Outbox event for a user's unread count. Only the user is recorded; the
+    relay counts when it publishes, so writers never count and the value sent
+    is current.
+    """
+    return (
+        f'user_{user_id}',
+        {
+            'type': 'unread_count_update',
+            'user_id': str(user_id)
+        },
+        f'user:{user_id}'
+    )
+
+
+def publish_unread_count(user_id):
+    """Push a user's unread count to their open notification sockets through the event outbox"""
+    return enqueue_event(*unread_count_event(user_id))
 
 
 # Predefined notification templates
@@ -224,7 +565,7 @@ NOTIFICATION_TEMPLATES = {
     'attendance_reminder': {
         'title': 'Attendance Reminder',
         'message': 'Don\'t forget to mark your attendance for today',
-        'type': 'info',
+        'type': 'attendance',
         'action_label': 'Mark Attendance'
     },
     'salary_processed': {
@@ -242,7 +583,7 @@ NOTIFICATION_TEMPLATES = {
     'training_session': {
         'title': 'Training Session Reminder',
         'message': 'You have a training session "{session_title}" scheduled for {datetime}',
-        'type': 'info',
+        'type': 'learning',
         'action_label': 'View Session'
     }
 }
@@ -269,3 +610,60 @@ def create_templated_notification(recipient, template_key, context=None, **kwarg
         action_label=template['action_label'],
         **kwargs
     )
+
+
+def deliver_notifications(notifications, send_emails=True):
+    """
+    Write unsaved notifications for many users with one insert, skipping those
+    the recipient's preferences don't allow in-app, then queue their emails and
+    push each new notification and unread count to the recipient's sockets.
+    Pass `send_emails=False` when the caller sends its own emails.
+    Returns the created notifications.
+    """
+    notifications = list(notifications)
+    masks = preference_masks.get_many([str(notification.recipient_id) for notification in notifications])
+    allowed = [
+        notification for notification in notifications
+        if allows(masks[str(notification.recipient_id)], notification.notification_type, 'inapp')
+    ]
+    
+    created = Notification.objects.bulk_create(allowed)
+    record_notifications_created(created)
+    if send_emails:
+        send_bulk_email_notifications(created)
+    enqueue_events(
+        [notification_event(notification) for notification in created] +
+        [unread_count_event(user_id) for user_id in {str(notification.recipient_id) for notification in created}]
+    )
+    return created
+
+
+def send_templated_bulk_notifications(recipient_ids, template_key, context=None, action_url='', batch_size=None):
+    """
+    Fan a templated notification out to many users in batches of
+    NOTIFICATION_FANOUT_BATCH_SIZE. Returns the number created.
+    """
+    if template_key not in NOTIFICATION_TEMPLATES:
+        raise ValueError(f"Unknown notification template: {template_key}")
+    
+    template = NOTIFICATION_TEMPLATES[template_key]
+    message = template['message'].format(**(context or {}))
+    batch_size = batch_size or settings.NOTIFICATION_FANOUT_BATCH_SIZE
+    recipient_ids = list(recipient_ids)
+    
+    created_count = 0
+    for start in range(0, len(recipient_ids), batch_size):
+        recipients = User.objects.filter(id__in=recipient_ids[start:start + batch_size], is_active=True).only('id')
+        created = deliver_notifications(
+            Notification(
+                recipient_id=str(recipient.id),
+                title=template['title'],
+                message=message,
+                notification_type=template['type'],
+                action_url=action_url,
+                action_label=template['action_label']
+            )
+            for recipient in recipients
+        )
+        created_count += len(created)
+    return created_count
@@ -6,8 +6,12 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from accounts.permissions import IsAdminUser
-from .models import Notification, NotificationPreference, SystemAnnouncement
-from .serializers import NotificationSerializer, NotificationPreferenceSerializer, SystemAnnouncementSerializer
+from .models import BroadcastNotification, Notification, NotificationPreference, SystemAnnouncement
+from .broadcast import broadcasts_for_user, mark_broadcasts_read
+from .serializers import (
+    BroadcastNotificationSerializer, NotificationSerializer, NotificationPreferenceSerializer, NotificationReadSerializer, SystemAnnouncementSerializer
+)
+from .utils import get_notification_stats, get_unread_count, mark_notifications_read, publish_unread_count
 
 
 class NotificationListView(generics.ListAPIView):
@@ -25,16 +29,84 @@ class NotificationListView(generics.ListAPIView):
 def mark_notification_read(request, pk):
     """Mark notification as read"""
     
+    user_id = str(request.user.id)
+    if not mark_notifications_read(user_id, notification_ids=[pk]):
+        if not Notification.objects.filter(pk=pk, recipient_id=user_id).exists():
+            return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+    else:
+        publish_unread_count(user_id)
+    
+    return Response({
+        'message': 'Notification marked as read'
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notifications_read_bulk(request):
+    """Mark many notifications as read: by ids, created before a time, by type, or all"""
+    
+    serializer = NotificationReadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    
+    user_id = str(request.user.id)
+    marked = mark_notifications_read(
+        user_id,
+        notification_ids=data.get('ids'),
+        before=data.get('before'),
+        notification_type=data.get('notification_type'),
+    )
+    if marked:
+        publish_unread_count(user_id)
+    
+    return Response({
+        'message': f'{marked} notifications marked as read',
+        'marked': marked,
+        'unread': get_unread_count(user_id),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def broadcast_list(request):
+    """List role and department broadcasts for the current user"""
+    
+    broadcasts, read_ids = broadcasts_for_user(request.user)
+    serializer = BroadcastNotificationSerializer(broadcasts, many=True, context={'read_ids': read_ids})
+    
+    return Response({
+        'results': serializer.data,
+        'unread': sum(1 for broadcast in broadcasts if str(broadcast.id) not in read_ids),
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_broadcast_read(request, pk):
+    """Mark a broadcast as read for the current user"""
+    
     try:
-        notification = Notification.objects.get(pk=pk, recipient=request.user)
-        notification.mark_as_read()
-        
-        return Response({
-            'message': 'Notification marked as read'
-        })
+        broadcast = BroadcastNotification.objects.get(pk=pk)
+    except BroadcastNotification.DoesNotExist:
+        return Response({'error': 'Broadcast not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not broadcast.is_for_user(request.user) or broadcast.created_at < request.user.date_joined:
+        return Response({'error': 'Broadcast not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if mark_broadcasts_read(request.user.id, [broadcast.id]):
+        publish_unread_count(str(request.user.id))
+    return Response({
+        'message': 'Broadcast marked as read'
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def notification_stats(request):
+    """Get notification counts for the current user"""
     
-    except Notification.DoesNotExist:
-        return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(get_notification_stats(request.user))
 
 
 class NotificationPreferenceView(generics.RetrieveUpdateAPIView):
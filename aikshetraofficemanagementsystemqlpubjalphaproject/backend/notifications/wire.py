@@ -0,0 +1,120 @@
+"""
+Websocket frame encodings.
+Clients get JSON text frames by default. A client that offers the
+`office.msgpack.v1` subprotocol gets binary MessagePack frames instead, with
+every key found in KEY_DICTIONARY sent as its small integer index. Clients
+decode with the same dictionary, which is also sent to them as the first frame
+after connecting. Keys not in the dictionary are sent as strings, so payloads
+can grow new fields without a protocol change. Integer keys in a payload are
+sent as strings, as JSON would, so an integer key on the wire is always a
+dictionary index.
+
+Run `manage.py benchmark_websocket_encoding` to compare bytes per frame and
+encode/decode time against JSON.
+"""
+
+import json
+
+import msgpack
+
+
+MSGPACK_SUBPROTOCOL = 'office.msgpack.v1'
+
+# Append only: indexes are part of the v1 protocol
+KEY_DICTIONARY = [
+    'type', 'data', 'id', 'title', 'message', 'status', 'count',
+    'notification', 'notification_id', 'notification_ids', 'is_read', 'created_at',
+    'action_url', 'action_label', 'collapse_key', 'collapse_count',
+    'priority', 'due_date', 'completion_percentage', 'assigned_by',
+    'date', 'check_in_time', 'check_out_time', 'hours_worked',
+    'content', 'notifications', 'reason', 'before', 'notification_type', 'keys',
+    'broadcast', 'broadcast_ids',
+]
+KEY_INDEXES = {key: index for index, key in enumerate(KEY_DICTIONARY)}
+
+
+def _compress_key(key):
+    if isinstance(key, str):
+        return KEY_INDEXES.get(key, key)
+    if isinstance(key, int) and not isinstance(key, bool):
+        # Integer keys are reserved for dictionary indexes
+        return str(key)
+    raise TypeError(f'Unsupported map key {key!r}')
+
+
+def _compress_keys(value):
+    if isinstance(value, dict):
+        return {_compress_key(key): _compress_keys(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_compress_keys(item) for item in value]
+    return value
+
+
+def _expand_key(key):
+    if isinstance(key, str):
+        return key
+    if isinstance(key, int) and 0 <= key < len(KEY_DICTIONARY):
+        return KEY_DICTIONARY[key]
+    raise ValueError(f'Unknown map key {key!r}')
+
+
+def _expand_keys(value):
+    if isinstance(value, dict):
+        return {_expand_key(key): _expand_keys(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand_keys(item) for item in value]
+    return value
+
+
+def encode_msgpack(payload):
+    return msgpack.packb(_compress_keys(payload), use_bin_type=True)
+
+
+def decode_msgpack(data):
+    # Integer map keys are how dictionary keys arrive, so they must be allowed
+    return _expand_keys(msgpack.unpackb(data, raw=False, strict_map_key=False))
+
+
+def encode_json(payload):
+    return json.dumps(payload)
+
+
+def decode_json(data):
+    return json.loads(data)
+
+
+def dictionary_frame():
+    """First frame on a MessagePack connection, with plain string keys"""
+    return msgpack.packb({'type': 'key_dictionary', 'keys': KEY_DICTIONARY}, use_bin_type=True)
+
+
+class WireFormatMixin:
+    """
+    Negotiates the frame encoding for a consumer and encodes/decodes frames.
+    """
+
+    def negotiate_subprotocol(self):
+        """Pick MessagePack if the client offered it; returns the subprotocol to accept"""
+        offered = self.scope.get('subprotocols') or []
+        self.use_msgpack = MSGPACK_SUBPROTOCOL in offered
+        return MSGPACK_SUBPROTOCOL if self.use_msgpack else None
+
+    async def accept_negotiated(self):
+        await self.accept(subprotocol=self.negotiate_subprotocol())
+        if self.use_msgpack:
+            await self.send(bytes_data=dictionary_frame())
+
+    async def send_payload(self, payload):
+        if getattr(self, 'use_msgpack', False):
+            await self.send(bytes_data=encode_msgpack(payload))
+        else:
+            await self.send(text_data=encode_json(payload))
+
+    def decode_payload(self, text_data=None, bytes_data=None):
+        """Decode an incoming frame; raises ValueError if it is malformed"""
+        if bytes_data is not None:
+            try:
+                return decode_msgpack(bytes_data)
+            except (msgpack.ExtraData, msgpack.FormatError, msgpack.StackError, ValueError, TypeError) as e:
+                raise ValueError(str(e))
+        return decode_json(text_data)
@@ -0,0 +1,62 @@
+"""
+Cross-process change feed for per-process caches.
+A version counter in the shared cache is bumped on every change, and each
+version can carry the key that changed. A process holding a cached copy
+compares its version with the counter: if it is only a few changes behind it
+replays the logged keys, otherwise it rebuilds.
+"""
+
+from django.core.cache import cache
+
+
+class ChangeLog:
+    """
+    Version counter plus an optional short-lived log of changed keys.
+    Without a change key template only the counter is kept and readers that
+    fall behind always rebuild.
+    """
+
+    def __init__(self, version_key, change_key=None, max_replayed=0, timeout=60 * 60):
+        self.version_key = version_key
+        self.change_key = change_key
+        self.max_replayed = max_replayed
+        self.timeout = timeout
+
+    def current(self):
+        return cache.get(self.version_key, 0)
+
+    def publish(self, key=None):
+        """
+        Record a change and return its version.
+        A change without a key can't be replayed, so readers rebuild.
+        """
+        cache.add(self.version_key, 0, timeout=None)
+        version = cache.incr(self.version_key)
+        if key is not None and self.change_key:
+            cache.set(self.change_key.format(version), key, timeout=self.timeout)
+        return version
+
+    def changes_since(self, version):
+        """
+        Return (current version, changed keys) for a reader at `version`.
+        Changed keys are None when the reader must rebuild: it has no version
+        yet, is too far behind, or part of the log has expired.
+        """
+        current = self.current()
+        if current == version:
+            return current, []
+
+        behind = current - version if version is not None else None
+        if behind is None or behind < 0 or behind > self.max_replayed or not self.change_key:
+            return current, None
+
+        keys = [self.change_key.format(v) for v in range(version + 1, current + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return current, None
+        return current, set(changes.values())
+
+    @staticmethod
+    def follows(version, new_version):
+        """Whether a published version directly follows a reader's, so no change was missed"""
+        return version is not None and new_version == version + 1
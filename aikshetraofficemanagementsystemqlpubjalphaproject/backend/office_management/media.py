@@ -0,0 +1,170 @@
+"""
+Protected media serving for uploaded files.
+Supports byte-range requests, ETag/If-None-Match revalidation and offloading
+the transfer to the web server via X-Accel-Redirect (nginx) or X-Sendfile.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+)
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _file_etag(stat):
+    """Strong ETag derived from size and modification time"""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def _parse_range(header, size):
+    """
+    Parse a single-range `Range` header into (start, end) inclusive offsets.
+    Returns None when the header should be ignored and False when unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multi-range and malformed requests fall back to the full body
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _read_chunks(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _aread_chunks(path, start, length):
+    # Read in a thread per chunk so the event loop never blocks on disk and
+    # the body is never buffered whole
+    handle = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    try:
+        await sync_to_async(handle.seek, thread_sensitive=False)(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await sync_to_async(handle.read, thread_sensitive=False)(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(handle.close, thread_sensitive=False)()
+
+
+def _is_asgi(request):
+    # DRF views pass a Request wrapping the Django request
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def serve_protected_file(request, field_file, as_attachment=False):
+    """
+    Serve a FileField value after the caller has checked permissions.
+    Accepts a Django HttpRequest or a DRF Request.
+    """
+    if not field_file:
+        raise Http404('File not found')
+
+    path = field_file.path
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('File not found')
+
+    size = stat.st_size
+    etag = _file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    filename = os.path.basename(field_file.name)
+    disposition = 'attachment' if as_attachment else 'inline'
+
+    def with_headers(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+        return response
+
+    if _etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+        return with_headers(HttpResponseNotModified())
+
+    # Let the web server stream the bytes (it also handles Range itself)
+    offload = settings.MEDIA_OFFLOAD
+    if offload == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_INTERNAL_URL + quote(field_file.name)
+        return with_headers(response)
+    if offload == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return with_headers(response)
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header:
+        # If-Range: only honour the range while the client's copy is current
+        if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+        if not if_range or if_range == etag or parse_http_date_safe(if_range) == int(stat.st_mtime):
+            byte_range = _parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return with_headers(response)
+
+    if byte_range is None:
+        if _is_asgi(request):
+            response = StreamingHttpResponse(_aread_chunks(path, 0, size), content_type=content_type)
+            response['Content-Length'] = str(size)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        return with_headers(response)
+
+    start, end = byte_range
+    length = end - start + 1
+    chunks = _aread_chunks if _is_asgi(request) else _read_chunks
+    response = StreamingHttpResponse(chunks(path, start, length), status=206, content_type=content_type)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return with_headers(response)
@@ -44,6 +44,9 @@ LOCAL_APPS = [
     'salary',
     'learning',
     'notifications',
+    'files',
+    'search',
+    'jobs',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -125,6 +128,44 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploaded files are stored once per unique content (see files.storage)
+STORAGES = {
+    'default': {
+        'BACKEND': 'files.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Protected media offload: '' (stream from Django), 'nginx' (X-Accel-Redirect) or 'sendfile' (X-Sendfile).
+# For nginx, MEDIA_INTERNAL_URL must map to MEDIA_ROOT in an `internal` location block.
+MEDIA_OFFLOAD = config('MEDIA_OFFLOAD', default='')
+MEDIA_INTERNAL_URL = config('MEDIA_INTERNAL_URL', default='/protected-media/')
+
+# Resumable chunked uploads (files app)
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+UPLOAD_MAX_SIZE = config('UPLOAD_MAX_SIZE', default=5 * 1024 * 1024 * 1024, cast=int)
+UPLOAD_SESSION_TTL_HOURS = config('UPLOAD_SESSION_TTL_HOURS', default=24, cast=int)
+UPLOAD_SESSION_DIR = config('UPLOAD_SESSION_DIR', default=os.path.join(BASE_DIR, 'upload_sessions'))
+
+# Employee IDs leased per round trip to the sequence counter
+EMPLOYEE_ID_BLOCK_SIZE = config('EMPLOYEE_ID_BLOCK_SIZE', default=20, cast=int)
+
+# Bulk user imports: rows per insert batch and password hashing processes (0 = one per CPU)
+BULK_IMPORT_BATCH_SIZE = config('BULK_IMPORT_BATCH_SIZE', default=500, cast=int)
+BULK_IMPORT_HASH_WORKERS = config('BULK_IMPORT_HASH_WORKERS', default=0, cast=int)
+
+# Square profile picture derivatives (edge length in pixels)
+PROFILE_PICTURE_SIZES = {
+    'small': 64,
+    'medium': 160,
+    'large': 400,
+}
+
+# Content-addressed blobs never change, so they can be cached forever
+IMMUTABLE_MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -173,6 +214,95 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Channel event outbox: signal side-effects are published to the channel layer by a relay
+CHANNEL_EVENT_BATCH_SIZE = config('CHANNEL_EVENT_BATCH_SIZE', default=200, cast=int)
+CHANNEL_EVENT_MAX_ATTEMPTS = config('CHANNEL_EVENT_MAX_ATTEMPTS', default=8, cast=int)
+CHANNEL_EVENT_RETRY_BASE_SECONDS = 1
+CHANNEL_EVENT_MAX_RETRY_DELAY = 60
+CHANNEL_EVENT_LEASE_SECONDS = 30
+CHANNEL_EVENT_SEND_TIMEOUT = 5
+# Queue a relay job on every enqueue; disable to rely on the periodic relay alone
+CHANNEL_EVENT_RELAY_ON_ENQUEUE = config('CHANNEL_EVENT_RELAY_ON_ENQUEUE', default=True, cast=bool)
+
+# Websocket events per connection are coalesced and sent as array frames
+WEBSOCKET_BATCH_WINDOW = 0.05
+WEBSOCKET_MAX_LATENCY = 0.25
+WEBSOCKET_MAX_BUFFERED_EVENTS = 1000
+
+# Cache configuration (shared across workers so invalidation is visible everywhere)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_CACHE_URL', default='redis://127.0.0.1:6379/1'),
+        'KEY_PREFIX': 'office_management',
+    },
+}
+
+# Learning path progress is cached per user until their enrollments change
+LEARNING_PATH_PROGRESS_CACHE_TIMEOUT = config('LEARNING_PATH_PROGRESS_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Notification stats counters are kept current incrementally; expiry bounds any drift
+NOTIFICATION_STATS_CACHE_TIMEOUT = config('NOTIFICATION_STATS_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Recipients per insert when a notification fans out to many users
+NOTIFICATION_FANOUT_BATCH_SIZE = 500
+
+# Read events arriving on a notification socket within this window are written together
+NOTIFICATION_READ_COALESCE_SECONDS = 0.25
+
+# Training session scheduling: 'reject' or 'warn' on double-booking
+TRAINING_SESSION_CONFLICT_MODE = config('TRAINING_SESSION_CONFLICT_MODE', default='reject')
+TRAINING_SESSION_WORKDAY_HOURS = (9, 18)
+
+# Email delivery (point EMAIL_HOST/EMAIL_PORT at a local SMTP stand-in for testing)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='no-reply@localhost')
+
+# Email outbox: emails per SMTP connection, retry backoff and claim lease
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+EMAIL_OUTBOX_LEASE_SECONDS = 5 * 60
+# Queue a drain job on every enqueue; disable to rely on the periodic drain alone
+EMAIL_OUTBOX_DRAIN_ON_ENQUEUE = config('EMAIL_OUTBOX_DRAIN_ON_ENQUEUE', default=True, cast=bool)
+
+# Background jobs: 'database' runs them on `run_jobs` workers, 'inprocess' on a
+# thread pool of the enqueuing process and 'eager' inline (for tests)
+JOBS_BACKEND = config('JOBS_BACKEND', default='database')
+JOBS_WORKER_CONCURRENCY = config('JOBS_WORKER_CONCURRENCY', default=4, cast=int)
+JOBS_DEFAULT_MAX_ATTEMPTS = config('JOBS_DEFAULT_MAX_ATTEMPTS', default=3, cast=int)
+JOBS_RETRY_BASE_SECONDS = 10
+JOBS_MAX_RETRY_DELAY = 60 * 60
+JOBS_LEASE_SECONDS = 60
+JOBS_POLL_INTERVAL = 1
+# Periodic jobs are queued by whichever worker holds the scheduler lease
+JOBS_SCHEDULER_LEASE_SECONDS = 30
+# A run missed during a leader handover is still queued if it is at most this late
+JOBS_SCHEDULER_MISFIRE_GRACE = 15 * 60
+# Succeeded and cancelled jobs are deleted this many days after they finish
+JOBS_RETENTION_DAYS = config('JOBS_RETENTION_DAYS', default=14, cast=int)
+
+# Reminders: attendance for anyone not checked in (cron, in TIME_ZONE) and
+# training sessions starting within the lead time
+ATTENDANCE_REMINDER_CRON = config('ATTENDANCE_REMINDER_CRON', default='0 10 * * 1-5')
+TRAINING_SESSION_REMINDER_MINUTES = config('TRAINING_SESSION_REMINDER_MINUTES', default=60, cast=int)
+
+# How far back the overdue sweeper looks when it has no watermark from a previous sweep
+OVERDUE_SWEEP_LOOKBACK_HOURS = 24
+
+# Minutes between notification digests for each NotificationPreference.email_frequency
+NOTIFICATION_DIGEST_INTERVALS = {
+    'hourly': 60,
+    'daily': 24 * 60,
+}
+
 # API Documentation
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Office Management API',
@@ -3,7 +3,7 @@ URL configuration for office_management project.
 Includes API endpoints and WebSocket routing.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
@@ -24,9 +24,16 @@ urlpatterns = [
     path('api/salary/', include('salary.urls')),
     path('api/learning/', include('learning.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/files/', include('files.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/jobs/', include('jobs.urls')),
 ]
 
 # Serve media files in development
 if settings.DEBUG:
+    from files.views import serve_blob
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}cas/(?P<path>.*)$', serve_blob),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
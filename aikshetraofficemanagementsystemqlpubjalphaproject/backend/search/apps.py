@@ -0,0 +1,14 @@
+"""
+Search app configuration.
+"""
+
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import search.signals
@@ -0,0 +1,302 @@
+"""
+Global search index maintenance and querying.
+Every searchable object is flattened into one SearchDocument holding its
+normalized tokens and the fields needed to filter results by permission, so a
+search is a single aggregation over one collection with a multikey token index.
+"""
+
+import re
+
+from django.apps import apps
+from django.utils import timezone
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from accounts.search import normalize_tokens
+from .models import SearchDocument
+
+
+# Upper bound on tokens stored per document (long descriptions and comment threads)
+MAX_DOCUMENT_TOKENS = 2000
+
+# Candidates fetched per type before ranking
+CANDIDATES_PER_TYPE = 50
+
+# Query terms beyond this are ignored
+MAX_QUERY_TERMS = 8
+
+# Score for a query term matching a document token
+TITLE_EXACT_SCORE = 4
+TITLE_PREFIX_SCORE = 3
+BODY_EXACT_SCORE = 2
+BODY_PREFIX_SCORE = 1
+
+
+def _tokens(*texts):
+    """Unique tokens of the given texts, in first-seen order"""
+    tokens = {}
+    for text in texts:
+        for token in normalize_tokens(text):
+            tokens[token] = True
+    return list(tokens)[:MAX_DOCUMENT_TOKENS]
+
+
+def user_document(user):
+    title = user.get_full_name()
+    return {
+        'title': title,
+        'subtitle': user.email,
+        'title_tokens': _tokens(title),
+        'tokens': _tokens(title, user.email, user.employee_id, user.department),
+        'is_visible': user.is_approved,
+    }
+
+
+def task_document(task, comments=None):
+    if comments is None:
+        TaskComment = apps.get_model('tasks', 'TaskComment')
+        comments = TaskComment.objects.filter(task_id=str(task.id)).values_list('comment', flat=True)
+    return {
+        'title': task.title,
+        'subtitle': task.get_status_display(),
+        'title_tokens': _tokens(task.title),
+        'tokens': _tokens(task.title, task.description, *comments),
+        # Non-admins only see tasks assigned to them, as in the task list view
+        'is_restricted': True,
+        'allowed_user_ids': [str(task.assigned_to_id)] if task.assigned_to_id else [],
+    }
+
+
+def project_document(project):
+    return {
+        'title': project.name,
+        'subtitle': project.get_status_display(),
+        'title_tokens': _tokens(project.name),
+        'tokens': _tokens(project.name, project.description),
+        # Projects are listed to employees and admins only (IsEmployeeOrAdmin)
+        'target_roles': ['admin', 'employee'],
+    }
+
+
+def course_document(course):
+    return {
+        'title': course.title,
+        'subtitle': course.category,
+        'title_tokens': _tokens(course.title),
+        'tokens': _tokens(course.title, course.category, course.description, course.learning_objectives),
+    }
+
+
+def announcement_document(announcement):
+    return {
+        'title': announcement.title,
+        'subtitle': announcement.get_priority_display(),
+        'title_tokens': _tokens(announcement.title),
+        'tokens': _tokens(announcement.title, announcement.content),
+        'is_visible': announcement.is_active and announcement.is_published,
+        'target_roles': list(announcement.target_roles or []),
+        'target_departments': list(announcement.target_departments or []),
+        'expire_at': announcement.expire_at,
+    }
+
+
+# doc_type -> (app_label, model_name, document builder)
+SEARCH_SOURCES = {
+    'user': ('accounts', 'User', user_document),
+    'task': ('tasks', 'Task', task_document),
+    'project': ('tasks', 'Project', project_document),
+    'course': ('learning', 'Course', course_document),
+    'announcement': ('notifications', 'SystemAnnouncement', announcement_document),
+}
+
+
+def source_model(doc_type):
+    app_label, model_name, _ = SEARCH_SOURCES[doc_type]
+    return apps.get_model(app_label, model_name)
+
+
+def build_document(doc_type, instance, now, **kwargs):
+    """Flatten one object into its search document"""
+    build = SEARCH_SOURCES[doc_type][2]
+    document = {
+        'doc_type': doc_type,
+        'object_id': str(instance.id),
+        'subtitle': '',
+        'is_visible': True,
+        'is_restricted': False,
+        'allowed_user_ids': [],
+        'target_roles': [],
+        'target_departments': [],
+        'expire_at': None,
+        'updated_at': now,
+    }
+    document.update(build(instance, **kwargs))
+    document['title'] = (document['title'] or '')[:200]
+    document['subtitle'] = (document['subtitle'] or '')[:200]
+    return document
+
+
+def _document_key(document):
+    return {'doc_type': document['doc_type'], 'object_id': document['object_id']}
+
+
+def index_object(doc_type, instance):
+    """Add or refresh one object in the search index"""
+    document = build_document(doc_type, instance, timezone.now())
+    SearchDocument.objects.mongo_update_one(_document_key(document), {'$set': document}, upsert=True)
+
+
+def index_objects(doc_type, instances):
+    """Add or refresh many objects of one type with a single bulk write"""
+    instances = list(instances)
+    if not instances:
+        return
+
+    kwargs_by_id = {}
+    if doc_type == 'task':
+        # Load the comment threads of all tasks in one query
+        TaskComment = apps.get_model('tasks', 'TaskComment')
+        comments = {str(instance.id): [] for instance in instances}
+        rows = TaskComment.objects.filter(task_id__in=list(comments)).values_list('task_id', 'comment')
+        for task_id, comment in rows:
+            comments[task_id].append(comment)
+        kwargs_by_id = {task_id: {'comments': thread} for task_id, thread in comments.items()}
+
+    now = timezone.now()
+    operations = []
+    for instance in instances:
+        document = build_document(doc_type, instance, now, **kwargs_by_id.get(str(instance.id), {}))
+        operations.append(UpdateOne(_document_key(document), {'$set': document}, upsert=True))
+    SearchDocument.objects.mongo_bulk_write(operations, ordered=False)
+
+
+def remove_object(doc_type, object_id):
+    """Drop one object from the search index"""
+    SearchDocument.objects.mongo_delete_one({'doc_type': doc_type, 'object_id': str(object_id)})
+
+
+def ensure_indexes():
+    """Create the collection indexes searches and upserts rely on"""
+    SearchDocument.objects.mongo_create_index([('tokens', ASCENDING)])
+    SearchDocument.objects.mongo_create_index(
+        [('doc_type', ASCENDING), ('object_id', ASCENDING)], unique=True
+    )
+
+
+def rebuild_type(doc_type, batch_size=500):
+    """
+    Re-index every object of one type, streaming the source collection in batches.
+    Documents not refreshed by the rebuild (deleted objects) are removed afterwards.
+    Returns the number of indexed objects.
+    """
+    started_at = timezone.now()
+    queryset = source_model(doc_type).objects.all().order_by('pk')
+    indexed = 0
+    batch = []
+
+    for instance in queryset.iterator(chunk_size=batch_size):
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            index_objects(doc_type, batch)
+            indexed += len(batch)
+            batch = []
+    if batch:
+        index_objects(doc_type, batch)
+        indexed += len(batch)
+
+    SearchDocument.objects.mongo_delete_many({'doc_type': doc_type, 'updated_at': {'$lt': started_at}})
+    return indexed
+
+
+def _user_department(user):
+    """Department name used for announcement targeting, as in SystemAnnouncement.should_show_to_user"""
+    try:
+        from employees.models import EmployeeDetail
+        department = EmployeeDetail.objects.get(user_id=str(user.id)).get_department()
+        return department.name if department else None
+    except EmployeeDetail.DoesNotExist:
+        return None
+
+
+def _permission_filter(user):
+    """Mongo filter limiting documents to those the user may see"""
+    user_id = str(user.id)
+    clauses = [
+        {'is_visible': True},
+        {'$or': [{'is_restricted': False}, {'allowed_user_ids': user_id}]},
+        {'$or': [{'target_roles': []}, {'target_roles': user.role}]},
+        {'$or': [{'expire_at': None}, {'expire_at': {'$gt': timezone.now()}}]},
+    ]
+    department = _user_department(user)
+    if department:
+        clauses.append({'$or': [{'target_departments': []}, {'target_departments': department}]})
+    return clauses
+
+
+def _score(terms, document):
+    """Rank a candidate by how well each query term matches its title and body"""
+    title_tokens = set(document['title_tokens'])
+    tokens = document['tokens']
+    score = 0
+    for term in terms:
+        if term in title_tokens:
+            score += TITLE_EXACT_SCORE
+        elif any(token.startswith(term) for token in title_tokens):
+            score += TITLE_PREFIX_SCORE
+        elif term in tokens:
+            score += BODY_EXACT_SCORE
+        else:
+            score += BODY_PREFIX_SCORE
+    return score
+
+
+def search_documents(user, query, limit=5, doc_types=None):
+    """
+    Search all indexed types in one aggregation.
+    Every query term must prefix-match a token of a result.
+    Returns {doc_type: [result, ...]} with at most `limit` ranked results per type.
+    """
+    terms = list(dict.fromkeys(normalize_tokens(query)))[:MAX_QUERY_TERMS]
+    doc_types = [doc_type for doc_type in (doc_types or SEARCH_SOURCES) if doc_type in SEARCH_SOURCES]
+    if not terms or not doc_types:
+        return {}
+
+    match = {
+        'doc_type': {'$in': doc_types},
+        'tokens': {'$all': [re.compile('^' + re.escape(term)) for term in terms]},
+    }
+    if not user.is_admin:
+        match['$and'] = _permission_filter(user)
+
+    projection = {'_id': 0, 'object_id': 1, 'title': 1, 'subtitle': 1, 'title_tokens': 1, 'tokens': 1}
+    pipeline = [
+        {'$match': match},
+        {'$sort': {'updated_at': DESCENDING}},
+        # One bounded candidate list per type, so a busy type can't crowd out the others
+        {'$facet': {
+            doc_type: [
+                {'$match': {'doc_type': doc_type}},
+                {'$limit': CANDIDATES_PER_TYPE},
+                {'$project': projection},
+            ]
+            for doc_type in doc_types
+        }},
+    ]
+
+    grouped = {}
+    for row in SearchDocument.objects.mongo_aggregate(pipeline):
+        for doc_type, documents in row.items():
+            ranked = sorted(
+                ((_score(terms, document), document) for document in documents),
+                key=lambda item: (-item[0], item[1]['title'].lower())
+            )
+            if ranked:
+                grouped[doc_type] = [
+                    {
+                        'id': document['object_id'],
+                        'title': document['title'],
+                        'subtitle': document['subtitle'],
+                        'score': score,
+                    }
+                    for score, document in ranked[:limit]
+                ]
+    return grouped
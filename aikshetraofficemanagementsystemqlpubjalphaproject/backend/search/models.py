@@ -0,0 +1,56 @@
+"""
+Global search index models.
+MongoDB-compatible using djongo.
+"""
+
+from django.db import models
+from djongo import models as djongo_models
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable object (user, task, project, course or announcement).
+    Documents are derived data, written with upserts keyed on (doc_type, object_id)
+    and rebuilt from the source collections by the `rebuild_search_index` command.
+    MongoDB-compatible with djongo.
+    """
+
+    TYPE_CHOICES = [
+        ('user', 'User'),
+        ('task', 'Task'),
+        ('project', 'Project'),
+        ('course', 'Course'),
+        ('announcement', 'Announcement'),
+    ]
+
+    doc_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    object_id = models.CharField(max_length=24, help_text="ObjectId reference to the indexed object")
+
+    # Display fields returned with results
+    title = models.CharField(max_length=200)
+    subtitle = models.CharField(max_length=200, blank=True)
+
+    # Normalized tokens; title tokens are also kept separately for ranking
+    tokens = djongo_models.JSONField(default=list, blank=True)
+    title_tokens = djongo_models.JSONField(default=list, blank=True)
+
+    # Permission filtering
+    is_visible = models.BooleanField(default=True, help_text="Whether non-admin users may see this object at all")
+    is_restricted = models.BooleanField(default=False, help_text="Only visible to allowed_user_ids")
+    allowed_user_ids = djongo_models.JSONField(default=list, blank=True)
+    target_roles = djongo_models.JSONField(default=list, blank=True, help_text="Empty = all roles")
+    target_departments = djongo_models.JSONField(default=list, blank=True, help_text="Empty = all departments")
+    expire_at = models.DateTimeField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Exposes mongo_* collection methods for upserts and aggregation
+    objects = djongo_models.DjongoManager()
+
+    class Meta:
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        unique_together = ['doc_type', 'object_id']
+
+    def __str__(self):
+        return f"{self.doc_type}: {self.title}"
@@ -0,0 +1,47 @@
+"""
+Django signals keeping the global search index in sync with its source models.
+"""
+
+from django.db.models.signals import post_save, post_delete
+
+from .indexing import SEARCH_SOURCES, index_object, remove_object, source_model
+
+
+def _connect(doc_type):
+    model = source_model(doc_type)
+
+    def object_saved(sender, instance, **kwargs):
+        try:
+            index_object(doc_type, instance)
+        except Exception as e:
+            print(f"Failed to index {doc_type} {instance.id}: {str(e)}")
+
+    def object_deleted(sender, instance, **kwargs):
+        try:
+            remove_object(doc_type, instance.id)
+        except Exception as e:
+            print(f"Failed to remove {doc_type} {instance.id} from search index: {str(e)}")
+
+    post_save.connect(object_saved, sender=model, weak=False, dispatch_uid=f'search_index_{doc_type}_saved')
+    post_delete.connect(object_deleted, sender=model, weak=False, dispatch_uid=f'search_index_{doc_type}_deleted')
+
+
+for doc_type in SEARCH_SOURCES:
+    _connect(doc_type)
+
+
+def task_comment_changed(sender, instance, **kwargs):
+    """
+    Re-index a task when its comment thread changes.
+    """
+    Task = source_model('task')
+    try:
+        index_object('task', Task.objects.get(id=instance.task_id))
+    except Task.DoesNotExist:
+        pass
+    except Exception as e:
+        print(f"Failed to index task {instance.task_id}: {str(e)}")
+
+
+post_save.connect(task_comment_changed, sender='tasks.TaskComment', dispatch_uid='search_index_task_comment_saved')
+post_delete.connect(task_comment_changed, sender='tasks.TaskComment', dispatch_uid='search_index_task_comment_deleted')
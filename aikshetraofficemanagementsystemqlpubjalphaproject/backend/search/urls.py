@@ -0,0 +1,10 @@
+"""
+URL patterns for global search APIs.
+"""
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.global_search, name='global_search'),
+]
@@ -0,0 +1,40 @@
+"""
+Global search API views.
+"""
+
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from .indexing import SEARCH_SOURCES, search_documents
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def global_search(request):
+    """
+    Search people, tasks, projects, courses and announcements at once.
+    Results are filtered to what the user may see and grouped by type.
+    Optional `types` limits the search to a comma-separated list of types.
+    """
+    
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response({'query': query, 'results': {}})
+    
+    doc_types = None
+    if request.GET.get('types'):
+        doc_types = [doc_type.strip() for doc_type in request.GET['types'].split(',')]
+        unknown = [doc_type for doc_type in doc_types if doc_type not in SEARCH_SOURCES]
+        if unknown:
+            return Response({
+                'error': f'Unknown search types: {", ".join(unknown)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 5)), 1), 20)
+    except ValueError:
+        limit = 5
+    
+    results = search_documents(request.user, query, limit=limit, doc_types=doc_types)
+    return Response({'query': query, 'results': results})
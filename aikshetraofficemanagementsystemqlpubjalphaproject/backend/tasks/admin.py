@@ -13,7 +13,7 @@ class ProjectAdmin(admin.ModelAdmin):
         'name', 'manager', 'status', 'priority', 'start_date', 
         'end_date', 'progress_percentage', 'is_overdue'
     ]
-    list_filter = ['status', 'priority', 'start_date', 'end_date']
+    list_filter = ['status', 'priority', 'overdue', 'start_date', 'end_date']
     search_fields = ['name', 'description']
     filter_horizontal = ['team_members']
     date_hierarchy = 'start_date'
@@ -31,7 +31,7 @@ class TaskAdmin(admin.ModelAdmin):
         'title', 'assigned_to', 'project', 'status', 'priority', 
         'due_date', 'completion_percentage', 'is_overdue'
     ]
-    list_filter = ['status', 'priority', 'project', 'due_date']
+    list_filter = ['status', 'priority', 'overdue', 'project', 'due_date']
     search_fields = ['title', 'description', 'assigned_to__first_name', 'assigned_to__last_name']
     date_hierarchy = 'due_date'
     
@@ -0,0 +1,14 @@
+"""
+Background jobs for task management.
+"""
+
+from jobs.registry import job
+
+from .utils import ensure_indexes, sweep_overdue
+
+
+@job(queue='notifications', concurrency=1, max_attempts=1, every=5 * 60)
+def sweep_overdue_items():
+    """Flag newly overdue tasks and projects and notify assignees and managers"""
+    ensure_indexes()
+    return sweep_overdue()
@@ -0,0 +1,26 @@
+"""
+Flag overdue tasks and projects.
+"""
+
+from django.core.management.base import BaseCommand
+
+from tasks.utils import ensure_indexes, sweep_overdue
+
+
+class Command(BaseCommand):
+    help = 'Flag tasks and projects whose deadline passed and notify assignees and project managers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Flag every open item past its deadline, not just those since the last sweep, without notifying'
+        )
+
+    def handle(self, *args, **options):
+        ensure_indexes()
+        totals = sweep_overdue(backfill=options['backfill'], notify=not options['backfill'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Flagged {totals['tasks']} tasks and {totals['projects']} projects, sent {totals['notified']} notifications"
+        ))
@@ -45,10 +45,14 @@ class Project(models.Model):
     # Budget and progress
     budget = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     progress_percentage = models.PositiveIntegerField(default=0, help_text="Progress from 0 to 100")
+    overdue = models.BooleanField(default=False, help_text="Set once the end date passes while the project is open")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Exposes mongo_* collection methods for index management
+    objects = djongo_models.DjongoManager()
+    
     class Meta:
         verbose_name = 'Project'
         verbose_name_plural = 'Projects'
@@ -57,6 +61,12 @@ class Project(models.Model):
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        # Edits only clear the flag; the overdue sweeper sets it and sends the notices
+        if self.overdue and not (self.end_date and self.is_overdue):
+            self.overdue = False
+        super().save(*args, **kwargs)
+    
     def get_manager(self):
         """Helper method to get the project manager"""
         if self.manager_id:
@@ -79,15 +89,15 @@ class Project(models.Model):
     
     @property
     def is_overdue(self):
-        """Check if project is overdue"""
-        return self.end_date < timezone.now().date() and self.status not in ['completed', 'cancelled']
+        """Check if project is overdue (end dates are in TIME_ZONE)"""
+        return self.end_date < timezone.localdate() and self.status not in ['completed', 'cancelled']
     
     @property
     def days_remaining(self):
         """Calculate days remaining for project completion"""
         if self.status in ['completed', 'cancelled']:
             return 0
-        return (self.end_date - timezone.now().date()).days
+        return (self.end_date - timezone.localdate()).days
 
 
 class Task(models.Model):
@@ -134,10 +144,14 @@ class Task(models.Model):
     # Completion details
     completed_at = models.DateTimeField(null=True, blank=True)
     completion_notes = models.TextField(blank=True)
+    overdue = models.BooleanField(default=False, help_text="Set once the due date passes while the task is open")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Exposes mongo_* collection methods for index management
+    objects = djongo_models.DjongoManager()
+    
     class Meta:
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
@@ -148,6 +162,12 @@ class Task(models.Model):
         user_name = assigned_user.get_full_name() if assigned_user else "Unknown User"
         return f"{self.title} - {user_name}"
     
+    def save(self, *args, **kwargs):
+        # Edits only clear the flag; the overdue sweeper sets it and sends the notices
+        if self.overdue and not (self.due_date and self.is_overdue):
+            self.overdue = False
+        super().save(*args, **kwargs)
+    
     def get_project(self):
         """Helper method to get the associated project"""
         if self.project_id:
@@ -230,3 +250,29 @@ class TaskComment(models.Model):
             return User.objects.get(id=self.user_id)
         except User.DoesNotExist:
             return None
+
+
+class OverdueSweep(models.Model):
+    """
+    Watermark of the overdue sweeper: when items of a kind were last swept.
+    Only advanced once a sweep's notices are delivered.
+    MongoDB-compatible with djongo.
+    """
+    
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('project', 'Project'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, unique=True)
+    swept_at = models.DateTimeField(help_text="Deadlines and edits before this were already swept")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Overdue Sweep'
+        verbose_name_plural = 'Overdue Sweeps'
+        ordering = ['kind']
+    
+    def __str__(self):
+        return f"{self.kind} swept at {self.swept_at}"
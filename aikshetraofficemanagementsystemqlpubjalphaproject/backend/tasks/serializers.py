@@ -17,6 +17,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = '__all__'
+        read_only_fields = ['overdue']
     
     def get_team_member_names(self, obj):
         return [member.get_full_name() for member in obj.team_members.all()]
@@ -33,7 +34,7 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = '__all__'
-        read_only_fields = ['completed_at']
+        read_only_fields = ['completed_at', 'overdue']
 
 
 class TaskCommentSerializer(serializers.ModelSerializer):
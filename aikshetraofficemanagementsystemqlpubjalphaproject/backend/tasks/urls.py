@@ -10,5 +10,6 @@ urlpatterns = [
     path('', views.TaskListCreateView.as_view(), name='task_list'),
     path('<int:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('<int:pk>/complete/', views.complete_task, name='complete_task'),
+    path('<int:pk>/attachment/', views.task_attachment, name='task_attachment'),
     path('<int:task_id>/comments/', views.TaskCommentListCreateView.as_view(), name='task_comments'),
 ]
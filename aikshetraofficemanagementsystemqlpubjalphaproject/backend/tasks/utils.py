@@ -0,0 +1,195 @@
+"""
+Utility functions for task management.
+Includes the overdue sweeper: tasks and projects are flagged `overdue` when
+their deadline passes while they are still open, so overdue lists are indexed
+queries, and assignees and project managers are told once, in batches.
+
+Each sweep only looks at deadlines between its watermark (the previous sweep)
+and now, plus items edited since the watermark, which catches deadlines edited
+into the past and reopened items. Saving never sets the flag, only clears it,
+so every item that becomes overdue is flagged and announced by the sweeper.
+
+Items are flagged and the watermark (stored as an OverdueSweep) advanced only
+after the notices are delivered, so a sweep that fails part way is repeated in
+full by the next one: notices are delivered at least once, never lost.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from pymongo import ASCENDING
+
+from notifications.models import Notification
+from notifications.utils import deliver_notifications
+
+from .models import OverdueSweep, Project, Task
+
+
+OPEN_TASK_STATUSES = ['todo', 'in_progress', 'review']
+OPEN_PROJECT_STATUSES = ['planning', 'active', 'on_hold']
+
+# Titles named in a notice before the rest are counted
+MAX_LISTED_TITLES = 3
+
+
+def ensure_indexes():
+    """Indexes serving both the sweep and overdue filters"""
+    Task.objects.mongo_create_index([('overdue', ASCENDING), ('due_date', ASCENDING)])
+    Task.objects.mongo_create_index([('overdue', ASCENDING), ('updated_at', ASCENDING)])
+    Project.objects.mongo_create_index([('overdue', ASCENDING), ('end_date', ASCENDING)])
+    Project.objects.mongo_create_index([('overdue', ASCENDING), ('updated_at', ASCENDING)])
+
+
+def _watermark(kind, now):
+    watermark = OverdueSweep.objects.filter(kind=kind).values_list('swept_at', flat=True).first()
+    if watermark is None:
+        # First sweep
+        watermark = now - timedelta(hours=settings.OVERDUE_SWEEP_LOOKBACK_HOURS)
+    return watermark
+
+
+def _advance_watermark(kind, now):
+    OverdueSweep.objects.update_or_create(kind=kind, defaults={'swept_at': now})
+
+
+def find_overdue_tasks(now=None, backfill=False):
+    """
+    Open, unflagged tasks whose due date passed, or that were edited, since the
+    last sweep (or ever, with `backfill`).
+    """
+    now = now or timezone.now()
+    tasks = Task.objects.filter(overdue=False, status__in=OPEN_TASK_STATUSES, due_date__lt=now)
+    if not backfill:
+        watermark = _watermark('task', now)
+        tasks = tasks.filter(Q(due_date__gte=watermark) | Q(updated_at__gte=watermark))
+    return list(tasks.order_by('due_date'))
+
+
+def find_overdue_projects(now=None, backfill=False):
+    """
+    Open, unflagged projects whose end date passed, or that were edited, since
+    the last sweep (or ever, with `backfill`).
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    projects = Project.objects.filter(overdue=False, status__in=OPEN_PROJECT_STATUSES, end_date__lt=today)
+    if not backfill:
+        watermark = _watermark('project', now)
+        projects = projects.filter(Q(end_date__gte=timezone.localdate(watermark)) | Q(updated_at__gte=watermark))
+    return list(projects.order_by('end_date'))
+
+
+def _titles(names):
+    listed = ', '.join(f'"{name}"' for name in names[:MAX_LISTED_TITLES])
+    if len(names) > MAX_LISTED_TITLES:
+        listed += f' and {len(names) - MAX_LISTED_TITLES} more'
+    return listed
+
+
+def overdue_notifications(tasks, projects):
+    """
+    Build one notice per recipient and kind: assignees about their tasks,
+    project managers about tasks in their projects and about their projects.
+    """
+    project_ids = {task.project_id for task in tasks if task.project_id}
+    managers = {
+        str(project_id): manager_id
+        for project_id, manager_id in Project.objects.filter(id__in=list(project_ids)).values_list('id', 'manager_id')
+    }
+    
+    assigned = defaultdict(list)
+    managed = defaultdict(list)
+    for task in tasks:
+        assigned[task.assigned_to_id].append(task)
+        manager_id = managers.get(str(task.project_id))
+        if manager_id and manager_id != task.assigned_to_id:
+            managed[manager_id].append(task)
+    
+    owned = defaultdict(list)
+    for project in projects:
+        if project.manager_id:
+            owned[project.manager_id].append(project)
+    
+    notifications = []
+    for user_id, user_tasks in assigned.items():
+        if len(user_tasks) == 1:
+            task = user_tasks[0]
+            title = 'Task Overdue'
+            message = f'Task "{task.title}" was due {timezone.localtime(task.due_date).strftime("%b %d, %Y %H:%M")}'
+            action_url = f'/tasks/{task.id}'
+        else:
+            title = 'Tasks Overdue'
+            message = f'{len(user_tasks)} of your tasks are overdue: {_titles([task.title for task in user_tasks])}'
+            action_url = '/tasks?overdue=true'
+        notifications.append(Notification(
+            recipient_id=str(user_id),
+            title=title,
+            message=message,
+            notification_type='task',
+            action_url=action_url,
+            action_label='View Task' if len(user_tasks) == 1 else 'View Tasks',
+            data={'task_ids': [task.id for task in user_tasks]}
+        ))
+    
+    for user_id, project_tasks in managed.items():
+        notifications.append(Notification(
+            recipient_id=str(user_id),
+            title='Project Tasks Overdue',
+            message=(
+                f'{len(project_tasks)} task(s) in your projects are overdue: '
+                f'{_titles([task.title for task in project_tasks])}'
+            ),
+            notification_type='task',
+            action_url='/tasks?overdue=true',
+            action_label='View Tasks',
+            data={'task_ids': [task.id for task in project_tasks]}
+        ))
+    
+    for user_id, user_projects in owned.items():
+        if len(user_projects) == 1:
+            message = f'Project "{user_projects[0].name}" passed its end date of {user_projects[0].end_date.strftime("%b %d, %Y")}'
+        else:
+            message = f'{len(user_projects)} of your projects passed their end date: {_titles([project.name for project in user_projects])}'
+        notifications.append(Notification(
+            recipient_id=str(user_id),
+            title='Project Overdue' if len(user_projects) == 1 else 'Projects Overdue',
+            message=message,
+            notification_type='task',
+            action_url='/tasks',
+            action_label='View Projects',
+            data={'project_ids': [project.id for project in user_projects]}
+        ))
+    
+    return notifications
+
+
+def sweep_overdue(now=None, backfill=False, notify=True):
+    """
+    Notify the people responsible for newly overdue tasks and projects in
+    batches of NOTIFICATION_FANOUT_BATCH_SIZE, then flag the items and advance
+    the watermark. Delivery also pushes each notice to the recipient's sockets.
+    Returns {'tasks': n, 'projects': n, 'notified': n}.
+    """
+    now = now or timezone.now()
+    tasks = find_overdue_tasks(now, backfill)
+    projects = find_overdue_projects(now, backfill)
+    
+    # Any delivery error propagates before anything is flagged or advanced
+    notified = 0
+    if notify:
+        notifications = overdue_notifications(tasks, projects)
+        batch_size = settings.NOTIFICATION_FANOUT_BATCH_SIZE
+        for start in range(0, len(notifications), batch_size):
+            notified += len(deliver_notifications(notifications[start:start + batch_size]))
+    
+    if tasks:
+        Task.objects.filter(id__in=[task.id for task in tasks], overdue=False).update(overdue=True)
+    if projects:
+        Project.objects.filter(id__in=[project.id for project in projects], overdue=False).update(overdue=True)
+    _advance_watermark('task', now)
+    _advance_watermark('project', now)
+    
+    return {'tasks': len(tasks), 'projects': len(projects), 'notified': notified}
@@ -6,6 +6,7 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from accounts.permissions import IsAdminUser, IsEmployeeOrAdmin
+from office_management.media import serve_protected_file
 from .models import Project, Task, TaskComment
 from .serializers import ProjectSerializer, TaskSerializer, TaskCommentSerializer
 
@@ -13,10 +14,15 @@ from .serializers import ProjectSerializer, TaskSerializer, TaskCommentSerialize
 class ProjectListCreateView(generics.ListCreateAPIView):
     """List and create projects"""
     
-    queryset = Project.objects.select_related('manager').prefetch_related('team_members')
     serializer_class = ProjectSerializer
     permission_classes = [IsEmployeeOrAdmin]
     
+    def get_queryset(self):
+        queryset = Project.objects.select_related('manager').prefetch_related('team_members')
+        if self.request.GET.get('overdue') == 'true':
+            queryset = queryset.filter(overdue=True).order_by('end_date')
+        return queryset
+    
     def get_permissions(self):
         if self.request.method == 'POST':
             return [IsAdminUser()]
@@ -31,8 +37,12 @@ class TaskListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         if self.request.user.is_admin:
-            return Task.objects.select_related('assigned_to', 'assigned_by', 'project')
-        return Task.objects.filter(assigned_to=self.request.user).select_related('assigned_by', 'project')
+            queryset = Task.objects.select_related('assigned_to', 'assigned_by', 'project')
+        else:
+            queryset = Task.objects.filter(assigned_to=self.request.user).select_related('assigned_by', 'project')
+        if self.request.GET.get('overdue') == 'true':
+            queryset = queryset.filter(overdue=True).order_by('due_date')
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(assigned_by=self.request.user)
@@ -69,6 +79,23 @@ def complete_task(request, pk):
         return Response({'error': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def task_attachment(request, pk):
+    """Download a task's attachment"""
+    
+    try:
+        task = Task.objects.get(pk=pk)
+    except Task.DoesNotExist:
+        return Response({'error': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    user_id = str(request.user.id)
+    if not request.user.is_admin and user_id not in (task.assigned_to_id, task.assigned_by_id):
+        return Response({'error': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return serve_protected_file(request, task.attachments, as_attachment=True)
+
+
 class TaskCommentListCreateView(generics.ListCreateAPIView):
     """List and create task comments"""
     